@@ -1,6 +1,7 @@
 from __future__ import print_function, absolute_import
 
-from pymel.core import ls, PyNode
+from maya.api import OpenMaya
+from pymel.core import cmds, ls, PyNode, warning
 
 from . import alt # noqa
 from . import path # noqa
@@ -47,8 +48,8 @@ def jointPath(obj):
     '''
     for connection in obj.message.listConnections(p=True):
         if type(connection.node()).__name__ == 'BPJoint': # Test via string name to prevent import cycles
+            node = connection.node()
             if connection.attrName() == 'realJoint':
-                node = connection.node()
                 return 'real:' + node.card.name() + '.' + str(node.card.joints.index(node)) + '|' + node.name()
             elif connection.attrName() == 'realJointMirror':
                 return 'mirror:' + node.card.name() + '.' + str(node.card.joints.index(node)) + '|' + node.name()
@@ -63,6 +64,7 @@ def getIds(obj):
     ids = {
         'short': shortName(obj),
         'long': obj.longName(),
+        'uuid': cmds.ls(obj.name(), uuid=True)[0],
     }
     
     path_ = cardPath(obj)
@@ -80,14 +82,144 @@ def findFromIds(ids):
     '''
     Given the dict from `getIds()`, returns an object if possible.
     
+    Use `findManyFromIds()` when looking up several.
+    
     ..todo:: Process card path and joint paths, (as defined in `getIds`)
     '''
     
+    if ids.get('uuid'):
+        found = ls(ids['uuid'])
+        if len(found) == 1:
+            return found[0]
+    
     if len(ls(ids['short'], r=True)) == 1:
         return PyNode(ids['short'])
         
     if len(ls(ids['long'], r=True)) == 1:
         return PyNode(ids['long'])
+
+
+def findManyFromIds(idList, warn=True, index=None):
+    '''
+    Resolves a list of dicts from `getIds()` at once, returning a matching list
+    of objects (or None), warning once about everything that wasn't found.
+    
+    :param IdIndex index: Pass one in to share its scene scan across several
+        calls, like when restoring all the controls of a card, otherwise a new
+        one is made.
+    '''
+    if index is None:
+        index = IdIndex()
+    
+    unresolved = len(index.unresolved)
+    found = index.resolve(idList)
+    missed = index.unresolved[unresolved:]
+    
+    if warn and missed:
+        warning( 'Unable to find {0} objects:\n    '.format(len(missed))
+            + '\n    '.join( '{0} ({1})'.format(ids.get('long', ids.get('short')), reason) for ids, reason in missed ) )
+    
+    return found
+
+
+class IdIndex(object):
+    '''
+    Resolves `getIds()` dicts against lookups of every node's uuid and name,
+    built once in a single pass over the scene, instead of recursive `ls`
+    calls for each one.
+    
+    Ids are tried by uuid, then short name and long name if unambiguous, then
+    card path.  Failures are collected in `.unresolved` as (ids, reason).
+    
+    Uuids aren't guaranteed unique (ex, a file referenced twice) so any shared
+    by several nodes are ignored, falling through to the names.
+    
+    Nodes made after the index are unknown to it, so make a new one for each restore.
+    '''
+    
+    def __init__(self):
+        self.byUuid = {}
+        self.duplicateUuids = set()
+        self.byName = {}  # Name without namespace or path: [long names]
+        self.longNames = set()
+        self.unresolved = []
+        self._cards = None
+        
+        it = OpenMaya.MItDependencyNodes()
+        while not it.isDone():
+            mobj = it.thisNode()
+            fn = OpenMaya.MFnDependencyNode(mobj)
+            if mobj.hasFn(OpenMaya.MFn.kDagNode):
+                # Instanced nodes are only registered by their first path.
+                name = OpenMaya.MFnDagNode(mobj).fullPathName()
+            else:
+                name = fn.name()
+            
+            uuid = fn.uuid().asString()
+            if uuid in self.byUuid:
+                self.duplicateUuids.add(uuid)
+            self.byUuid[uuid] = name
+            self.byName.setdefault( fn.name().rsplit(':', 1)[-1], [] ).append(name)
+            self.longNames.add(name)
+            it.next()
+    
+    def _matchName(self, short):
+        '''
+        Like `ls(short, r=True)`, the nodes with that name in any namespace.
+        '''
+        candidates = self.byName.get( short.rsplit(':', 1)[-1], [] )
+        if ':' not in short:
+            return candidates
+        matches = []
+        for c in candidates:
+            leaf = c.rsplit('|', 1)[-1]
+            if leaf == short or leaf.endswith(':' + short):
+                matches.append(c)
+        return matches
+    
+    def _findCard(self, name, cardId=None):
+        # Same lookup as `tool.fossil.util.FIND`, for evaluating card paths.
+        if self._cards is None:
+            from ..core import findNode  # core depends on add, so import on demand.
+            self._cards = ( {}, {} )
+            for card in findNode.allCards():
+                data = card.rigData
+                if 'id' in data:
+                    self._cards[0].setdefault(data['id'], card)
+                self._cards[1].setdefault(card.name(), card)
+        
+        if cardId is not None and cardId in self._cards[0]:
+            return self._cards[0][cardId]
+        return self._cards[1].get(name)
+    
+    def find(self, ids):
+        '''
+        Returns the object for a single `getIds()` dict or None, recording why if not.
+        '''
+        uuid = ids.get('uuid')
+        if uuid in self.byUuid and uuid not in self.duplicateUuids:
+            return PyNode( self.byUuid[uuid] )
+        
+        matches = self._matchName(ids['short'])
+        if len(matches) == 1:
+            return PyNode(matches[0])
+        
+        if ids.get('long') in self.longNames:
+            return PyNode(ids['long'])
+        
+        if ids.get('cardPath'):
+            try:
+                obj = eval( ids['cardPath'], {'FIND': self._findCard} )
+                if obj:
+                    return obj
+            except Exception:
+                pass
+        
+        self.unresolved.append( (ids, 'ambiguous' if matches else 'missing') )
+        return None
+    
+    def resolve(self, idList):
+        return [ self.find(ids) for ids in idList ]
         
         
 def meters(*args):
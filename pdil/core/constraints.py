@@ -58,9 +58,12 @@ def _constraintSerialize(constType, obj): # type: (str, PyNode) -> Dict[str, Dic
     return data
 
 
-def _constraintDeserialize(obj, kwargs): # type: (PyNode, Dict) -> Tuple[List[PyNode], Dict]
+def _constraintDeserialize(obj, kwargs, index=None): # type: (PyNode, Dict, add.IdIndex) -> Tuple[List[PyNode], Dict]
     '''
     Helper, return a <list of targets> and **kwargs for use in reconstructing a constraint, from `_constraintSerialize`.
+    
+    Raises an exception if any target is missing since building with fewer
+    targets would shift the weights onto the wrong ones.
     '''
     #kwargs = copy.deepcopy(data)
     kwargExtraData = kwargs['#']
@@ -71,7 +74,10 @@ def _constraintDeserialize(obj, kwargs): # type: (PyNode, Dict) -> Tuple[List[Py
         del kwargs['o']
         kwargs['mo'] = True
 
-    targets = [ add.findFromIds(o) for o in kwargExtraData['targets'] ]
+    targets = add.findManyFromIds(kwargExtraData['targets'], warn=False, index=index)
+    missing = [ ids.get('long', ids.get('short')) for ids, t in zip(kwargExtraData['targets'], targets) if not t ]
+    if missing:
+        raise Exception( 'Unable to constrain {0}, missing targets: {1}'.format(obj, ', '.join(missing)) )
 
     # As of 2016, unicode keys don't work.  So stupid.
     nonUnicode = {}
@@ -86,15 +92,15 @@ def aimSerialize(obj): # type: (PyNode) -> Dict
     return _constraintSerialize('aimConstraint', obj)
     
     
-def aimDeserialize(obj, data): # type: (PyNode, Dict) -> None
+def aimDeserialize(obj, data, index=None): # type: (PyNode, Dict, add.IdIndex) -> None
     # If the world up object is absent, remove it entirely.
     kwargs = copy.deepcopy(data)
     if not kwargs['wuo']:
         del kwargs['wuo']
     else:
-        kwargs['wuo'] = add.findFromIds(kwargs['wuo'])
+        kwargs['wuo'] = index.find(kwargs['wuo']) if index else add.findFromIds(kwargs['wuo'])
     
-    targets, reformattedKwargs = _constraintDeserialize(obj, kwargs)
+    targets, reformattedKwargs = _constraintDeserialize(obj, kwargs, index)
     if 'mo' in reformattedKwargs:
         del reformattedKwargs['mo']
     aimConstraint(targets, obj, mo=True, **reformattedKwargs)
@@ -104,9 +110,9 @@ def pointSerialize(obj): # type: (PyNode) -> Dict
     return _constraintSerialize('pointConstraint', obj)
     
 
-def pointDeserialize(obj, data): # type: (PyNode, Dict) -> None
+def pointDeserialize(obj, data, index=None): # type: (PyNode, Dict, add.IdIndex) -> None
     kwargs = copy.deepcopy(data)
-    targets, reformattedKwargs = _constraintDeserialize(obj, kwargs)
+    targets, reformattedKwargs = _constraintDeserialize(obj, kwargs, index)
     if 'mo' in reformattedKwargs:
         del reformattedKwargs['mo']
     pointConstraint(targets, obj, mo=True, **reformattedKwargs)
@@ -116,9 +122,9 @@ def orientSerialize(obj): # type: (PyNode) -> Dict
     return _constraintSerialize('orientConstraint', obj)
     
     
-def orientDeserialize(obj, data): # type: (PyNode, Dict) -> None
+def orientDeserialize(obj, data, index=None): # type: (PyNode, Dict, add.IdIndex) -> None
     kwargs = copy.deepcopy(data)
-    targets, reformattedKwargs = _constraintDeserialize(obj, kwargs)
+    targets, reformattedKwargs = _constraintDeserialize(obj, kwargs, index)
     if 'mo' in reformattedKwargs:
         del reformattedKwargs['mo']
     orientConstraint(targets, obj, mo=True, **reformattedKwargs)
@@ -128,9 +134,9 @@ def parentSerialize(obj): # type: (PyNode) -> Dict
     return _constraintSerialize('parentConstraint', obj)
     
     
-def parentDeserialize(obj, data):  # type: (PyNode, Dict) -> None
+def parentDeserialize(obj, data, index=None):  # type: (PyNode, Dict, add.IdIndex) -> None
     kwargs = copy.deepcopy(data)
-    targets, reformattedKwargs = _constraintDeserialize(obj, kwargs)
+    targets, reformattedKwargs = _constraintDeserialize(obj, kwargs, index)
     if 'mo' in reformattedKwargs:
         del reformattedKwargs['mo']
     parentConstraint(targets, obj, mo=True, **reformattedKwargs)
@@ -148,12 +154,12 @@ def fullSerialize(obj):
     return constraints
     
     
-def fullDeserialize(obj, alldata):
+def fullDeserialize(obj, alldata, index=None):
     alldata = copy.deepcopy(alldata)
     for ctype, data in alldata.items():
         if 'mo' in data:
             del data['mo']
-        globals()[ ctype + 'Deserialize' ](obj, data)
+        globals()[ ctype + 'Deserialize' ](obj, data, index)
     
     
 def getOrientConstrainee(target): # type: (PyNode) -> PyNode
@@ -13,6 +13,8 @@ Examples are better:
 '''
 from __future__ import print_function, absolute_import
 
+import ast
+import collections
 import math
 import numbers
 
@@ -120,6 +122,205 @@ def condition( a, symbol, b, true=1, false=0 ):
     return node.outColorR
 
 
+class Network(object):
+    '''
+    Compiles arithmetic expressions over plugs into as few utility nodes as
+    possible.  Operations of the same kind that don't depend on each other
+    share the X/Y/Z channels of one node, and repeated subexpressions are only
+    made once.  Supports + - * /, unary minus and `t if a > b else f` style
+    conditions (with any one comparison).
+    
+    Use `network()` for one-off builds, a Network can be reused so later
+    expressions share the nodes of earlier ones.
+    
+        net = Network(length=dist.distance, rest=10.0)
+        multiplier = net.build('length / rest if length / rest > 1 else 1.0')
+    '''
+    
+    _binary = {ast.Add: 'add', ast.Sub: 'sub', ast.Mult: 'mul', ast.Div: 'div'}
+    _compare = {ast.Eq: 0, ast.NotEq: 1, ast.Gt: 2, ast.GtE: 3, ast.Lt: 4, ast.LtE: 5}
+    _fold = {
+        'add': lambda a, b: a + b,
+        'sub': lambda a, b: a - b,
+        'mul': lambda a, b: a * b,
+        'div': lambda a, b: a / b,
+    }
+    
+    def __init__(self, **inputs):
+        self.inputs = inputs
+        self._plugs = {}    # Plug name: plug
+        self._levels = {}   # Op term: depth in the network
+        self._outputs = {}  # Op term: output plug, once built
+    
+    def _level(self, term):
+        return self._levels.get(term, 0)
+    
+    def _op(self, kind, *args):
+        if kind in self._fold and all(a[0] == 'const' for a in args):
+            return ('const', self._fold[kind](args[0][1], args[1][1]))
+        
+        if kind == 'cond':
+            if all(a[0] == 'const' for a in args[1:3]):
+                first, second = args[1][1], args[2][1]
+                result = [first == second, first != second, first > second, first >= second, first < second, first <= second][args[0]]
+                return args[3] if result else args[4]
+        else:
+            a, b = args
+            # Drop the identities
+            if (kind in ('add', 'sub') and b == ('const', 0.0)) or (kind in ('mul', 'div') and b == ('const', 1.0)):
+                return a
+            if (kind == 'add' and a == ('const', 0.0)) or (kind == 'mul' and a == ('const', 1.0)):
+                return b
+            
+            # Order commutative args so `a * b` and `b * a` are shared
+            if kind in ('add', 'mul'):
+                args = tuple(sorted(args, key=repr))
+        
+        term = ('op', kind) + tuple(args)
+        if term not in self._levels:
+            self._levels[term] = 1 + max( self._level(a) for a in args if isinstance(a, tuple) )
+        return term
+    
+    def _parse(self, node):
+        if isinstance(node, ast.Expression):
+            return self._parse(node.body)
+        
+        if type(node).__name__ in ('Num', 'Constant'):  # Numbers are Constant in newer pythons
+            return ('const', float( getattr(node, 'value', getattr(node, 'n', None)) ))
+        
+        if isinstance(node, ast.Name):
+            value = self.inputs[node.id]
+            if isinstance(value, numbers.Number):
+                return ('const', float(value))
+            self._plugs[value.name()] = value
+            return ('plug', value.name())
+        
+        if isinstance(node, ast.UnaryOp):
+            if isinstance(node.op, ast.USub):
+                return self._op('mul', self._parse(node.operand), ('const', -1.0))
+            if isinstance(node.op, ast.UAdd):
+                return self._parse(node.operand)
+        
+        if isinstance(node, ast.BinOp) and type(node.op) in self._binary:
+            return self._op( self._binary[type(node.op)], self._parse(node.left), self._parse(node.right) )
+        
+        if isinstance(node, ast.IfExp) and isinstance(node.test, ast.Compare) and len(node.test.ops) == 1:
+            test = node.test
+            return self._op( 'cond', self._compare[type(test.ops[0])],
+                self._parse(test.left), self._parse(test.comparators[0]),
+                self._parse(node.body), self._parse(node.orelse) )
+        
+        raise ValueError( 'Unsupported expression: ' + ast.dump(node) )
+    
+    def _assign(self, plug, term):
+        if term[0] == 'const':
+            plug.set(term[1])
+        elif term[0] == 'plug':
+            self._plugs[term[1]] >> plug
+        else:
+            self._outputs[term] >> plug
+    
+    def _result(self, term):
+        if term[0] == 'const':
+            return term[1]
+        elif term[0] == 'plug':
+            return self._plugs[term[1]]
+        return self._outputs[term]
+    
+    def _reachable(self, roots):
+        '''
+        Returns the unbuilt op terms the roots depend on.  Parsing makes terms
+        that end up unused, ex the branch of a condition that was folded away.
+        '''
+        found = set()
+        stack = list(roots)
+        while stack:
+            term = stack.pop()
+            if term[0] != 'op' or term in found or term in self._outputs:
+                continue
+            found.add(term)
+            stack += [ arg for arg in term[2:] if isinstance(arg, tuple) ]
+        return found
+    
+    def _makeNodes(self, roots):
+        reachable = self._reachable(roots)
+        pending = [ term for term in self._levels if term in reachable ]
+        
+        # Ops at the same level can't depend on each other so they can share a node.
+        groups = collections.OrderedDict()
+        for term in sorted(pending, key=self._level):
+            kind = term[1]
+            if kind == 'cond':
+                key = (self._level(term), kind, term[2], term[3], term[4])  # Shared operation and terms
+            else:
+                key = (self._level(term), kind)
+            groups.setdefault(key, []).append(term)
+        
+        for key, terms in groups.items():
+            kind = key[1]
+            for i in range(0, len(terms), 3):
+                chunk = terms[i:i + 3]
+                
+                if kind in ('mul', 'div'):
+                    node = createNode('multiplyDivide', n=kind)
+                    node.operation.set( 1 if kind == 'mul' else 2 )
+                    for channel, term in zip('XYZ', chunk):
+                        self._outputs[term] = node.attr('output' + channel)
+                        self._assign( node.attr('input1' + channel), term[2] )
+                        self._assign( node.attr('input2' + channel), term[3] )
+                
+                elif kind in ('add', 'sub'):
+                    node = createNode('plusMinusAverage', n=kind)
+                    node.operation.set( 1 if kind == 'add' else 2 )
+                    for channel, term in zip('xyz', chunk):
+                        self._outputs[term] = node.attr('output3D' + channel)
+                        self._assign( node.input3D[0].attr('input3D' + channel), term[2] )
+                        self._assign( node.input3D[1].attr('input3D' + channel), term[3] )
+                
+                else:
+                    node = createNode('condition', n='cond')
+                    node.operation.set( chunk[0][2] )
+                    self._assign( node.firstTerm, chunk[0][3] )
+                    self._assign( node.secondTerm, chunk[0][4] )
+                    for channel, term in zip('RGB', chunk):
+                        self._outputs[term] = node.attr('outColor' + channel)
+                        self._assign( node.attr('colorIfTrue' + channel), term[5] )
+                        self._assign( node.attr('colorIfFalse' + channel), term[6] )
+    
+    def build(self, expressions, **inputs):
+        '''
+        Makes the nodes for the expression, returning the resulting plug (or
+        number if it was constant).  If given a dict of {name: expression},
+        all of them are packed together and a dict of results is returned.
+        
+        Extra inputs can be given as keyword args.
+        '''
+        self.inputs.update(inputs)
+        
+        single = not isinstance(expressions, dict)
+        if single:
+            expressions = {'': expressions}
+        
+        terms = { name: self._parse( ast.parse(expr.strip(), mode='eval') ) for name, expr in expressions.items() }
+        
+        self._makeNodes( terms.values() )
+        
+        results = { name: self._result(term) for name, term in terms.items() }
+        return results[''] if single else results
+
+
+def network(expressions, **inputs):
+    '''
+    Returns the plug(s) of the expression(s) built with as few nodes as possible,
+    see `Network` for details.
+    
+        network('a * b + 1', a=obj.tx, b=other.sy) >> target.sz
+        
+        plugs = network( {'x': 'length / 10 + 1', 'y': 'length / 20 + 1'}, length=ctrl.length )
+    '''
+    return Network(**inputs).build(expressions)
+
+
 def isCloseF(a, b, tolerance=0.001):
     # isClose for a single float instead of a vector.
     return (abs(a - b) < tolerance)
@@ -0,0 +1,122 @@
+'''
+Ray/mesh intersection for many rays at once.
+
+Each mesh gets a `MeshIntersector`, cached, holding its world matrix and the
+acceleration grid Maya builds for it, so repeated casts (placing lots of
+controls or joints against a body) don't rebuild anything.  Rays are in world
+space and converted to object space with the cached matrices.
+
+Ex:
+    hits = raycast.intersect( body, [(start, direction), (start2, direction2)] )
+    # -> [ [hit, hit], [] ] world space dt.Vectors per ray, nearest first
+'''
+from __future__ import absolute_import
+
+from maya.api import OpenMaya
+from pymel.core import cmds, dt
+
+
+if '_intersectors' not in globals():
+    _intersectors = {}  # shape long name: MeshIntersector
+
+
+class MeshIntersector(object):
+    '''
+    Casts rays against a single mesh.  Call `update()` if the mesh has moved,
+    which `getIntersector()` does automatically.
+    '''
+
+    def __init__(self, mesh):
+        shape = mesh.getShape() if hasattr(mesh, 'getShape') and mesh.getShape() else mesh
+
+        sel = OpenMaya.MSelectionList()
+        sel.add( str(shape) )
+        self.path = sel.getDagPath(0)
+        self.fn = OpenMaya.MFnMesh(self.path)
+        self.accel = self.fn.autoUniformGridParams()
+        self.update()
+
+    def update(self):
+        '''
+        Refreshes the cached world matrices, returning True if they changed.
+        '''
+        matrix = self.path.inclusiveMatrix()
+        if getattr(self, 'matrix', None) == matrix:
+            return False
+
+        self.matrix = matrix
+        self.inverse = matrix.inverse()
+        return True
+
+    def intersect(self, rays, maxParam=50, bothDirections=False):
+        '''
+        Returns a list of world space hits (dt.Vectors, nearest first) for each
+        of the (point, direction) rays.
+
+        :param maxParam: How far along each ray to look, in object space.
+        '''
+        kObject = OpenMaya.MSpace.kObject
+
+        results = []
+        for point, direction in rays:
+            source = OpenMaya.MPoint( point[0], point[1], point[2] ) * self.inverse
+            ray = OpenMaya.MVector( direction[0], direction[1], direction[2] ) * self.inverse
+
+            hitPoints = self.fn.allIntersections(
+                OpenMaya.MFloatPoint(source),
+                OpenMaya.MFloatVector(ray),
+                kObject, maxParam, bothDirections,
+                accelParams=self.accel,
+                sortHits=True,
+            )[0]
+
+            hits = []
+            for hit in hitPoints:
+                world = OpenMaya.MPoint(hit) * self.matrix
+                hits.append( dt.Vector(world.x, world.y, world.z) )
+            results.append(hits)
+
+        return results
+
+    def close(self):
+        self.fn.freeCachedIntersectionAccelerator()
+
+
+def getIntersector(mesh):
+    '''
+    Returns the cached `MeshIntersector` for the mesh (or its transform).
+
+    They are keyed by dag path since referencing the same mesh twice repeats
+    uuids, and each copy has its own matrix.
+    '''
+    shape = mesh.getShape() if hasattr(mesh, 'getShape') and mesh.getShape() else mesh
+    path = cmds.ls( str(shape), l=True )[0]
+
+    intersector = _intersectors.get(path)
+    if intersector is None or not intersector.path.isValid() or intersector.path.fullPathName() != path:
+        intersector = _intersectors[path] = MeshIntersector(path)
+    else:
+        intersector.update()
+
+    return intersector
+
+
+def intersect(mesh, rays, maxParam=50, bothDirections=False):
+    '''
+    Returns a list of world space hits for each (point, direction) ray cast
+    against the mesh.
+    '''
+    return getIntersector(mesh).intersect(rays, maxParam, bothDirections)
+
+
+def clear():
+    '''
+    Drops all the cached intersectors, needed if a mesh's geometry is edited.
+    '''
+    for intersector in _intersectors.values():
+        try:
+            intersector.close()
+        except Exception:
+            pass
+
+    _intersectors.clear()
@@ -1,3 +1,7 @@
+from __future__ import absolute_import
+
+import time
+
 from pymel.core import *
 
 
@@ -16,6 +20,29 @@ def playbackRange():
     return playbackOptions(q=True, min=True), playbackOptions(q=True, max=True)
 
 
+def playbackFps(start=None, end=None, loops=3):
+    '''
+    Steps through the given range, defaulting to the playback range, forcing
+    evaluation each frame and returns the average frames per second.  Useful
+    for comparing the evaluation cost of different rig setups.
+    '''
+    if start is None or end is None:
+        start, end = playbackRange()
+    
+    frames = range(int(start), int(end) + 1)
+    
+    with PreserveCurrentTime():
+        begin = time.time()
+        for _ in range(loops):
+            for f in frames:
+                currentTime(f, update=True)
+                if not about(batch=True):
+                    refresh(force=True)
+        elapsed = time.time() - begin
+    
+    return (len(frames) * loops) / elapsed if elapsed else 0.0
+
+
 def getTimeInput(start, end):
     '''
     Unless given explicit input, tries to use a time selection, falling back to
@@ -39,4 +66,27 @@ class PreserveCurrentTime(object):
         self.current = currentTime(q=True)
         
     def __exit__(self, type, value, traceback):
-        currentTime(self.current)
\ No newline at end of file
+        currentTime(self.current)
+
+
+class EvaluationMode(object):
+    '''
+    Context Manager to temporarily switch the evaluation manager's mode, ex
+    'parallel', restoring it at the end.  Does nothing in versions without it.
+    '''
+    def __init__(self, mode='parallel'):
+        self.mode = mode
+        self.current = None
+    
+    def __enter__(self):
+        try:
+            self.current = cmds.evaluationManager(q=True, mode=True)[0]
+        except Exception:
+            return
+        
+        if self.current != self.mode:
+            cmds.evaluationManager(mode=self.mode)
+        
+    def __exit__(self, type, value, traceback):
+        if self.current and self.current != self.mode:
+            cmds.evaluationManager(mode=self.current)
@@ -2,10 +2,12 @@ import collections
 from itertools import chain
 import json
 import os
+import time
 
-from pymel.core import cmds, keyframe, selected, currentTime, PyNode, setAttr, hasAttr, setKeyframe, copyKey, pasteKey, warning, delete, exportSelected, playbackOptions, createNode, listAttr, select, objExists, cutKey, setDrivenKeyframe, keyTangent, dt, mel
+from maya.api import OpenMaya, OpenMayaAnim
+from pymel.core import cmds, selected, currentTime, PyNode, setAttr, hasAttr, setKeyframe, copyKey, pasteKey, warning, delete, exportSelected, playbackOptions, createNode, listAttr, select, objExists, cutKey, setDrivenKeyframe, dt, mel
 
-from ..add import findFromIds, getIds
+from ..add import findManyFromIds, getIds
 from .. import core
 
 
@@ -14,6 +16,9 @@ TAGGING_ATTR = 'fossilAnimSource'
 if '_loadAlterPlug' not in globals():
     _loadAlterPlug = None
 
+if '_keyTimeIndex' not in globals():
+    _keyTimeIndex = None
+
 
 class AttrFlags:
     NONE  = 0
@@ -40,10 +45,258 @@ def getKeyTimes(obj, attrFlags=AttrFlags.ALL, customAttrs=[]):
     if attrFlags & AttrFlags.SCALE:
         attrs += ['s' + a for a in 'xyz']
     
-    times = keyframe( obj, at=attrs, q=True, tc=True)
-    times = sorted(set(times))
+    return getKeyTimeIndex().times( [obj], attrs )
+
+
+class KeyTimeIndex(object):
+    '''
+    Caches the key times of the anim curves driving nodes so range tools don't
+    have to `keyframe(q=True, tc=True)` each control over and over.
+    
+    Nodes are looked up in bulk the first time they are needed, or all at once
+    via `prime()`.  While `start()`ed, callbacks invalidate individual curves
+    as they are edited, nodes as curves are connected or disconnected and
+    nodes as they are renamed.  Curves edited through the api don't trigger
+    callbacks so they must be passed to `invalidate()`.
+    
+    Only use it as a context manager, so the callbacks are only installed
+    while a tool is running.  Outside of one nothing is cached.
+    
+    Ex:
+        with getKeyTimeIndex() as keyTimes:
+            keyTimes.times( controls )
+    
+    Use `getKeyTimeIndex()` for the shared instance.
+    '''
+    
+    def __init__(self):
+        self._curves = {}       # node name: [(long attr name, curve MObjectHandle)]
+        self._shapes = {}       # node name: [shape names], like keyframe(), shape keys count
+        self._layered = set()   # Nodes with anim layers, always queried directly
+        self._times = {}        # curve handle hashCode: [key times]
+        self._longNames = {}
+        self._callbacks = []
+        self._users = 0
+    
+    def __enter__(self):
+        if not self._users:
+            self.start()
+        self._users += 1
+        return self
+    
+    def __exit__(self, *args):
+        self._users -= 1
+        if not self._users:
+            self.close()
+    
+    def start(self):
+        if self._callbacks:
+            return
+        self.clear()
+        self._callbacks = [
+            OpenMayaAnim.MAnimMessage.addAnimCurveEditedCallback( self._curvesEdited ),
+            OpenMaya.MDGMessage.addConnectionCallback( self._connectionChanged ),
+            OpenMaya.MNodeMessage.addNameChangedCallback( OpenMaya.MObject.kNullObj, self._renamed ),
+            OpenMaya.MSceneMessage.addCallback( OpenMaya.MSceneMessage.kBeforeNew, self._sceneChanged ),
+            OpenMaya.MSceneMessage.addCallback( OpenMaya.MSceneMessage.kBeforeOpen, self._sceneChanged ),
+        ]
+    
+    def close(self):
+        if self._callbacks:
+            OpenMaya.MMessage.removeCallbacks( self._callbacks )
+        self._callbacks = []
+        self.clear()
     
-    return times
+    def clear(self):
+        self._curves.clear()
+        self._shapes.clear()
+        self._layered.clear()
+        self._times.clear()
+        self._longNames.clear()
+    
+    @staticmethod
+    def _name(mobj):
+        if mobj.hasFn(OpenMaya.MFn.kDagNode):
+            return OpenMaya.MFnDagNode(mobj).partialPathName()
+        return OpenMaya.MFnDependencyNode(mobj).name()
+    
+    def _curvesEdited(self, curves, *args):
+        for i in range(len(curves)):
+            self._times.pop( OpenMaya.MObjectHandle(curves[i]).hashCode(), None )
+    
+    def _connectionChanged(self, srcPlug, destPlug, made, *args):
+        src = srcPlug.node()
+        if not (src.hasFn(OpenMaya.MFn.kAnimCurve) or src.hasFn(OpenMaya.MFn.kBlend)):
+            return
+        
+        # Deleted curves disconnect first, so a new curve reusing the hash can't get stale times.
+        self._times.pop( OpenMaya.MObjectHandle(src).hashCode(), None )
+        self._forgetNode( self._name( destPlug.node() ) )
+    
+    def _renamed(self, node, prevName, *args):
+        # Curves are held by handle so only the nodes' names matter.
+        if not prevName or node.hasFn(OpenMaya.MFn.kAnimCurve):
+            return
+        
+        # Dag nodes are keyed by partial path, so renaming a parent affects children too.
+        stale = [ name for name in set(self._curves) | set(self._shapes) if prevName in name.split('|') ]
+        for name in stale:
+            self._forgetNode(name)
+            self._shapes.pop(name, None)
+        
+        for key in [ key for key in self._longNames if prevName in key[0].split('|') ]:
+            del self._longNames[key]
+    
+    def _forgetNode(self, name):
+        self._curves.pop( name, None )
+        self._layered.discard( name )
+        for node, shapes in list(self._shapes.items()):
+            if name in shapes:
+                self._curves.pop( node, None )
+    
+    def invalidate(self, curves=(), nodes=()):
+        '''
+        Drops the given curves (names or MObjects) and nodes, for edits made
+        through the api, which don't trigger the callbacks.
+        '''
+        for curve in curves:
+            if not isinstance(curve, OpenMaya.MObject):
+                sel = OpenMaya.MSelectionList()
+                sel.add( str(curve) )
+                curve = sel.getDependNode(0)
+            self._times.pop( OpenMaya.MObjectHandle(curve).hashCode(), None )
+        
+        nodes = list( set( str(node).split('.')[0] for node in nodes ) )
+        for node in cmds.ls(nodes) if nodes else []:
+            self._forgetNode(node)
+    
+    def _sceneChanged(self, *args):
+        self.clear()
+    
+    def prime(self, objs):
+        '''
+        Indexes the curves of all the given nodes (or plugs) in one go.
+        '''
+        nodes = set( str(obj).split('.')[0] for obj in objs )
+        nodes = [ node for node in nodes if node not in self._curves ]
+        if not nodes:
+            return
+        
+        for node in nodes:
+            self._shapes[node] = cmds.listRelatives(node, s=True, path=True) or []
+        
+        toQuery = nodes + [shape for node in nodes for shape in self._shapes[node] if shape not in self._curves]
+        
+        for node in toQuery:
+            self._curves[node] = []
+        
+        connections = cmds.listConnections( toQuery, s=True, d=False, c=True, type='animCurve' ) or []
+        # A curve can drive several plugs, which the selection list collapses.
+        names = sorted( set(connections[1::2]) )
+        sel = OpenMaya.MSelectionList()
+        for curve in names:
+            sel.add(curve)
+        handles = { curve: OpenMaya.MObjectHandle(sel.getDependNode(i)) for i, curve in enumerate(names) }
+        
+        for plug, curve in zip(connections[::2], connections[1::2]):
+            node, attr = plug.split('.', 1)
+            self._curves.setdefault(node, []).append( (attr, handles[curve]) )
+        
+        layered = cmds.listConnections( toQuery, s=True, d=False, c=True, type='animBlendNodeBase' ) or []
+        self._layered.update( plug.split('.')[0] for plug in layered[::2] )
+    
+    def _readTimes(self, curves):
+        '''
+        Returns the key times of all the curve handles.
+        '''
+        unit = OpenMaya.MTime.uiUnit()
+        times = []
+        for handle in curves:
+            if not handle.isValid():
+                continue
+            
+            key = handle.hashCode()
+            if key not in self._times:
+                fn = OpenMayaAnim.MFnAnimCurve( handle.object() )
+                if fn.isUnitlessInput:
+                    self._times[key] = []  # Set driven keys, not time based
+                else:
+                    self._times[key] = [ fn.input(k).asUnits(unit) for k in range(fn.numKeys) ]
+            
+            times += self._times[key]
+        
+        return times
+    
+    def _longName(self, node, attr):
+        key = (node, attr)
+        if key not in self._longNames:
+            try:
+                self._longNames[key] = cmds.attributeQuery( attr, node=node, longName=True )
+            except Exception:
+                self._longNames[key] = attr
+        return self._longNames[key]
+    
+    def times(self, objs, attrs=None, start=None, end=None):
+        '''
+        Returns the sorted union of key times on the given nodes (or plugs),
+        optionally only for `attrs` and only within start/end (inclusive).
+        '''
+        if not isinstance(objs, (list, tuple, set)):
+            objs = [objs]
+        
+        # Without callbacks, nothing can be trusted from a previous call.
+        if not self._callbacks:
+            self.clear()
+        
+        self.prime(objs)
+        
+        curves = []
+        times = set()
+        for obj in objs:
+            node, _, plugAttr = str(obj).partition('.')
+            
+            for target in [node] + self._shapes.get(node, []):
+                if target in self._layered:
+                    if plugAttr:
+                        times.update( cmds.keyframe(str(obj), q=True, tc=True) or [] )
+                    else:
+                        keys = cmds.keyframe(target, at=attrs, q=True, tc=True) if attrs else cmds.keyframe(target, q=True, tc=True)
+                        times.update( keys or [] )
+                    continue
+                
+                if plugAttr:
+                    wanted = set([ self._longName(node, plugAttr) ])
+                elif attrs:
+                    wanted = set( self._longName(target, a) for a in attrs )
+                else:
+                    wanted = None
+                
+                for attr, curve in self._curves.get(target, []):
+                    if wanted is None or attr in wanted:
+                        curves.append(curve)
+        
+        times.update( self._readTimes(curves) )
+        
+        return [ t for t in sorted(times) if (start is None or t >= start) and (end is None or t <= end) ]
+
+
+def getKeyTimeIndex():
+    '''
+    Returns the shared `KeyTimeIndex`, which keeps itself up to date while
+    used as a context manager.
+    '''
+    global _keyTimeIndex
+    if not _keyTimeIndex:
+        _keyTimeIndex = KeyTimeIndex()
+    return _keyTimeIndex
+
+
+def _invalidateKeyTimes(curves=(), nodes=()):
+    '''
+    Tells the shared `KeyTimeIndex`, if in use, about curves edited via the api.
+    '''
+    if _keyTimeIndex and _keyTimeIndex._callbacks:
+        _keyTimeIndex.invalidate(curves, nodes)
 
 
 def _processAttr(plug, dups, forceKeys, staticValues, start, end):
@@ -315,27 +568,35 @@ def findSetDrivenKeys(control):
     '''
     sdkCurves = control.listConnections(s=True, d=False, type=['animCurveUA', 'animCurveUT', 'animCurveUU', 'animCurveUL'])
     
+    curveData = readCurves(sdkCurves)
+    
     curveText = []
 
     for sdkCurve in sdkCurves:
         input = sdkCurve.input.listConnections(p=1, scn=True)[0]
         dest = sdkCurve.output.listConnections(p=1, scn=True)[0].attrName()
         
-        curveText.append( (dest, getIds(input.node()), input.attrName(), curveToData(sdkCurve) ) )
+        curveText.append( (dest, getIds(input.node()), input.attrName(), curveData[sdkCurve.name()] ) )
     
     return curveText
 
 
-def applySetDrivenKeys(ctrl, infos):
+def applySetDrivenKeys(ctrl, infos, index=None):
     '''
     Create the setDrivenKeys on the ctrl with the specially formatted string
     list from `findSetDrivenKeys`.
+    
+    :param IdIndex index: Shared `add.IdIndex` for finding the drivers.
     '''
     
-    for info in infos:
+    drivers = findManyFromIds( [info[1] for info in infos], index=index )
+    
+    for info, node in zip(infos, drivers):
         drivenAttr, driveNode, driveAttr, data = info
         
-        node = findFromIds(driveNode)
+        if not node:
+            continue
+        
         cutKey(ctrl.attr(drivenAttr), cl=True)
         
         #keyData = [KeyData(*d) for d in data]
@@ -372,38 +633,186 @@ class KeyData(object):
         return d
 
 
-def curveToData(animCurve):
-    keys = keyframe(animCurve, q=True, tc=True, fc=True, vc=True)  # fc and tc are mutually ex
+# keyTangent's names for the tangent types
+_tangentTypes = {
+    'auto': OpenMayaAnim.MFnAnimCurve.kTangentAuto,
+    'spline': OpenMayaAnim.MFnAnimCurve.kTangentSmooth,
+    'linear': OpenMayaAnim.MFnAnimCurve.kTangentLinear,
+    'flat': OpenMayaAnim.MFnAnimCurve.kTangentFlat,
+    'step': OpenMayaAnim.MFnAnimCurve.kTangentStep,
+    'stepnext': OpenMayaAnim.MFnAnimCurve.kTangentStepNext,
+    'fixed': OpenMayaAnim.MFnAnimCurve.kTangentFixed,
+    'clamped': OpenMayaAnim.MFnAnimCurve.kTangentClamped,
+    'plateau': OpenMayaAnim.MFnAnimCurve.kTangentPlateau,
+    'slow': OpenMayaAnim.MFnAnimCurve.kTangentSlow,
+    'fast': OpenMayaAnim.MFnAnimCurve.kTangentFast,
+}
+
+_tangentNames = { v: k for k, v in _tangentTypes.items() }
+
+
+class _CurveUnits(object):
+    '''
+    Converts a curve's key times and values between the ui units used by
+    `keyframe` (and the saved data) and the internal ones used by the api.
+    '''
     
-    tangents = keyTangent(animCurve, q=True, ia=True, oa=True, iw=True, ow=True, itt=True, ott=True)
-    chunk = 6 # keyTanget returns a giant flat list
+    def __init__(self, fn):
+        curveType = fn.animCurveType
+        self.timeInput = not fn.isUnitlessInput
+        self.angular = curveType in (fn.kAnimCurveTA, fn.kAnimCurveUA)
+        self.linear = curveType in (fn.kAnimCurveTL, fn.kAnimCurveUL)
+        self.timeOutput = curveType in (fn.kAnimCurveTT, fn.kAnimCurveUT)
+        
+        self.timeUnit = OpenMaya.MTime.uiUnit()
+        self.angleUnit = OpenMaya.MAngle.uiUnit()
+        self.distanceUnit = OpenMaya.MDistance.uiUnit()
+    
+    def toInput(self, t):
+        return OpenMaya.MTime(t, self.timeUnit) if self.timeInput else t
+    
+    def fromInput(self, fn, i):
+        return fn.input(i).asUnits(self.timeUnit) if self.timeInput else fn.unitlessInput(i)
+    
+    def toValue(self, val):
+        if self.angular:
+            return OpenMaya.MAngle(val, self.angleUnit).asRadians()
+        elif self.linear:
+            return OpenMaya.MDistance(val, self.distanceUnit).asCentimeters()
+        elif self.timeOutput:
+            return OpenMaya.MTime(val, self.timeUnit).asUnits(OpenMaya.MTime.kSeconds)
+        return val
+    
+    def fromValue(self, val):
+        if self.angular:
+            return OpenMaya.MAngle(val).asUnits(self.angleUnit)
+        elif self.linear:
+            return OpenMaya.MDistance(val).asUnits(self.distanceUnit)
+        elif self.timeOutput:
+            return OpenMaya.MTime(val, OpenMaya.MTime.kSeconds).asUnits(self.timeUnit)
+        return val
 
-    keyData = []
-    for i, key in enumerate(keys):
-        keyData.append( KeyData(key[0], key[1], *tangents[i * chunk:(i + 1) * chunk]).toDict() )
+
+def _curveFns(curves):
+    sel = OpenMaya.MSelectionList()
+    for curve in curves:
+        sel.add( str(curve) )
     
-    return {'keys': keyData, 'preInfinity': animCurve.preInfinity.get(), 'postInfinity': animCurve.postInfinity.get()}
+    return [ (str(curve), OpenMayaAnim.MFnAnimCurve( sel.getDependNode(i) )) for i, curve in enumerate(curves) ]
 
 
-def dataToCurve(allData, plug):
+def readCurves(curves):
+    '''
+    Returns {curve name: data} in the `curveToData` format for all the given
+    anim curves, read via the api instead of a `keyframe` and `keyTangent`
+    query per curve.
+    '''
+    result = {}
+    for name, fn in _curveFns(curves):
+        units = _CurveUnits(fn)
+        
+        keyData = []
+        for i in range(fn.numKeys):
+            inAngle, inWeight = fn.getTangentAngleWeight(i, True)
+            outAngle, outWeight = fn.getTangentAngleWeight(i, False)
+            keyData.append( KeyData(
+                units.fromInput(fn, i),
+                units.fromValue( fn.value(i) ),
+                inAngle.asDegrees(),
+                outAngle.asDegrees(),
+                inWeight,
+                outWeight,
+                _tangentNames.get( fn.inTangentType(i), 'fixed' ),
+                _tangentNames.get( fn.outTangentType(i), 'fixed' ),
+            ).toDict() )
+        
+        result[name] = {'keys': keyData, 'preInfinity': fn.preInfinityType, 'postInfinity': fn.postInfinityType}
     
+    return result
+
+
+def writeCurve(allData, plug):
+    '''
+    Replaces the keys of the curve driving `plug` in the time range of the
+    data, all at once via the api.  If the plug isn't animated, a new (time
+    based) curve is made.
+    
+    Unlike `setKeyframe` and `keyTangent`, this is NOT undoable.
+    '''
     if isinstance(allData, dict):
         data = allData['keys']
     else:
         data = allData
         allData = None
     
-    cutKey(plug, t=(data[0]['time'], data[-1]['time']), cl=True, iub=True)
-    for key in data:
-        setKeyframe(plug, f=key['time'], t=key['time'], v=key['val'])
+    curves = cmds.listConnections( str(plug), s=True, d=False, type='animCurve' )
+    if curves:
+        fn = _curveFns(curves[:1])[0][1]
+    else:
+        sel = OpenMaya.MSelectionList()
+        sel.add( str(plug) )
+        fn = OpenMayaAnim.MFnAnimCurve()
+        fn.create( sel.getPlug(0) )
+    
+    units = _CurveUnits(fn)
     
-    for key in data:
-        keyTangent(plug, f=(key['time'],), t=key['time'], ia=key['inAngle'], oa=key['outAngle'], iw=key['inWeight'], ow=key['outWeight'], itt=key['inType'], ott=key['outType'])
+    # Clear the range being written, like `cutKey(t=(first, last))`
+    first, last = data[0]['time'], data[-1]['time']
+    for i in reversed(range(fn.numKeys)):
+        if first <= units.fromInput(fn, i) <= last:
+            fn.remove(i)
+    
+    times = [ units.toInput(key['time']) for key in data ]
+    values = [ units.toValue(key['val']) for key in data ]
+    
+    # addKeys only supports time input curves that aren't time output
+    if fn.animCurveType in (fn.kAnimCurveTA, fn.kAnimCurveTL, fn.kAnimCurveTU):
+        fn.addKeys( times, values, keepExistingKeys=True )
+    else:
+        for t, val in zip(times, values):
+            fn.addKey( t, val )
+    
+    weighted = fn.isWeighted
+    for key, t in zip(data, times):
+        i = fn.find(t)
+        if i is None:
+            continue
+        
+        # Explicit angles only matter for fixed tangents, the rest are computed
+        fixedIn = key['inType'] == 'fixed'
+        fixedOut = key['outType'] == 'fixed'
+        if fixedIn or fixedOut:
+            fn.setTangentsLocked(i, False)
+        
+        if fixedIn:
+            fn.setAngle( i, OpenMaya.MAngle(key['inAngle'], OpenMaya.MAngle.kDegrees), True )
+            if weighted:
+                fn.setWeight( i, key['inWeight'], True )
+        
+        if fixedOut:
+            fn.setAngle( i, OpenMaya.MAngle(key['outAngle'], OpenMaya.MAngle.kDegrees), False )
+            if weighted:
+                fn.setWeight( i, key['outWeight'], False )
+        
+        fn.setInTangentType( i, _tangentTypes.get(key['inType'], fn.kTangentAuto) )
+        fn.setOutTangentType( i, _tangentTypes.get(key['outType'], fn.kTangentAuto) )
+        
+        if fixedIn and fixedOut and key['inAngle'] == key['outAngle']:
+            fn.setTangentsLocked(i, True)
     
     if allData:
-        node = plug.listConnections(s=True)[0]
-        node.preInfinity.set( allData['preInfinity'] )
-        node.postInfinity.set( allData['postInfinity'] )
+        fn.setPreInfinityType( allData['preInfinity'] )
+        fn.setPostInfinityType( allData['postInfinity'] )
+    
+    _invalidateKeyTimes( [fn.object()], [plug] if not curves else [] )
+
+
+def curveToData(animCurve):
+    return readCurves([animCurve])[str(animCurve)]
+
+
+def dataToCurve(allData, plug):
+    writeCurve(allData, plug)
         
         
 def orientJoint(jnt, target, upTarget=None, aim='x', up='y', upVector=None):
@@ -577,7 +986,7 @@ def postFbxExport(*args):
     pass
 
 
-def fbxExport(objs, start, end, filepath):
+def fbxExport(objs, start, end, filepath, bakeComplex=True):
     '''
     Convenience function to export fbx animations.
     
@@ -585,6 +994,8 @@ def fbxExport(objs, start, end, filepath):
     :param int start: The beginning of the range to export.
     :param int end: The end of the range to export.
     :param string filepath: The full name to export.
+    :param bool bakeComplex: If False, the existing keys are exported as is
+        instead of fbx evaluating the scene every frame, see `SkeletonBake`.
     '''
     assert os.path.exists(FBX_ANIM_PRESETS_FILE), 'FBX presets file "%s" does not exist' % FBX_ANIM_PRESETS_FILE
     
@@ -602,10 +1013,180 @@ def fbxExport(objs, start, end, filepath):
     mel.eval('FBXLoadExportPresetFile -f "{0}"'.format(FBX_ANIM_PRESETS_FILE.replace('\\', '/')) )
     mel.eval('FBXExportBakeComplexStart -v {0}'.format(start) )
     mel.eval('FBXExportBakeComplexEnd -v {0}'.format(end) )
+    if not bakeComplex:
+        mel.eval('FBXExportBakeComplexAnimation -v false')
 
     try:
         preFbxExport(objs, start, end, filepath)
         mel.eval('FBXExport -f "%s" -s' % filepath)
         postFbxExport(objs, start, end, filepath)
     finally:
-        mel.FBXPopSettings()
\ No newline at end of file
+        mel.FBXPopSettings()
+
+
+class SkeletonBake(object):
+    '''
+    Bakes the bind skeleton once per take so several clips, or sub ranges, can
+    be exported without fbx re-evaluating the rig for each one.
+    
+    Each take is sampled with one `bakeResults` under parallel evaluation,
+    which is then undone.  Exporting a clip temporarily replaces the
+    skeleton's incoming connections with anim curves made from the cache.
+    
+    Ex:
+        bake = SkeletonBake()
+        bake.bake('run', 0, 120)
+        bake.export('run', 'C:/anims/run_start.fbx', 0, 20)
+        bake.export('run', 'C:/anims/run_loop.fbx', 20, 120)
+        print( bake.report() )
+    '''
+    
+    CHANNELS = [ t + a for t in 'trs' for a in 'xyz' ]
+    
+    _UNDO_NAME = 'fossilSkeletonBake'
+    
+    def __init__(self, root=None):
+        self.root = root if root else core.findNode.getRoot()
+        assert self.root, 'Unable to find the root joint to bake'
+        
+        self.takes = collections.OrderedDict()  # take: (frames, {plug: [values]})
+        self.timings = collections.OrderedDict()  # take: [(label, seconds)]
+    
+    def _plugs(self):
+        '''
+        Returns the unlocked channels of every joint under (and including) the root.
+        '''
+        root = self.root.longName()
+        joints = [root] + ( cmds.listRelatives(root, ad=True, type='joint', f=True) or [] )
+        
+        return [ j + '.' + c for j in joints for c in self.CHANNELS if not cmds.getAttr(j + '.' + c, lock=True) ]
+    
+    def bake(self, take, start, end):
+        '''
+        Samples the skeleton every frame from start to end (inclusive) and
+        caches it as `take`.
+        
+        The whole range is baked with a single `bakeResults` in parallel, the
+        curves are read into the cache and then the bake is undone so the rig
+        is left as it was.
+        '''
+        begin = time.time()
+        
+        plugs = self._plugs()
+        frames = list(range(int(start), int(end) + 1))
+        
+        undoState = cmds.undoInfo(q=True, state=True)
+        cmds.undoInfo(state=True)
+        cmds.undoInfo(openChunk=True, chunkName=self._UNDO_NAME)
+        try:
+            with core.time.EvaluationMode('parallel'):
+                with core.time.PreserveCurrentTime():
+                    cmds.bakeResults( plugs, t=(frames[0], frames[-1]), sampleBy=1, simulation=True,
+                        sparseAnimCurveBake=False, preserveOutsideKeys=False, minimizeRotation=False,
+                        removeBakedAttributeFromLayer=False, bakeOnOverrideLayer=False, controlPoints=False, shape=False )
+            
+            values = self._readBaked(plugs, frames)
+        finally:
+            cmds.undoInfo(closeChunk=True)
+            # Only undo if the bake got as far as making something, never the user's last action.
+            if cmds.undoInfo(q=True, undoName=True) == self._UNDO_NAME:
+                cmds.undo()
+            cmds.undoInfo(state=undoState)
+        
+        self.takes[take] = ( frames, dict(zip(plugs, values)) )
+        self.timings[take] = [ ('bake {0}-{1}'.format(frames[0], frames[-1]), time.time() - begin) ]
+    
+    @staticmethod
+    def _readBaked(plugs, frames):
+        '''
+        Returns the value of each plug's baked curve for every frame, in
+        internal units, ready for MFnAnimCurve.
+        '''
+        unit = OpenMaya.MTime.uiUnit()
+        sel = OpenMaya.MSelectionList()
+        
+        values = []
+        for plug in plugs:
+            # keyframe() finds the curve through pairBlends too
+            curves = cmds.keyframe(plug, q=True, name=True)
+            if not curves:  # Nothing was baked, so it's static
+                sel.clear()
+                sel.add(plug)
+                values.append( [ sel.getPlug(0).asDouble() ] * len(frames) )
+                continue
+            
+            sel.clear()
+            sel.add(curves[0])
+            fn = OpenMayaAnim.MFnAnimCurve( sel.getDependNode(0) )
+            keys = { int(round(fn.input(i).asUnits(unit))): fn.value(i) for i in range(fn.numKeys) }
+            values.append( [ keys.get(f, fn.evaluate( OpenMaya.MTime(f, unit) )) for f in frames ] )
+        
+        return values
+    
+    def export(self, take, filepath, start=None, end=None):
+        '''
+        Exports the cached `take`, optionally only a sub range of it, via `fbxExport`.
+        '''
+        begin = time.time()
+        
+        frames, data = self.takes[take]
+        start = frames[0] if start is None else int(start)
+        end = frames[-1] if end is None else int(end)
+        indices = [ i for i, f in enumerate(frames) if start <= f <= end ]
+        
+        unit = OpenMaya.MTime.uiUnit()
+        times = OpenMaya.MTimeArray( [ OpenMaya.MTime(frames[i], unit) for i in indices ] )
+        
+        # Compounds, ex decomposeMatrix.outputTranslate -> joint.t, are connected too.
+        compounds = []
+        for plug in data:
+            if plug[:-1] not in compounds:
+                compounds.append( plug[:-1] )
+        
+        connections = []
+        curves = []
+        try:
+            for plug in compounds + list(data):
+                pairs = cmds.listConnections(plug, s=True, d=False, p=True, c=True) or []
+                for dest, src in zip(pairs[::2], pairs[1::2]):
+                    if (src, dest) not in connections:
+                        cmds.disconnectAttr(src, dest)
+                        connections.append( (src, dest) )
+            
+            sel = OpenMaya.MSelectionList()
+            for plug in data:
+                sel.add(plug)
+            
+            for i, plug in enumerate(data):
+                curve = OpenMayaAnim.MFnAnimCurve()
+                curve.create( sel.getPlug(i) )
+                curve.addKeys( times, [ data[plug][j] for j in indices ] )
+                curves.append( self._nodeName(curve.object()) )
+            
+            _invalidateKeyTimes( nodes=data )
+            
+            fbxExport( self.root, start, end, filepath, bakeComplex=False )
+        finally:
+            if curves:
+                cmds.delete(curves)
+            for src, plug in connections:
+                cmds.connectAttr(src, plug, f=True)
+            _invalidateKeyTimes( nodes=data )
+        
+        self.timings.setdefault(take, []).append( ('export {0}'.format(os.path.basename(filepath)), time.time() - begin) )
+    
+    @staticmethod
+    def _nodeName(mobj):
+        return OpenMaya.MFnDependencyNode(mobj).name()
+    
+    def report(self):
+        '''
+        Returns a readable summary of how long each take's bake and exports took.
+        '''
+        lines = []
+        for take, timings in self.timings.items():
+            lines.append( '{0}: {1:.2f}s'.format(take, sum(seconds for label, seconds in timings)) )
+            for label, seconds in timings:
+                lines.append( '    {0:<40} {1:.2f}s'.format(label, seconds) )
+        
+        return '\n'.join(lines)
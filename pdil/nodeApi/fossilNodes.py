@@ -4,7 +4,9 @@ Definitions of custom PyMel node types.
 from __future__ import print_function, absolute_import
 
 import collections
+import functools
 import itertools
+import json
 import logging
 import re
 import traceback
@@ -15,6 +17,7 @@ import pymel.api
 from pymel.core import cmds, select, objExists, PyNode, ls, nt, listRelatives, joint, hasAttr, removeMultiInstance, \
     xform, delete, warning, dt, connectAttr, pointConstraint, getAttr
 
+from .. import add
 from ..add import simpleName, shortName, meters
 from .. import core
 from .. import lib
@@ -71,7 +74,7 @@ def findConstraints(ctrl):
     return res
 
 
-def applyConstraints(ctrl, data):
+def applyConstraints(ctrl, data, index=None):
     '''
     if 'main' in data:
         core.constraints.aimDeserialize(ctrl, data['main'])
@@ -85,13 +88,13 @@ def applyConstraints(ctrl, data):
     constTypes = ['aim', 'point', 'parent', 'orient']
     align = core.dagObj.align(ctrl)
     for const in constTypes:
-        ctrlConst = data.get(const + ' ctrl')
-        if ctrlConst:
-            getattr(core.constraints, const + 'Deserialize')(ctrl, ctrlConst)
-        
-        alignConst = data.get(const + ' align')
-        if alignConst:
-            getattr(core.constraints, const + 'Deserialize')(align, alignConst)
+        for obj, key in [(ctrl, const + ' ctrl'), (align, const + ' align')]:
+            if data.get(key):
+                # Skip constraints missing targets instead of building them partially.
+                try:
+                    getattr(core.constraints, const + 'Deserialize')(obj, data[key], index)
+                except Exception as ex:
+                    warning( str(ex) )
 
 
 def findSDK(ctrl):
@@ -108,9 +111,9 @@ def findSDK(ctrl):
         return {}
 
 
-def applySDK(ctrl, info):
-    lib.anim.applySetDrivenKeys(ctrl, info['main'])
-    lib.anim.applySetDrivenKeys(core.dagObj.align(ctrl), info['align'])
+def applySDK(ctrl, info, index=None):
+    lib.anim.applySetDrivenKeys(ctrl, info['main'], index)
+    lib.anim.applySetDrivenKeys(core.dagObj.align(ctrl), info['align'], index)
     
 
 def getLinks(ctrl):
@@ -253,21 +256,100 @@ class NodeListProxy(object):
                 removeMultiInstance( self.obj.extraRigNodes[index], b=True)
     
     def __getitem__(self, index):
-        if not self.obj.hasAttr( 'extraRigNodes' ):
-            return None
-        
-        for plug in self.obj.extraRigNodes:
-            if plug.index() == index:
-                con = plug.link.listConnections()
-                if con:
-                    return con[0]
-                return None
-                
-        return None
+        return self.items().get(index)
     
     def __iter__(self):
-        for i in self.obj.extraRigNodes.getArrayIndices():
-            yield self[i]
+        for node in self.items().values():
+            yield node
+    
+    def items(self):
+        '''
+        Returns an OrderedDict of {index: node or None}, read in a single pass.
+        '''
+        entries = _extraNodes( core.capi.asMObject(self.obj) )
+        return collections.OrderedDict( (i, PyNode(name) if name else None) for i, name in entries.items() )
+
+
+# Plain records of blueprint joint data, made in bulk by `snapshotCards()`.
+# Nodes are names (full paths for dag nodes) or None, and have to be PyNode'd
+# by whatever needs them.
+#   node: The BPJoint
+#   isHelper: bool
+#   info: The dict of `BPJoint.info`
+#   real, realMirror, parent: The connected node, like `BPJoint.real` etc.
+#   extraNodes: OrderedDict of {index: node} like `BPJoint.extraNode`
+JointRecord = collections.namedtuple( 'JointRecord', 'node isHelper info real realMirror parent extraNodes' )
+
+CardSnapshot = collections.namedtuple( 'CardSnapshot', 'card joints' )
+
+
+def _nodeName(mobj):
+    if mobj.hasFn(OpenMaya.MFn.kDagNode):
+        return OpenMaya.MFnDagNode(mobj).fullPathName()
+    return OpenMaya.MFnDependencyNode(mobj).name()
+
+
+def _connection(fn, attr):
+    '''
+    Returns the name of the first node connected to the attr, like `core.factory._getSingleConnection`.
+    '''
+    if not fn.hasAttribute(attr):
+        return None
+    connected = fn.findPlug(attr, False).connectedTo(True, True)
+    return _nodeName( connected[0].node() ) if connected else None
+
+
+def _extraNodes(fn):
+    nodes = collections.OrderedDict()
+    if not fn.hasAttribute('extraRigNodes'):
+        return nodes
+    
+    array = fn.findPlug('extraRigNodes', False)
+    for i in array.getExistingArrayAttributeIndices():
+        connected = array.elementByLogicalIndex(i).child(0).connectedTo(True, True)
+        nodes[i] = _nodeName( connected[0].node() ) if connected else None
+    return nodes
+
+
+def _cardJointObjects(card):
+    '''
+    Returns the MObjects of the card's joints, in order.
+    '''
+    joints = []
+    array = core.capi.asMObject(card).findPlug('joints', False)
+    for i in array.getExistingArrayAttributeIndices():
+        connected = array.elementByLogicalIndex(i).child(0).connectedTo(True, True)
+        if connected:
+            joints.append( connected[0].node() )
+    return joints
+
+
+def snapshotCards(cards):
+    '''
+    Returns a `CardSnapshot` for each card, reading all their blueprint joint
+    data with OpenMaya in one pass instead of a pymel query per attribute.
+    '''
+    snapshots = []
+    for card in cards:
+        records = []
+        for mobj in _cardJointObjects(card):
+            fn = OpenMaya.MFnDependencyNode(mobj)
+            
+            info = fn.findPlug('fossilInfo', False).asString() if fn.hasAttribute('fossilInfo') else ''
+            
+            records.append( JointRecord(
+                node=_nodeName(mobj),
+                isHelper=fn.hasAttribute('helper'),
+                info=json.loads(info, object_pairs_hook=collections.OrderedDict) if info else {},
+                real=_connection(fn, 'realJoint'),
+                realMirror=_connection(fn, 'realJointMirror'),
+                parent=_connection(fn, 'parent'),
+                extraNodes=_extraNodes(fn),
+            ) )
+        
+        snapshots.append( CardSnapshot(card, records) )
+    
+    return snapshots
 
 
 class OutputControls(object):
@@ -490,13 +572,13 @@ class Card(nt.Transform):
         
     @property
     def joints(self):
-        joints = []
-        for j in self.attr('joints'):
-            connected = j.jmsg.listConnections()
-            if connected:
-                joints.append(connected[0])
-                
-        return joints
+        return [ PyNode(_nodeName(mobj)) for mobj in _cardJointObjects(self) ]
+    
+    def snapshot(self):
+        '''
+        Returns a `CardSnapshot` of this card's joints, see `snapshotCards()`.
+        '''
+        return snapshotCards([self])[0]
         
     @property
     def rigCommandClass(self):
@@ -621,13 +703,14 @@ class Card(nt.Transform):
             Use this liberally since it handles helper joints!
             There might probably be branching cards in the future, not sure how to agnostically handle that.
         '''
-        for j in reversed(self.joints):
+        joints = self.snapshot().joints
+        for j in reversed(joints):
             if not j.isHelper:
-                return j
+                return PyNode(j.node)
         
         # This might not be great but for Group controls, where it IS a helper,
         # fallback to returing the first joint.
-        return self.joints[0]
+        return PyNode(joints[0].node)
         
     def nameList(self, usePrefix=True, mirroredSide=False, excludeSide=False):
         '''
@@ -722,17 +805,19 @@ class Card(nt.Transform):
         
         names = iter( itertools.chain(self.nameList(usePrefix=usePrefix), itertools.cycle(['NOT_ENOUGH_NAMES'])) )
         
-        for j in self.joints:
-            if j.isHelper:
+        joints = [ (PyNode(j.node), j.isHelper) for j in self.snapshot().joints ]
+        
+        for j, isHelper in joints:
+            if isHelper:
                 if includeHelpers:
                     output[j] = ['']
             
             else:
-                output[j] = [names.next()]
+                output[j] = [next(names)]
                 
         if self.isCardMirrored():
             
-            [ output[j].append(name) for j, name in zip(self.joints, self.nameList(usePrefix=usePrefix, mirroredSide=True) ) if not j.isHelper ]
+            [ output[j].append(name) for (j, isHelper), name in zip(joints, self.nameList(usePrefix=usePrefix, mirroredSide=True) ) if not isHelper ]
         
         return output
         
@@ -755,18 +840,17 @@ class Card(nt.Transform):
             primarySide = sideName
             otherSide = settings.otherSideCode(primarySide)
 
+        mirrors = self.mirror is not False
+        
         result = []
-        for j in self.joints:
-            if j.isHelper:  # On freeform, there might be several intermediate helpers
-                pass
-            
+        for j in self.snapshot().joints:
             if side is None or side == primarySide:
                 if j.real:
-                    result.append(j.real)
+                    result.append( PyNode(j.real) )
             
             if side is None or side == otherSide:
-                if self.mirror is not False and j.realMirror:
-                    result.append(j.realMirror)
+                if mirrors and j.realMirror:
+                    result.append( PyNode(j.realMirror) )
                 
         return result
         
@@ -817,7 +901,7 @@ class Card(nt.Transform):
         return getattr(self.getSide(side), kinematic)
         
     def hasBuiltJoints(self):
-        for j in self.joints:
+        for j in self.snapshot().joints:
             if not j.isHelper and j.real:
                 return True
         
@@ -886,6 +970,8 @@ class Card(nt.Transform):
         isMirrored = self.isCardMirrored()
         card_log.debug( '{} is mirrored'.format(isMirrored) )
         
+        offcenterChecks = []
+        
         # If not mirrorred, mirrorName is just ignored in the loop body.
         for name, bpJoint, mirrorName in zip( names, jointsThatBuild, self.nameList(mirroredSide=True)):
             # Make the joint
@@ -896,7 +982,7 @@ class Card(nt.Transform):
                 relative=False)
             j.msg >> bpJoint.realJoint
             if checkOffcenter:
-                log.Centerline.check(j)
+                offcenterChecks.append(j)
             
             #------ Orient it -------
             state, target = bpJoint.getOrientStateNEW()
@@ -1003,8 +1089,9 @@ class Card(nt.Transform):
                         mj.setParent(bpJoint.parent.realMirror)
                     else:
                         mj.setParent(bpJoint.parent.real)
-
-                
+        
+        if offcenterChecks:
+            log.Centerline.check(offcenterChecks)
             
     def getUpArrow(self):
         for child in self.listRelatives():
@@ -1071,11 +1158,7 @@ class Card(nt.Transform):
             for child in children:
                 proxy.pointer(parent, child)
            
-        proxyParent = jnt.proxy.getParent()
-        for child in jnt.proxy.listRelatives(type='joint'):
-            child.setParent(proxyParent)
-           
-        delete( jnt.proxy )
+        proxy.removeProxy( jnt )
         delete( jnt )
            
     def insertJoint(self, previousJoint):
@@ -1540,7 +1623,17 @@ class Card(nt.Transform):
         
         issues = []
 
+        # Resolve every space target, driver and constraint target through
+        # lookup tables made once instead of per control.
+        resolver = space.TargetResolver()
+        index = add.IdIndex()
+
         for niceName, harvestFunc, restoreFunc in self.thingsToSave:
+            if niceName == 'spaces':
+                restoreFunc = functools.partial(restoreFunc, resolver=resolver)
+            elif niceName in ('setDriven', 'constraints'):
+                restoreFunc = functools.partial(restoreFunc, index=index)
+            
             if niceName in allData and allData[niceName]:
                 try:
                     self._restoreData(restoreFunc, allData[niceName])
@@ -2034,6 +2127,95 @@ def findSimilarOutput(side, otherCard, fallbackDirection):
     return None
 
 
+if '_controlLinkCache' not in globals():
+    _controlLinkCache = {}      # Controller handle hashCode: OrderedDict( name: (logical index, sub control or None) )
+    _controlLinkCallbacks = {}  # Controller handle hashCode: (MObjectHandle, attribute changed callback id)
+    _controlLinkSceneCallbacks = []
+
+
+def _clearControlLinks(*args):
+    _controlLinkCache.clear()
+    for handle, callbackId in _controlLinkCallbacks.values():
+        try:
+            OpenMaya.MMessage.removeCallback(callbackId)
+        except Exception:  # The node is probably already gone
+            pass
+    _controlLinkCallbacks.clear()
+
+
+def _controlLinksChanged(msg, plug, otherPlug, key):
+    if plug.partialName(useLongNames=True).startswith('controlLinks'):
+        _controlLinkCache.pop(key, None)
+
+
+def _controlLinkKey(fn):
+    '''
+    Returns the cache key of the controller, registering its callback if needed.
+    
+    Keys are per node since referencing the same rig twice repeats uuids.
+    '''
+    mobj = fn.object()
+    key = OpenMaya.MObjectHandle(mobj).hashCode()
+    
+    if key in _controlLinkCallbacks:
+        handle, callbackId = _controlLinkCallbacks[key]
+        if handle.isValid() and handle.object() == mobj:
+            return key
+        
+        # A deleted controller's hash was reused
+        _controlLinkCache.pop(key, None)
+        try:
+            OpenMaya.MMessage.removeCallback(callbackId)
+        except Exception:
+            pass
+    
+    _controlLinkCallbacks[key] = ( OpenMaya.MObjectHandle(mobj),
+        OpenMaya.MNodeMessage.addAttributeChangedCallback( mobj, _controlLinksChanged, key ) )
+    return key
+
+
+def _controlLinks(ctrl):
+    '''
+    Returns an OrderedDict of the `RigController`'s {name: (logical index, sub control or None)}.
+
+    The whole controlLinks array is read at once and cached until something
+    about it changes, like a connection or name, or a new scene is opened.
+    '''
+    if not _controlLinkSceneCallbacks:
+        _controlLinkSceneCallbacks.extend( [
+            OpenMaya.MSceneMessage.addCallback( OpenMaya.MSceneMessage.kBeforeNew, _clearControlLinks ),
+            OpenMaya.MSceneMessage.addCallback( OpenMaya.MSceneMessage.kBeforeOpen, _clearControlLinks ),
+        ] )
+
+    fn = core.capi.asMObject(ctrl)
+    key = _controlLinkKey(fn)
+
+    links = _controlLinkCache.get(key)
+    if links is not None:
+        return links
+
+    links = collections.OrderedDict()
+    array = fn.findPlug('controlLinks', False)
+    for i in array.getExistingArrayAttributeIndices():
+        element = array.elementByLogicalIndex(i)
+        name = element.child(0).asString()
+        if name in links:  # First one wins, like searching the array did.
+            continue
+
+        sources = element.child(1).connectedTo(True, False)
+        if sources:
+            node = sources[0].node()
+            if node.hasFn(OpenMaya.MFn.kDagNode):
+                links[name] = (i, PyNode( OpenMaya.MFnDagNode(node).fullPathName() ))
+            else:
+                links[name] = (i, PyNode( OpenMaya.MFnDependencyNode(node).name() ))
+        else:
+            links[name] = (i, None)
+
+    _controlLinkCache[key] = links
+    return links
+
+
 class RigController(nt.Transform):
 
     @staticmethod
@@ -2181,29 +2363,14 @@ class RigController(nt.Transform):
             self.src = src
             
         def __repr__(self):
-            controls = collections.OrderedDict()
-            for link in self.src.controlLinks:
-                key = link.controlName.get()
-                con = link.controlLink.listConnections()
-                if con:
-                    con = con[0]
-                else:
-                    con = None
-                controls[key] = con
+            controls = collections.OrderedDict( (key, con) for key, (i, con) in _controlLinks(self.src).items() )
             return str(controls)
             
         def items(self):
             '''
             Like a regular dict.items() but only returns non-empty slots.
             '''
-            controls = collections.OrderedDict()
-            for link in self.src.controlLinks:
-                key = link.controlName.get()
-                con = link.controlLink.listConnections()
-                if con:
-                    controls[key] = con[0]
-                
-            return controls.items()
+            return [ (key, con) for key, (i, con) in _controlLinks(self.src).items() if con ]
         
         def next(self, current):
             '''
@@ -2275,31 +2442,28 @@ class RigController(nt.Transform):
                     return controls[i - 1]
                             
         def __contains__(self, key):
-            try:
-                self[key]
-                return True
-            except KeyError:
-                return False
+            return key in _controlLinks(self.src)
         
         def __getitem__(self, key):
-            for link in self.src.controlLinks:
-                if link.controlName.get() == key:
-                    con = link.controlLink.listConnections()
-                    if con:
-                        return con[0]
-                    return None
+            links = _controlLinks(self.src)
+            if key in links:
+                return links[key][1]
                     
             raise KeyError( '{0} does not have controlLink {1}'.format( self.src, key ) )
     
         def __setitem__(self, name, subControl):
-            for link in self.src.controlLinks:
-                if link.controlName.get() == name:
-                    subControl.message >> link.controlLink
-                    break
+            links = _controlLinks(self.src)
+            if name in links:
+                i = links[name][0]
+                subControl.message >> self.src.controlLinks[i].controlLink
             else:
                 i = self.src.controlLinks.numElements()
                 self.src.controlLinks[i].controlName.set(name)
                 subControl.message >> self.src.controlLinks[i].controlLink
+            
+            # The changes flushed the cache, so put back the known result rather than rereading.
+            links[name] = (i, PyNode(subControl))
+            _controlLinkCache[ _controlLinkKey( core.capi.asMObject(self.src) ) ] = links
 
     def cardPath(self):
         return _cardPath(self)
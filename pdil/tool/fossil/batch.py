@@ -0,0 +1,223 @@
+'''
+Headless batch processing of scenes across several mayapy processes.
+
+Rebuild all the rigs in a folder, and save them:
+    mayapy pdil/tool/fossil/batch.py rig D:/characters --workers 4 --summary D:/rigs.json
+
+Export every animation in a folder (the playback range of each scene):
+    mayapy pdil/tool/fossil/batch.py export D:/anims --out D:/fbx --workers 6
+
+Scenes are found with `add.path.getMayaFiles` and split between the workers,
+each of which is a separate mayapy, initialized once, processing its share of
+the files.  The results, timings and errors of every file are collected into
+a json summary.
+
+This is run as a script so the workers can initialize maya.standalone before
+pymel and the rest of pdil are imported.
+'''
+from __future__ import print_function, absolute_import
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+
+
+JOBS = ('rig', 'export')
+
+
+def _pdilParent():
+    # The folder containing the pdil package, so the workers can import it.
+    return os.path.dirname( os.path.dirname( os.path.dirname( os.path.dirname(os.path.abspath(__file__)) ) ) )
+
+
+def rigFile(filename, options):
+    '''
+    Rebuilds the rig (and optionally the bones first) of all the cards and saves.
+    '''
+    from maya import cmds
+    from pdil import core
+    from pdil.tool.fossil import cardlister, cardRigging, log
+
+    if options.get('bones'):
+        for card in cardlister.cardJointBuildOrder():
+            card.buildJoints()
+
+    cardRigging.raiseErrors = True
+    cardRigging.rebuildRig( core.findNode.allCards() )
+
+    report = log.validate()
+    if report:
+        print( report.text() )
+
+    cmds.file(save=True, force=True)
+    return [filename]
+
+
+def exportFile(filename, options):
+    '''
+    Bakes the skeleton over the playback range and exports it as an fbx named
+    after the scene, next to it or in the `out` folder.
+    '''
+    from pdil import core, lib
+
+    take = os.path.splitext( os.path.basename(filename) )[0]
+    folder = options.get('out') or os.path.dirname(filename)
+    output = folder + '/' + take + '.fbx'
+
+    start, end = core.time.playbackRange()
+
+    bake = lib.anim.SkeletonBake()
+    bake.bake(take, start, end)
+    bake.export(take, output)
+    print( bake.report() )
+
+    return [output]
+
+
+def runWorker(jobFile, resultFile):
+    '''
+    Processes the files listed in the jobFile, writing a result per file to
+    the resultFile as it goes so a crash doesn't lose the earlier ones.
+    '''
+    import maya.standalone
+    maya.standalone.initialize()
+
+    from maya import cmds
+
+    with open(jobFile, 'r') as fid:
+        job = json.load(fid)
+
+    if job['job'] == 'export':
+        # Standalone doesn't autoload plugins so the fbx commands don't exist yet.
+        cmds.loadPlugin('fbxmaya', quiet=True)
+
+    func = {'rig': rigFile, 'export': exportFile}[ job['job'] ]
+
+    results = []
+    for filename in job['files']:
+        begin = time.time()
+        result = {'file': filename, 'job': job['job'], 'ok': False, 'seconds': 0.0, 'outputs': [], 'error': ''}
+        try:
+            cmds.file(filename, open=True, force=True, prompt=False)
+            result['outputs'] = func(filename, job['options'])
+            result['ok'] = True
+        except Exception:
+            result['error'] = traceback.format_exc()
+            print( result['error'] )
+
+        result['seconds'] = time.time() - begin
+        results.append(result)
+
+        with open(resultFile, 'w') as fid:
+            json.dump(results, fid, indent=4)
+
+
+def run(job, folder, workers=4, summary=None, mayapy=None, **options):
+    '''
+    Runs the `job` on all the maya files in the folder over `workers` processes,
+    returning the results and writing them to `summary` if given.
+
+    :param str mayapy: The interpreter for the workers, defaults to the current one.
+    :param options: Passed to the job, `bones` for 'rig', `out` for 'export'.
+    '''
+    assert job in JOBS, 'Unknown job {0}, must be one of {1}'.format(job, JOBS)
+
+    from pdil.add import path
+
+    begin = time.time()
+
+    files = sorted( path.getMayaFiles(folder) )
+    if not files:
+        return _summarize(job, folder, 0, begin, [], summary)
+
+    workers = max( 1, min(workers, len(files)) )
+    mayapy = mayapy or sys.executable
+
+    tempdir = tempfile.mkdtemp(prefix='fossil_batch_')
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join( [_pdilParent()] + ([env['PYTHONPATH']] if env.get('PYTHONPATH') else []) )
+
+    processes = []
+    for i in range(workers):
+        jobFile = '{0}/job_{1}.json'.format(tempdir, i)
+        resultFile = '{0}/result_{1}.json'.format(tempdir, i)
+
+        with open(jobFile, 'w') as fid:
+            json.dump( {'job': job, 'files': files[i::workers], 'options': options}, fid )
+
+        cmd = [mayapy, os.path.abspath(__file__), '--worker', jobFile, resultFile]
+        processes.append( (subprocess.Popen(cmd, env=env), files[i::workers], resultFile) )
+
+    results = []
+    for process, chunk, resultFile in processes:
+        process.wait()
+
+        done = []
+        if os.path.exists(resultFile):
+            with open(resultFile, 'r') as fid:
+                done = json.load(fid)
+        results += done
+
+        # Anything missing means the worker died on it
+        for filename in chunk[len(done):]:
+            results.append( {'file': filename, 'job': job, 'ok': False, 'seconds': 0.0, 'outputs': [],
+                'error': 'Worker exited with code {0} before finishing'.format(process.returncode)} )
+
+    return _summarize(job, folder, workers, begin, results, summary)
+
+
+def _summarize(job, folder, workers, begin, results, summary):
+    info = {
+        'job': job,
+        'folder': folder,
+        'workers': workers,
+        'seconds': time.time() - begin,
+        'failed': [ r['file'] for r in results if not r['ok'] ],
+        'results': results,
+    }
+
+    if summary:
+        with open(summary, 'w') as fid:
+            json.dump(info, fid, indent=4)
+
+    return info
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser( description='Batch rebuild fossil rigs or export animations with mayapy.' )
+    parser.add_argument( '--worker', nargs=2, metavar=('JOB_FILE', 'RESULT_FILE'), help=argparse.SUPPRESS )
+    parser.add_argument( 'job', nargs='?', choices=JOBS )
+    parser.add_argument( 'folder', nargs='?', help='Folder searched (recursively) for maya files' )
+    parser.add_argument( '--workers', type=int, default=4 )
+    parser.add_argument( '--summary', help='Json file to write the results to' )
+    parser.add_argument( '--bones', action='store_true', help='rig: Rebuild the joints before the rig' )
+    parser.add_argument( '--out', help='export: Folder for the fbx files, defaults to next to the scene' )
+
+    args = parser.parse_args(args)
+
+    if args.worker:
+        runWorker(*args.worker)
+        return 0
+
+    if not args.job or not args.folder:
+        parser.error('job and folder are required')
+
+    info = run( args.job, args.folder, args.workers, args.summary, bones=args.bones, out=args.out )
+
+    print( '{0} files in {1:.1f}s, {2} failed'.format(len(info['results']), info['seconds'], len(info['failed'])) )
+    for filename in info['failed']:
+        print( '    FAILED', filename )
+
+    return 1 if info['failed'] else 0
+
+
+if __name__ == '__main__':
+    if _pdilParent() not in sys.path:
+        sys.path.insert(0, _pdilParent())
+    sys.exit( main() )
@@ -128,11 +128,14 @@ def pivToStart(card):
     xform( card, ws=True, piv=piv[:3])
 
 
-def makeCard(jointCount=5, jointNames={'repeat': 'DEFAULT'}, rigInfo=None, size=(4, 6), suffix=''):
+def makeCard(jointCount=5, jointNames={'repeat': 'DEFAULT'}, rigInfo=None, size=(4, 6), suffix='', proxies=True):
     '''
     ..  todo:: Do not use defaults.
     
     &&& names is really joints names, make it so.
+    
+    :param bool proxies: If False, the joints aren't parented to each other and
+        have no proxies, for when that is done in bulk, see `cardTemplate`.
     '''
     if isinstance(jointNames, basestring):
         head, repeat, tail = util.parse(jointNames)
@@ -214,10 +217,12 @@ def makeCard(jointCount=5, jointNames={'repeat': 'DEFAULT'}, rigInfo=None, size=
         newJoint.ty.set( height / 2.0 - delta * i )
         
     if len(joints) > 1:
-        for parentBpj, childBpj in zip( joints[0:-1], joints[1:] ):
-            proxy.pointer( parentBpj, childBpj )
+        if proxies:
+            for parentBpj, childBpj in zip( joints[0:-1], joints[1:] ):
+                proxy.pointer( parentBpj, childBpj )
     elif joints:
-        proxy.makeProxy(joints[0], proxy.getProxyGroup())
+        if proxies:
+            proxy.makeProxy(joints[0], proxy.getProxyGroup())
         joints[0].ty.set(0)
     
     if joints:
@@ -579,9 +584,9 @@ def spineCard(spineCount, orientation=Orientation.VERTICAL, isStart=True):
 
     if isStart:
         if hasPelvis:
-            pelvis.start().proxy.setParent( proxy.getProxyGroup() )
+            proxy.reparent( pelvis.start().proxy, proxy.getProxyGroup() )
         else:
-            spine.start().proxy.setParent( proxy.getProxyGroup() )
+            proxy.reparent( spine.start().proxy, proxy.getProxyGroup() )
     
     return spine, hips
 
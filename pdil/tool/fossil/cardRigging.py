@@ -12,7 +12,7 @@ import traceback
 
 from collections import OrderedDict
 
-from pymel.core import textField, optionMenu, warning, checkBox, intField, floatField, duplicate, move, confirmDialog, selected
+from pymel.core import cmds, textField, optionMenu, warning, checkBox, intField, floatField, duplicate, move, confirmDialog, selected
 #from pymel.core import *
 
 from ...add import shortName
@@ -674,7 +674,8 @@ class RotateChain(MetaControl):
     ''' Rotate only controls.  Unless this is a single joint, lead joint is always translatable too. '''
     fkArgs = {'translatable': False}
     fkInput = OrderedDict( [
-        ('scalable', ParamInfo('Scalable', 'Scalable', ParamInfo.BOOL, default=False))
+        ('scalable', ParamInfo('Scalable', 'Scalable', ParamInfo.BOOL, default=False)),
+        ('instanceShapes', ParamInfo('Instance Shapes', 'Controls share one set of shapes, lighter for long chains', ParamInfo.BOOL, default=False)),
     ] )
 
 
@@ -682,7 +683,8 @@ class TranslateChain(MetaControl):
     ''' Translatable and rotatable controls. '''
     fkArgs = {'translatable': True}
     fkInput = OrderedDict( [
-        ('scalable', ParamInfo('Scalable', 'Scalable', ParamInfo.BOOL, default=False))
+        ('scalable', ParamInfo('Scalable', 'Scalable', ParamInfo.BOOL, default=False)),
+        ('instanceShapes', ParamInfo('Instance Shapes', 'Controls share one set of shapes, lighter for long chains', ParamInfo.BOOL, default=False)),
     ] )
 
 
@@ -750,9 +752,12 @@ if 'raiseErrors' not in globals():
     raiseErrors = False
 
 
-def buildRig(cards):
+def buildRig(cards, deferChecks=False):
     '''
     Build the rig for the given cards, defaulting to all of them.
+    
+    :param bool deferChecks: Leave the queued `log.PostRigRotation` checks
+        for the caller to flush, so several builds are checked in one go.
     '''
     global raiseErrors  # Testing hack.
     global registeredControls
@@ -775,7 +780,14 @@ def buildRig(cards):
             except Exception:
                 print( traceback.format_exc() )
                 errors.append( (card, traceback.format_exc()) )
+    
+    # Verify the joints weren't rotated by the rigs, all at once
+    if not deferChecks:
+        log.PostRigRotation.flush()
                 
+    # The new controllers might have picked up shared switcher shapes
+    controllerShape.clearSwitcherRegistry()
+    
     # Afterwards, create any required space switching that comes default with that card
     for card in cards:
         if card.rigData.get('rigCmd'):
@@ -794,4 +806,34 @@ def buildRig(cards):
         confirmDialog( m='Errors occured!  See script editor for details.' )
         
         if raiseErrors:
-            raise Exception( 'Errors occured on {0}'.format( errors ) )
\ No newline at end of file
+            raise Exception( 'Errors occured on {0}'.format( errors ) )
+
+
+def rebuildRig(cards, useCurrentShapes=False):
+    '''
+    Removes and builds the rig on each card, keeping if it was in ik or fk.
+    
+    :param bool useCurrentShapes: Keep the current control shapes instead of
+        the ones stored in the rig info.
+    '''
+    for card in cards:
+        if useCurrentShapes:
+            card.saveShapes()
+        
+        # If this being rebuilt, also restore the if it's in ik or fk
+        switchers = [controllerShape.getSwitcherPlug(x[0]) for x in card._outputs()]
+        prevValues = [ (s, cmds.getAttr(s)) for s in switchers if s]
+
+        card.removeRig()
+        buildRig([card], deferChecks=True)
+
+        if useCurrentShapes:
+            card.restoreShapes()
+            
+        # Restore ik/fk-ness
+        for switch, value in prevValues:
+            if cmds.objExists(switch):
+                cmds.setAttr(switch, value)
+    
+    # Every card's switch is flipped together, once, instead of per card
+    log.PostRigRotation.flush()
@@ -0,0 +1,317 @@
+'''
+Card templates, an entire blueprint saved as json so a library of starting
+skeletons can be kept and loaded in a single pass.
+
+A template is a dict of {'version': 1, 'cards': [card data]}, where each card
+has its transform, size, rigData, mirror settings and joints.  Joints refer to
+their parent (and orient target) by [card index, joint index] so the links are
+restored between the new cards.
+
+Ex:
+    cardTemplate.save( cardTemplate.capture(), 'D:/creatures/biped.json' )
+    cards = cardTemplate.instantiate( cardTemplate.load('D:/creatures/biped.json') )
+'''
+from __future__ import print_function, absolute_import
+
+import collections
+import json
+import os
+
+from pymel.core import cmds, PyNode
+
+from ... import core
+from . import card as fossil_card
+from . import proxy
+from . import settings
+
+
+try:  # Py3 anticipation
+    basestring  # noqa
+except NameError:
+    basestring = str
+
+
+VERSION = 1
+
+EXTENSION = '.json'
+
+
+def _jointData(jnt, indices):
+    name = jnt.longName()
+
+    orientTarget = jnt.orientTarget
+    if isinstance(orientTarget, PyNode):
+        orientTarget = indices.get( orientTarget.longName(), orientTarget.longName() )
+
+    parent = jnt.parent
+
+    return collections.OrderedDict( [
+        ('name', jnt.shortName()),
+        ('translate', list( cmds.getAttr(name + '.t')[0] )),
+        ('radius', cmds.getAttr(name + '.radius')),
+        ('helper', jnt.isHelper),
+        ('info', jnt.info),
+        ('postCommand', jnt.postCommand),
+        ('suffixOverride', jnt.suffixOverride),
+        ('parent', indices.get(parent.longName(), parent.longName()) if parent else None),
+        ('orientTarget', orientTarget),
+    ] )
+
+
+def capture(cards=None):
+    '''
+    Returns a template of the given cards, defaulting to all of them.
+    Parents and orient targets outside the given cards are recorded by name
+    and only restored if they exist when instantiated.
+    '''
+    if cards is None:
+        cards = core.findNode.allCards()
+
+    indices = {}  # Long joint name: [card index, joint index]
+    for ci, card in enumerate(cards):
+        for ji, jnt in enumerate(card.joints):
+            indices[ jnt.longName() ] = [ci, ji]
+
+    data = []
+    for card in cards:
+        name = card.longName()
+        width, height = card.size
+
+        data.append( collections.OrderedDict( [
+            ('name', card.shortName()),
+            ('size', [ width / card.sx.get(), height / card.sy.get() ]),
+            ('translate', list( cmds.getAttr(name + '.t')[0] )),
+            ('rotate', list( cmds.getAttr(name + '.r')[0] )),
+            ('scale', list( cmds.getAttr(name + '.s')[0] )),
+            ('pivot', cmds.xform(name, q=True, os=True, rp=True)),
+            ('rigData', card.rigData),
+            ('mirror', card.mirror),
+            ('metaControl', core.factory._getStringAttr(card, 'metaControl')),
+            ('joints', [ _jointData(jnt, indices) for jnt in card.joints ]),
+        ] ) )
+
+    return {'version': VERSION, 'cards': data}
+
+
+def _makeCard(data):
+    '''
+    Makes a card from the template data, without any joint parenting or proxies.
+    '''
+    rigData = data['rigData']
+
+    card = fossil_card.makeCard( len(data['joints']), rigData.get('nameInfo', {'repeat': 'DEFAULT'}),
+        size=data['size'], suffix=rigData.get('mirrorCode', ''), proxies=False )
+
+    card.rigData = rigData
+    card.rename( data['name'] )
+
+    name = card.longName()
+    cmds.setAttr( name + '.t', *data['translate'] )
+    cmds.setAttr( name + '.r', *data['rotate'] )
+    cmds.setAttr( name + '.s', *data['scale'] )
+    cmds.xform( name, os=True, piv=data['pivot'] )
+
+    card.mirror = data['mirror']
+    if data['metaControl']:
+        core.factory._setStringAttr(card, 'metaControl', data['metaControl'])
+
+    for jnt, jointData in zip(card.joints, data['joints']):
+        jointName = jnt.longName()
+        cmds.setAttr( jointName + '.t', *jointData['translate'] )
+        cmds.setAttr( jointName + '.radius', jointData['radius'] )
+
+        if jointData['helper']:
+            jnt.isHelper = True
+        if jointData['info']:
+            jnt.info = jointData['info']
+        if jointData['postCommand']:
+            jnt.postCommand = jointData['postCommand']
+        if jointData['suffixOverride']:
+            jnt.suffixOverride = jointData['suffixOverride']
+
+    return card
+
+
+def _resolve(ref, joints):
+    '''
+    Returns the BPJoint of a [card index, joint index] or name reference, or
+    None if it doesn't exist.
+    '''
+    if isinstance(ref, list):
+        return joints[ref[0]][ref[1]]
+    elif isinstance(ref, basestring) and cmds.objExists(ref):
+        return PyNode(ref)
+    return None
+
+
+def instantiate(template):
+    '''
+    Makes all the cards of the template, as a single undo, returning them.
+
+    The cards are made first, then all the joints are linked and finally the
+    proxy skeleton is built in one go with `proxy.buildProxies`.
+    '''
+    assert template.get('version', 0) <= VERSION, 'Template version {0} is newer than supported {1}'.format(template.get('version'), VERSION)
+
+    cmds.undoInfo(openChunk=True)
+    cmds.refresh(suspend=True)
+    try:
+        cards = [ _makeCard(data) for data in template['cards'] ]
+        joints = [ card.joints for card in cards ]
+
+        for card, cardJoints, data in zip(cards, joints, template['cards']):
+            for jnt, jointData in zip(cardJoints, data['joints']):
+                parent = _resolve(jointData['parent'], joints)
+                if parent:
+                    cmds.connectAttr( parent.longName() + '.children', jnt.longName() + '.parent', f=True )
+                    if parent.card != card:
+                        card.parentCardLink = parent.card
+
+                target = jointData['orientTarget']
+                if target in ('-world-', '-parent-'):
+                    jnt.orientTarget = target
+                elif target:
+                    target = _resolve(target, joints)
+                    if target:
+                        jnt.orientTarget = target
+
+        for card in cards:
+            card.setTempNames()
+
+        proxy.buildProxies( [ jnt for cardJoints in joints for jnt in cardJoints ] )
+
+    finally:
+        cmds.refresh(suspend=False)
+        cmds.undoInfo(closeChunk=True)
+
+    return cards
+
+
+def _otherSide(name):
+    '''
+    Returns the long name of the other side's joint of a joint outside the
+    template, ex the right wrist for the left one, or the name itself if it
+    isn't on a side or there is no card for the other side yet.
+    '''
+    if not isinstance(name, basestring) or name in ('-world-', '-parent-') or not cmds.objExists(name):
+        return name
+
+    jnt = PyNode(name)
+    card = jnt.card
+    code = card.rigData.get('mirrorCode')
+    if not code:
+        return name
+
+    # Cards for each side share nameInfo, only the mirrorCode differs.
+    nameInfo = card.rigData.get('nameInfo')
+    for other in sideCards( settings.otherSideCode(code) ):
+        if other.rigData.get('nameInfo') == nameInfo and len(other.joints) == len(card.joints):
+            return other.joints[ card.joints.index(jnt) ].longName()
+
+    return name
+
+
+def mirrored(template):
+    '''
+    Returns a copy of the template flipped across x, with the same transform
+    changes as `card.mirrorCard` and left/right swapped in the mirrorCode, so
+    the joints get the other side's names.  Parents and orient targets outside
+    the template move to the other side too, see `_otherSide`.
+    '''
+    template = json.loads( json.dumps(template), object_pairs_hook=collections.OrderedDict )
+
+    for data in template['cards']:
+        for jointData in data['joints']:
+            jointData['parent'] = _otherSide(jointData['parent'])
+            jointData['orientTarget'] = _otherSide(jointData['orientTarget'])
+
+        data['translate'][0] *= -1
+        data['rotate'][1] *= -1
+        data['rotate'][2] *= -1
+
+        code = data['rigData'].get('mirrorCode')
+        if code:
+            data['rigData']['mirrorCode'] = settings.otherSideCode(code)
+
+        # The copy is a card in its own right, so mirroring stops at the source.
+        data['mirror'] = None
+
+    return template
+
+
+def duplicateCards(cards):
+    '''
+    Duplicates the cards together, returning the new ones.  Joints parented
+    within the cards are parented to the copies, the rest to the originals.
+    '''
+    return instantiate( capture(cards) )
+
+
+def mirrorCards(cards, live=True):
+    '''
+    Makes mirrored copies of all the cards at once, returning them, like
+    `card.mirrorCard` does for a single card.  Source cards that mirror on
+    build are set to not mirror so the joints aren't made twice.
+
+    :param bool live: If True, the copies' transforms follow the sources.
+    '''
+    template = mirrored( capture(cards) )
+
+    cmds.undoInfo(openChunk=True)
+    try:
+        copies = instantiate(template)
+
+        for card in cards:
+            if card.isCardMirrored():
+                card.mirror = False
+
+        if live:
+            for card, copy in zip(cards, copies):
+                _linkMirror(card, copy)
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+    return copies
+
+
+def _linkMirror(card, copy):
+    '''
+    Connects the transform of the copy to the card, see `card.mirrorCard`.
+    '''
+    mult = cmds.createNode('multiplyDivide', n='mirrorCard')
+    cmds.setAttr( mult + '.input2', -1, -1, -1 )
+
+    src, dest = card.longName(), copy.longName()
+    for axis, attr in zip('XYZ', ('tx', 'ry', 'rz')):
+        cmds.connectAttr( src + '.' + attr, mult + '.input1' + axis )
+        cmds.connectAttr( mult + '.output' + axis, dest + '.' + attr )
+
+    for attr in ('rx', 'ty', 'tz'):
+        cmds.connectAttr( src + '.' + attr, dest + '.' + attr )
+
+
+def sideCards(side):
+    '''
+    Returns all the cards whose mirrorCode is the given side, ex 'left'.
+    '''
+    return [ card for card in core.findNode.allCards() if card.rigData.get('mirrorCode') == side ]
+
+
+def save(template, filename):
+    with open(filename, 'w') as fid:
+        json.dump(template, fid, indent=4)
+
+
+def load(filename):
+    with open(filename, 'r') as fid:
+        return json.load(fid, object_pairs_hook=collections.OrderedDict)
+
+
+def library(folder):
+    '''
+    Returns {name: filename} of all the templates in the folder.
+    '''
+    return collections.OrderedDict(
+        (os.path.splitext(f)[0], os.path.join(folder, f))
+        for f in sorted(os.listdir(folder)) if f.endswith(EXTENSION)
+    )
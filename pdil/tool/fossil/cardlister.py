@@ -5,8 +5,11 @@ import contextlib
 from ...vendor.Qt import QtWidgets
 from ...vendor.Qt.QtCore import Qt, Signal
 
+from pymel.core import PyNode
+
 from ...add import simpleName
 from ... import core
+from ... import nodeApi
 
 from . import cardRigging
 from . import util
@@ -232,17 +235,18 @@ def cardHierarchy():
     # Also track parent and their children so we can lookup to add asymetrically made cards to child list
     parentCardsListed = {}
     
-    for card in core.findNode.allCards():
-        if not card.parentCard:
+    topCards = [ card for card in core.findNode.allCards() if not card.parentCard ]
+    
+    for card, joints in nodeApi.fossilNodes.snapshotCards(topCards):
+        # Only pick up cards that are actually top level and not parented to a mirror side
+        for j in joints:
             
-            # Only pick up cards that are actually top level and not parented to a mirror side
-            for j in card.joints:
-                
-                if j.info.get('options', {}).get('mirroredSide'):
-                    mirrored[card] = j.extraNode[0]
-                    break
-            else:
-                parentCards[0][1].append(card)
+            if j.info.get('options', {}).get('mirroredSide'):
+                extra = j.extraNodes.get(0)
+                mirrored[card] = PyNode(extra) if extra else None
+                break
+        else:
+            parentCards[0][1].append(card)
     
     def gatherChildren(cards):
         for card in cards:
@@ -6,6 +6,7 @@ import json
 import logging
 import numbers
 import os
+import tempfile
 import time
 
 from pymel.core import addAttr, annotate, Attribute, attributeQuery, circle, cmds, createNode, delete, \
@@ -17,6 +18,7 @@ from .... import core
 from .... import lib
 
 from .. import ui
+from ._build_util import CONTROL_TYPE_NAME
 
 try:  # Py3 anticipation
     xrange  # noqa
@@ -35,6 +37,18 @@ log = logging.getLogger(__name__)
 if 'global_scale' not in globals():
     global_scale = 1.0
 
+if '_switcherPlugs' not in globals():
+    _switcherPlugs = {}  # Controller long name: switch plug, or '' if it doesn't have one, see `getSwitcherPlug()`
+
+if '_shapeTemplates' not in globals():
+    _shapeTemplates = {}  # (main group uuid, shape, size, align): template transform, see `getShapeTemplate()`
+
+if '_surfaceShapes' not in globals():
+    _surfaceShapes = set()  # Shapes with surfaces, which are never instanced, see `getShapeTemplate()`
+
+
+TEMPLATE_GROUP = 'controlShapeTemplates'
+
 
 # This isn't really used, but it could be.  As of 2019, most (mabye all?) game engines don't respect rotate order anyway.
 ROTATE_ORDER = ['xyz', 'yzx', 'zxy', 'xzy', 'yxz', 'zyx']
@@ -82,12 +96,16 @@ def listShapes():
     return sorted( list(SHAPES.keys()) )
 
 
-def build(name, spec, type=''):
+def build(name, spec, type='', instanced=False):
     '''
     Note: visGroup is a setting that is applied in the defaultspec decorator
         AFTER the control has been fully created.  This allows the ik/fk
         switcher to control vis directly and connect the visGroup to the
         parent <*>_space group.
+    
+    :param bool instanced: If True, the control instances the shapes of a
+        template shared by all controls with the same spec, see `buildInstanced()`.
+        Shapes with surfaces are always unique so each control has its own `display`.
     '''
     global SHAPES
     
@@ -104,7 +122,12 @@ def build(name, spec, type=''):
     # Default to the sphere.
     if settings['shape'] not in SHAPES:
         settings['shape'] = 'sphere'
-        
+    
+    if instanced:
+        ctrl = buildInstanced(name, settings, type)
+        if ctrl:
+            return ctrl
+    
     shapeConsturctor = SHAPES[ settings['shape'] ]
 
     ctrl = shapeConsturctor( name, settings['size'] * global_scale, settings['color'], type=type, align=settings['align'] )
@@ -122,6 +145,198 @@ def build(name, spec, type=''):
     return ctrl
 
 
+def getShapeTemplate(settings):
+    '''
+    Returns the hidden transform holding the shapes built from the settings,
+    making it if needed.  The shapes are instanced by `buildInstanced()`.
+    
+    Returns None for shapes with surfaces since the `display` attr has to
+    drive each control's shapes separately.
+    '''
+    if settings['shape'] in _surfaceShapes:
+        return None
+    
+    main = lib.getNodes.mainGroup()
+    
+    size = settings['size'] * global_scale
+    key = (cmds.ls(main.name(), uuid=True)[0], settings['shape'], size, settings['align'])
+    
+    template = _shapeTemplates.get(key)
+    if template and cmds.objExists(template):
+        return PyNode(template)
+    
+    group = main.listRelatives(type='transform')
+    group = [g for g in group if g.name().rsplit('|', 1)[-1] == TEMPLATE_GROUP]
+    if group:
+        group = group[0]
+    else:
+        group = PyNode( cmds.group(em=True, n=TEMPLATE_GROUP, p=main.longName()) )
+        group.visibility.set(False)
+        core.dagObj.lockAll(group)
+    
+    shapeConsturctor = SHAPES[ settings['shape'] ]
+    template = shapeConsturctor( settings['shape'] + '_template', size, settings['color'], align=settings['align'] )
+    if ls( core.shape.getShapes(template), type='nurbsSurface' ):
+        delete(template)
+        _surfaceShapes.add( settings['shape'] )
+        return None
+    
+    template.deleteAttr( CONTROL_TYPE_NAME )  # So it isn't mistaken for a controller
+    addAttr( template, ln='shapeType', dt='string' )
+    template.shapeType.set( settings['shape'] )
+    template.setParent(group)
+    
+    # Curve colors are set on the instancing transforms so they can differ
+    for shape in core.shape.getShapes(template):
+        shape.overrideEnabled.set(False)
+    
+    _shapeTemplates[key] = template.longName()
+    return template
+
+
+def buildInstanced(name, settings, type=''):
+    '''
+    Makes a control whose shapes are instances of the template for the
+    settings, so a long chain only has one set of shapes instead of one per
+    control.  Returns None if the shape can't be instanced, see `getShapeTemplate()`.
+    
+    Surface shaders are assigned per instance.  Curve colors are drawing
+    overrides on the control itself, which is enabled (with the default color)
+    so parent controls' colors don't carry down.
+    Editing the cvs of one control, via `applyShapeInfo()` or `makeUnique()`,
+    gives it its own shapes.
+    '''
+    template = getShapeTemplate(settings)
+    if not template:
+        return None
+    
+    ctrl = PyNode( cmds.createNode('transform', n=name) )
+    
+    for shape in core.shape.getShapes(template):
+        cmds.parent( shape.longName(), ctrl.longName(), add=True, shape=True )
+    
+    ctrl.addAttr( CONTROL_TYPE_NAME, dt='string' )
+    ctrl.attr( CONTROL_TYPE_NAME ).set( type )
+    addAttr( ctrl, ln='shapeType', dt='string' )
+    ctrl.shapeType.set( settings['shape'] )
+    
+    core.shader.assign(ctrl, settings['color'])
+    ctrl.overrideEnabled.set(True)
+    
+    ctrl.visibility.setKeyable(False)
+    
+    ctrl.rotateOrder.set( ROTATE_ORDER.index(settings['rotOrder']) )
+    
+    if lib.sharedShape.get():
+        lib.sharedShape.use( ctrl )
+    return ctrl
+
+
+def isInstanced(obj):
+    '''
+    Returns True if any of the obj's nurbs shapes are shared with other transforms.
+    '''
+    for shape in core.shape.getShapes(obj):
+        if len( cmds.listRelatives(shape.longName(), ap=True) or [] ) > 1:
+            return True
+    return False
+
+
+def makeUnique(obj):
+    '''
+    Replaces the instanced shapes of the obj with copies of its own.
+    '''
+    if not isInstanced(obj):
+        return
+    
+    color = getShader(obj)
+    curveColor = obj.overrideColor.get() if obj.overrideEnabled.get() else None
+    
+    temp = PyNode( cmds.createNode('transform') )
+    for shape in core.shape.getShapes(obj):
+        cmds.parent( shape.longName(), temp.longName(), add=True, shape=True )
+        cmds.parent( shape.longName(), rm=True, shape=True )
+    
+    dup = duplicate(temp)[0]
+    for shape in core.shape.getShapes(dup):
+        shape.setParent( obj, s=True, r=True )
+    delete(temp, dup)
+    
+    obj.overrideEnabled.set(False)
+    
+    if lib.sharedShape.find(obj):
+        lib.sharedShape.remove(obj)
+        lib.sharedShape.use(obj)
+    
+    if color:
+        core.shader.assign(obj, color)
+    if curveColor:
+        setCurveColor(obj, curveColor)
+    addDisplayAttr(obj)
+
+
+def _deleteShapes(obj):
+    '''
+    Deletes the obj's shapes, only removing the instances of shared ones.
+    '''
+    for shape in core.shape.getShapes(obj):
+        if len( cmds.listRelatives(shape.longName(), ap=True) or [] ) > 1:
+            cmds.parent( shape.longName(), rm=True, shape=True )
+        else:
+            delete(shape)
+
+
+def clearShapeTemplates():
+    '''
+    Forgets the shape templates, the nodes are left alone.
+    '''
+    _shapeTemplates.clear()
+    _surfaceShapes.clear()
+
+
+def compareInstancing(count=60, spec={}, folder=None):
+    '''
+    Builds `count` controls both normally and instanced, returning a dict of
+    {'unique': stats, 'instanced': stats} where stats has:
+        'nodes': The number of nodes made
+        'fileSize': Bytes of the controls exported to a .ma
+        'loadTime': Seconds to import that file
+        'memory': Change in maya's reported memory, in MB, during the build
+    
+    Everything made is deleted afterward, the current scene is left intact.
+    '''
+    folder = folder or tempfile.mkdtemp(prefix='fossil_shapes_')
+    
+    results = {}
+    for mode in ('unique', 'instanced'):
+        before = set( cmds.ls(l=True) )
+        memory = cmds.memory(heapMemory=True, megaByte=True)
+        
+        controls = [ build('compare_{}_{}'.format(mode, i), spec, instanced=(mode == 'instanced')) for i in xrange(count) ]
+        
+        stats = {'memory': cmds.memory(heapMemory=True, megaByte=True) - memory}
+        made = [ n for n in cmds.ls(l=True) if n not in before ]
+        stats['nodes'] = len(made)
+        
+        filename = os.path.join(folder, mode + '.ma')
+        select(controls)
+        cmds.file( filename, exportSelected=True, type='mayaAscii', force=True, preserveReferences=False, channels=False,
+            constructionHistory=False, constraints=False, expressions=False, shader=True )
+        stats['fileSize'] = os.path.getsize(filename)
+        
+        delete( [n for n in made if cmds.objExists(n)] )
+        
+        start = time.time()
+        cmds.file( filename, i=True, namespace='compare_' + mode )
+        stats['loadTime'] = time.time() - start
+        cmds.namespace( removeNamespace='compare_' + mode, deleteNamespaceContent=True )
+        
+        results[mode] = stats
+    
+    clearShapeTemplates()
+    return results
+
+
 # &&& RENAME this to addIkFkSwitch
 def ikFkSwitch(name, ikRigController, ikPlugs, fkRigController, fkPlugs):
     '''
@@ -185,6 +400,57 @@ def getSwitcherPlug(obj):
     Will return either a string like "Arm_L_FKIK_SWITCH" or empty string if no
     switcher is found.
     
+    Results are kept in a registry, by long name since referencing the same
+    rig twice repeats uuids, which is filled for every switcher in the scene at
+    once whenever an unknown controller is asked for.
+    '''
+    path = cmds.ls( str(obj), l=True )
+    if not path:
+        return ''
+    path = path[0]
+    
+    plug = _switcherPlugs.get(path)
+    if plug is None or (plug and not cmds.objExists(plug)):
+        _scanSwitcherPlugs()
+        plug = _switcherPlugs.get(path)
+        if plug is None:
+            plug = _switcherPlugs[path] = _findSwitcherPlug(obj)
+    
+    return plug
+
+
+def clearSwitcherRegistry():
+    '''
+    Forget all the switcher plugs, like after building a rig.
+    '''
+    _switcherPlugs.clear()
+
+
+def _scanSwitcherPlugs():
+    '''
+    Registers the switch plug of every controller with a switcher shape.
+    '''
+    found = {}
+    # Old style first so new style wins, matching `_findSwitcherPlug`
+    for shape in cmds.ls( '*.kinematicSwitch', r=True, o=True, type='nurbsCurve', l=True ) or []:
+        attr = cmds.listAttr(shape, ud=1, st='*_Switch')
+        if attr:
+            plug = cmds.ls(shape, l=False)[0] + '.' + attr[0]
+            for transform in cmds.listRelatives(shape, ap=True, f=True) or []:
+                found[transform] = plug
+    
+    for shape in cmds.ls( '*.IkSwitch', r=True, o=True, type='nurbsCurve', l=True ) or []:
+        shortShape = shape.rsplit('|', 1)[-1]
+        for transform in cmds.listRelatives(shape, ap=True, f=True) or []:
+            found[transform] = transform + '|' + shortShape + '.IkSwitch'
+    
+    _switcherPlugs.update(found)
+
+
+def _findSwitcherPlug(obj):
+    '''
+    Searches the shapes of the given object for a switch plug.
+    
     Can't use pymel to avoid warnings of invalid node (nurbs with no cvs).
     This also means listRelatives returns None instead of []. Lame.
     '''
@@ -288,6 +554,7 @@ def scaleAllCVs(obj, scaleFactor=1.0, space='object'):
     '''
     Handles the annoying-ness of scaling the cvs of a multishape obj
     '''
+    makeUnique(obj)  # Otherwise every control sharing the template scales too
     
     if isinstance(scaleFactor, numbers.Number):
         scaleFactor = [scaleFactor] * 3  # Must provide all axes.
@@ -328,7 +595,7 @@ def setShape(obj, newShapeName):
     if not color:
         color = (.5, .5, .5, .5)
        
-    delete( core.shape.getShapes(obj) )
+    _deleteShapes(obj)
 
     temp = shapeConsturctor( 'TEMP', size, color )
 
@@ -415,8 +682,11 @@ def getShapeInfo(controller):
     
     extraInfo = {'color': getShader(controller)}
     
-    for shape in core.shape.getShapes(controller):
-        extraInfo['curveColor'] = shape.overrideColor.get()
+    if isInstanced(controller):
+        extraInfo['curveColor'] = controller.overrideColor.get()
+    else:
+        for shape in core.shape.getShapes(controller):
+            extraInfo['curveColor'] = shape.overrideColor.get()
     
     if controller.hasAttr( 'shapeType' ):
         extraInfo['shapeType'] = controller.shapeType.get()
@@ -511,6 +781,9 @@ def applyShapeInfo(obj, info, space):
     if curveColor:
         setCurveColor(obj, curveColor)
 
+    if isInstanced(obj) and _shapesDiffer(obj, info, space):
+        makeUnique(obj)
+
     for shape in core.shape.getShapes(obj):
         # build up matches by type and cv count
         
@@ -527,6 +800,25 @@ def applyShapeInfo(obj, info, space):
                     xform( cv, ws=True, t=pos )
 
 
+def _shapesDiffer(obj, info, space, tolerance=0.0001):
+    '''
+    Returns True if the cvs stored in `info` (from `getShapeInfo()`) don't
+    match the obj's current shapes.
+    '''
+    flags = {'os': True} if space == 'os' else {'ws': True}
+    for shape in core.shape.getShapes(obj):
+        cvCount = shape.numCVs() if shape.type() == 'nurbsCurve' else shape.numCVsInU() * shape.numCVsInV()
+        key = '{}.{}|{}'.format(shape.type(), cvCount, space)
+        if key not in info:
+            continue
+        
+        current = cmds.xform( shape.longName() + '.cv[*]', q=True, t=True, **flags )
+        points = [v for pos in info[key] for v in pos]
+        if len(current) != len(points) or any( abs(a - b) > tolerance for a, b in zip(current, points) ):
+            return True
+    return False
+
+
 def loadControlShapes(rigControl, lines, useObjectSpace=True):
     '''
     Given a `RigControl` and a list of lines (via .split() or file id), parse
@@ -606,6 +898,7 @@ def loadControlShapes(rigControl, lines, useObjectSpace=True):
             points = eval(points)
             
             if ctrl in controls:
+                makeUnique(controls[ctrl])
                 for shape in core.shape.getShapes(controls[ctrl]):
                     if shape.type() == shapeType and len(shape.cv) == len(points) and useObjectSpace and objectSpace:
                         for cv, pos in zip(shape.cv, points):
@@ -620,13 +913,19 @@ def setCurveColor(ctrl, newColor):
     newColor can an indexed color or you can specify RGB.
     
     NOTE!!! RGB is NOT currently saved.
-    '''
     
-    curves = [c for c in cmds.listRelatives(ctrl.name(), type='nurbsCurve', f=True) if core.shape.isValidNurbsCurve(c)]
+    Instanced controls (see `buildInstanced()`) get the color on the transform
+    since their shapes are shared.
+    '''
     
-    surfaces = cmds.listRelatives(ctrl.name(), type='nurbsSurface', f=True)
-    if surfaces:
-        curves += surfaces
+    if isInstanced(ctrl):
+        curves = [ctrl.name()]
+    else:
+        curves = [c for c in cmds.listRelatives(ctrl.name(), type='nurbsCurve', f=True) if core.shape.isValidNurbsCurve(c)]
+        
+        surfaces = cmds.listRelatives(ctrl.name(), type='nurbsSurface', f=True)
+        if surfaces:
+            curves += surfaces
 
     for shape in curves:
         try:
@@ -653,7 +952,7 @@ def copyShape(source, dest, mirror=False):
     source = duplicate(source)[0]
     
     color = getShader( dest )
-    delete( core.shape.getShapes(dest) )
+    _deleteShapes(dest)
 
     hasSharedShape = False
     if lib.sharedShape.find(dest):
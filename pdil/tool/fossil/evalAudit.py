@@ -0,0 +1,202 @@
+'''
+Finds what in a built rig keeps the Evaluation Manager from running in parallel.
+
+Each built component (see `rigCost.gatherComponents`) is checked for:
+    * Nodes whose type the evaluation manager serializes or doesn't trust,
+      like expressions.
+    * Cycle clusters, which evaluate serially, ex. from space networks.
+    * scriptJobs watching the component's nodes.
+
+The scene's playback is also timed in parallel, serial and DG mode so the
+findings can be weighed against the actual difference.
+
+Ex:
+    print( evalAudit.report() )
+'''
+from __future__ import print_function, absolute_import
+
+import collections
+import re
+
+from pymel.core import cmds
+
+from ... import core
+
+from . import rigCost
+
+
+# A problem preventing parallel evaluation.  kind is 'cycle', 'scheduling' or 'scriptJob'
+Finding = collections.namedtuple( 'Finding', 'kind node detail' )
+
+
+# Types the evaluation manager always runs serially, regardless of its overrides.
+ALWAYS_SERIAL = {
+    'expression': 'GloballySerial',
+}
+
+_schedulingFlags = [
+    ('nodeTypeSerialize', 'Serial'),
+    ('nodeTypeGloballySerialize', 'GloballySerial'),
+    ('nodeTypeUntrusted', 'Untrusted'),
+]
+
+
+def schedulingOverrides():
+    '''
+    Returns {node type: scheduling} for all the node types the evaluation
+    manager doesn't run in parallel.
+    '''
+    overrides = dict(ALWAYS_SERIAL)
+    for flag, scheduling in _schedulingFlags:
+        try:
+            nodeTypes = cmds.evaluationManager( q=True, **{flag: True} ) or []
+        except (RuntimeError, TypeError):
+            continue  # Not supported in this version
+
+        for nodeType in nodeTypes:
+            overrides[nodeType] = scheduling
+
+    return overrides
+
+
+def buildGraph():
+    '''
+    Switches to parallel mode and forces the evaluation graph to be rebuilt,
+    returning the mode the evaluation manager ended up in (it can refuse).
+    '''
+    cmds.evaluationManager(mode='parallel')
+    cmds.evaluationManager(invalidate=True)
+    cmds.currentTime( cmds.currentTime(q=True), update=True )
+    return cmds.evaluationManager(q=True, mode=True)[0]
+
+
+def cycleClusters(nodes):
+    '''
+    Returns a list of the cycle clusters (lists of node names) the nodes
+    belong to, requires `buildGraph()` first.
+    '''
+    seen = set()
+    clusters = []
+    for node in nodes:
+        if node in seen:
+            continue
+
+        try:
+            cluster = cmds.evaluationManager( q=True, cycleCluster=node ) or []
+        except RuntimeError:
+            cluster = []
+
+        if len(cluster) > 1:
+            cluster = cmds.ls(cluster, l=True) or cluster
+            seen.update(cluster)
+            clusters.append(cluster)
+
+    return clusters
+
+
+def scriptJobs():
+    '''
+    Returns the text of every scriptJob, as listed by Maya.
+    '''
+    return cmds.scriptJob(listJobs=True) or []
+
+
+def _mentions(jobs, nodes):
+    '''
+    Returns [(node, job)] of the scriptJobs that refer to any of the nodes.
+    '''
+    found = []
+    for node in nodes:
+        name = node.rsplit('|', 1)[-1]
+        pattern = re.compile( r'(?<![\w:|])' + re.escape(name) + r'(?![\w])' )
+        for job in jobs:
+            if pattern.search(job):
+                found.append( (node, job) )
+    return found
+
+
+def auditComponents(components):
+    '''
+    Returns a list of [Finding] for each of the given `rigCost.Component`s,
+    requires `buildGraph()` first.
+    '''
+    overrides = schedulingOverrides()
+    jobs = scriptJobs()
+
+    owners = {}  # Long node name: component index
+    for i, component in enumerate(components):
+        for node in cmds.ls(component.nodes, l=True) or []:
+            owners.setdefault(node, i)
+
+    findings = [ [] for _ in components ]
+
+    for i, component in enumerate(components):
+        for node in component.nodes:
+            nodeType = cmds.nodeType(node)
+            if nodeType in overrides:
+                findings[i].append( Finding('scheduling', node, '{0} is {1}'.format(nodeType, overrides[nodeType])) )
+
+        for node, job in _mentions(jobs, component.nodes):
+            findings[i].append( Finding('scriptJob', node, job.strip()) )
+
+    for cluster in cycleClusters( list(owners) ):
+        involved = collections.OrderedDict()
+        for node in cluster:
+            if node in owners:
+                involved.setdefault( owners[node], [] ).append(node)
+
+        detail = 'cycle of {0} nodes across {1}'.format( len(cluster), ', '.join(str(components[i].card) for i in involved) )
+        for i, nodes in involved.items():
+            findings[i].append( Finding('cycle', nodes[0], detail) )
+
+    return findings
+
+
+def audit(cards=None, timing=True, start=None, end=None):
+    '''
+    Returns a dict of:
+        'mode': The evaluation manager's mode after trying parallel
+        'parallelFps', 'serialFps', 'dgFps': Playback speeds (None if not `timing`)
+        'components': [(Component, [Finding])], only those with findings, most first.
+    '''
+    result = {'parallelFps': None, 'serialFps': None, 'dgFps': None}
+
+    with core.time.EvaluationMode('parallel'):
+        result['mode'] = buildGraph()
+        components = rigCost.gatherComponents(cards)
+        findings = auditComponents(components)
+
+        if timing:
+            result['parallelFps'] = core.time.playbackFps(start, end)
+
+    if timing:
+        with core.time.EvaluationMode('serial'):
+            result['serialFps'] = core.time.playbackFps(start, end)
+
+        with core.time.EvaluationMode('off'):
+            result['dgFps'] = core.time.playbackFps(start, end)
+
+    result['components'] = sorted( [ (c, f) for c, f in zip(components, findings) if f ], key=lambda item: len(item[1]), reverse=True )
+
+    return result
+
+
+def report(cards=None, timing=True, start=None, end=None):
+    '''
+    Returns a human readable version of `audit()`.
+    '''
+    info = audit(cards, timing, start, end)
+
+    lines = ['Evaluation mode: ' + info['mode']]
+    if timing:
+        lines.append( 'Parallel {0:.1f} fps, Serial {1:.1f} fps, DG {2:.1f} fps'.format(info['parallelFps'], info['serialFps'], info['dgFps']) )
+
+    if not info['components']:
+        lines.append('Nothing found preventing parallel evaluation.')
+
+    for component, findings in info['components']:
+        lines.append( '{0} {1} {2}:'.format(component.card, component.side, component.type) )
+        for finding in findings:
+            lines.append( '    {0:<10} {1}: {2}'.format(finding.kind, finding.node, finding.detail) )
+
+    return '\n'.join(lines)
@@ -0,0 +1,205 @@
+'''
+Closed form ik matching across many frames at once.
+
+Everything a match reads is sampled for all the frames up front, without
+changing the current time, then solved for every frame in one call.  The
+result is a list of world space moves per frame, which just need applying
+(and keying) so range switches don't query and rebuild the chain each frame.
+
+Ex:
+    moves = ikMatch.solve( kinematicSwitch.getSwitchPlan(ctrl), [1, 2, 3] )
+    ikMatch.apply( moves[2] )
+'''
+from __future__ import print_function, absolute_import
+
+import math
+
+from maya.api import OpenMaya
+from pymel.core import cmds, upAxis, xform
+
+
+def sampleMatrices(nodes, times):
+    '''
+    Returns {node name: [MMatrix, ...]} of each node's world matrix at every time.
+    '''
+    result = {}
+    for node in set( str(n) for n in nodes ):
+        plug = node + '.worldMatrix[0]'
+        result[node] = [ OpenMaya.MMatrix( cmds.getAttr(plug, time=t) ) for t in times ]
+    return result
+
+
+def sampleValues(plugs, times):
+    '''
+    Returns {plug name: [value, ...]} of each plug at every time.
+    '''
+    return { str(plug): [ cmds.getAttr(str(plug), time=t) for t in times ] for plug in plugs }
+
+
+def position(matrix):
+    return OpenMaya.MVector( matrix[12], matrix[13], matrix[14] )
+
+
+def rotation(matrix, rotateOrder=0):
+    '''
+    Returns the rotation of the matrix as euler degrees in the given rotate order.
+    '''
+    euler = OpenMaya.MTransformationMatrix(matrix).rotation().reorder(rotateOrder)
+    return [ math.degrees(euler.x), math.degrees(euler.y), math.degrees(euler.z) ]
+
+
+def solvePoleVectors(starts, mids, ends, lengths):
+    '''
+    Returns the pole vector position for a 3 joint chain on each frame,
+    placed `lengths` away from the mid joint, away from where the mid joint
+    would be if the chain were straight.
+    '''
+    results = []
+    for startPos, midPos, endPos, length in zip(starts, mids, ends, lengths):
+        a = ( midPos - startPos ).length()
+        b = ( endPos - midPos ).length()
+        midPoint = startPos + ( (endPos - startPos) * (a / (a + b)) )
+
+        pvDir = ( midPos - midPoint ).normal()
+        results.append( midPos + pvDir * length )
+
+    return results
+
+
+def solveOutVectors(starts, mids, ends):
+    '''
+    Frame by frame version of `rigging._util.calcOutVector`, the direction
+    pointing away from the mid joint along the xz plane.
+    '''
+    yUp = upAxis(q=True, ax=True) == 'y'
+
+    results = []
+    for s, m, e in zip(starts, mids, ends):
+        up = s - e
+        if yUp:
+            kneeScale = ( m.y - e.y ) / up.y if up.y else 0.0
+        else:
+            kneeScale = ( m.z - e.z ) / up.z if up.z else 0.0
+
+        results.append( ( m - (up * kneeScale + e) ).normal() )
+
+    return results
+
+
+def apply(moves):
+    '''
+    Performs the (ctrl, translation, rotation) moves of a frame, either of the
+    transforms can be None.
+    '''
+    for ctrl, trans, rot in moves:
+        if trans is not None:
+            xform( ctrl, ws=True, t=list(trans) )
+        if rot is not None:
+            xform( ctrl, ws=True, ro=rot )
+
+
+def _matcher(ctrl):
+    matchers = ctrl.matcher.listConnections() if ctrl.hasAttr('matcher') else []
+    return matchers[0] if matchers else None
+
+
+def _alignMoves(ctrls, times):
+    '''
+    Moves for aligning controls to their matchers, like `ActivateIkDispatch.alignToMatcher`.
+    '''
+    pairs = [ (ctrl, _matcher(ctrl)) for ctrl in ctrls ]
+    pairs = [ (ctrl, matcher) for ctrl, matcher in pairs if matcher ]
+
+    matrices = sampleMatrices( [matcher for ctrl, matcher in pairs], times )
+
+    moves = [ [] for t in times ]
+    for ctrl, matcher in pairs:
+        order = ctrl.rotateOrder.get()
+        for frameMoves, m in zip(moves, matrices[str(matcher)]):
+            frameMoves.append( (ctrl, position(m), rotation(m, order)) )
+
+    return moves
+
+
+def solve(plan, times):
+    '''
+    Returns {time: [moves]} that match the ik controls of the `SwitchPlan` to
+    the bound joints at each of the times.
+
+    Dog legs still need their bend solving per frame after the moves.
+    '''
+    solver = _solvers[plan.kind]
+    return dict( zip(times, solver(plan, times)) )
+
+
+def _solveIkChain(plan, times):
+    ikCtrl = plan.control
+
+    # The ik control's orientation relative to the joint it drives is fixed.
+    offset = OpenMaya.MMatrix( cmds.getAttr(ikCtrl.name() + '.worldMatrix[0]') ) \
+        * OpenMaya.MMatrix( cmds.getAttr(plan.ikEndJoint.name() + '.worldInverseMatrix[0]') )
+
+    matrices = sampleMatrices( [plan.startJnt, plan.midJnt, plan.endJnt], times )
+    starts = [ position(m) for m in matrices[str(plan.startJnt)] ]
+    mids = [ position(m) for m in matrices[str(plan.midJnt)] ]
+    ends = [ position(m) for m in matrices[str(plan.endJnt)] ]
+
+    # Same as rig.chainLength
+    tx = sampleValues( [plan.midJnt.tx, plan.endJnt.tx], times )
+    lengths = [ abs(a + b) for a, b in zip(tx[str(plan.midJnt.tx)], tx[str(plan.endJnt.tx)]) ]
+
+    pvs = solvePoleVectors(starts, mids, ends, lengths)
+
+    order = ikCtrl.rotateOrder.get()
+    return [
+        [
+            (plan.socket, start, None),
+            (ikCtrl, end, rotation(offset * endMatrix, order)),
+            (plan.pv, pv, None),  # After the ik control in case the pv is spaced to it
+        ]
+        for start, end, endMatrix, pv in zip(starts, ends, matrices[str(plan.endJnt)], pvs)
+    ]
+
+
+def _solveDogleg(plan, times):
+    bound = plan.bound
+    moves = _alignMoves( [plan.control], times )
+
+    matrices = sampleMatrices( [bound[0], bound[1], bound[-2]], times )
+    starts = [ position(m) for m in matrices[str(bound[0])] ]
+    mids = [ position(m) for m in matrices[str(bound[1])] ]
+    ends = [ position(m) for m in matrices[str(bound[-2])] ]
+
+    tx = sampleValues( [b.tx for b in bound[1:]], times )
+    lengths = [ abs(sum(values)) for values in zip( *[tx[str(b.tx)] for b in bound[1:]] ) ]
+
+    for frameMoves, out, mid, length in zip(moves, solveOutVectors(starts, mids, ends), mids, lengths):
+        frameMoves.append( (plan.pv, mid + out * length, None) )
+
+    return moves
+
+
+def _solveSplineChest(plan, times):
+    moves = _alignMoves( [plan.control], times )
+
+    # Matches the odd/even choice in `ActivateIkDispatch.active_splineChest`
+    boundJoints = plan.boundJoints
+    i = int(len(boundJoints) / 2) + (len(boundJoints) % 2)
+
+    for frameMoves, m in zip(moves, sampleMatrices([boundJoints[i]], times)[str(boundJoints[i])]):
+        frameMoves.append( (plan.mid, position(m), None) )
+
+    return moves
+
+
+def _solveSplineNeck(plan, times):
+    ctrl = plan.control
+    return _alignMoves( [ctrl, ctrl.subControl['mid'], ctrl.subControl['start']], times )
+
+
+_solvers = {
+    'ikChain': _solveIkChain,
+    'dogleg': _solveDogleg,
+    'splineChest': _solveSplineChest,
+    'splineNeck': _solveSplineNeck,
+}
@@ -1,21 +1,29 @@
 from __future__ import print_function, absolute_import
 
+import collections
 from functools import partial
 import logging
 import math
 
-from pymel.core import dt, delete, keyframe, PyNode, xform, currentTime, setKeyframe, warning, setAttr, refresh, orientConstraint, listConnections, group
+from maya.api import OpenMaya
+from pymel.core import dt, delete, PyNode, xform, currentTime, setKeyframe, warning, setAttr, refresh, orientConstraint, listConnections, group
 
 from ... import core
+from ... import lib
 
 from ...nodeApi import fossilNodes
 
 from . import controllerShape
+from . import ikMatch
 from . import rig
 
 
 switch_logger = logging.getLogger('IK_FK_Switch')
 
+if '_switchPlans' not in globals():
+    _switchPlans = {}  # Main controller MObjectHandle hashCode: (MObjectHandle, SwitchPlan)
+    _switchPlanSceneCallbacks = []
+
 
 def _getSwitchPlug(obj):  # WTF IS THIS??
     '''
@@ -81,30 +89,14 @@ def angleBetween( a, mid, c ):
         return 0, axis
 
 
-def ikFkRange(control, start=None, end=None):
-    action = activateIk if control.fossilCtrlType.get() in ['ik'] else activateFk
+# One limb's worth of switching, so several can be processed together.
+#   times: The frames to switch on, None means switch immediately without keys.
+#   match: Function that performs the switch at the current frame.
+#   keyTargets: What to key after matching, empty if nothing should be keyed.
+LimbSwitch = collections.namedtuple( 'LimbSwitch', 'times match keyTargets' )
 
-    otherObj = control.getOtherMotionType()
-    
-    drivePlug = controllerShape.getSwitcherPlug(control)
-    if drivePlug:
-        driver = lambda: setAttr(drivePlug, 1)  # noqa E731
-    else:
-        if control.fossilCtrlType.get() in ['ik']:
-            switch = _getSwitchPlug(otherObj)[0].node()
-            plug = switch.input1D.listConnections(p=True)[0]
-            driver = lambda: plug.set(1)  # noqa E731
-        else:
-            switch = _getSwitchPlug(control)[0].node()
-            plug = switch.input1D.listConnections(p=True)[0]
-            driver = lambda: plug.set(1)  # noqa E731
 
-    controls = [ ctrl for name, ctrl in otherObj.subControl.items() ] + [otherObj]
-    times = set()
-    
-    for c in controls:
-        times.update( keyframe(c, q=True, tc=True) )
-    
+def _filterTimes(times, start, end):
     finalRange = []
     for t in sorted(times):
         if start is not None and t < start:
@@ -113,40 +105,231 @@ def ikFkRange(control, start=None, end=None):
             continue
             
         finalRange.append(t)
+    return finalRange
+
+
+def _skipTwists(jnt):
+    while rig.getBPJoint(jnt).info.get('twist'):
+        jnt = jnt.getParent()
+    return jnt
+
+
+class SwitchPlan(object):
+    '''
+    Everything needed to switch a limb into `control`'s kinematic mode (joints,
+    pole vector/socket controls, switch plugs), resolved once so single, range
+    and batch switching don't rediscover the rig each time.
+
+    Use `getSwitchPlan()`, which caches them and rebuilds them when the rig is.
+    '''
+
+    def __init__(self, control):
+        self.control = control
+        self.other = control.getOtherMotionType()
+
+        self.controls = [ ctrl for name, ctrl in control.subControl.items() ] + [control]
+        self.otherControls = [ ctrl for name, ctrl in self.other.subControl.items() ] + [self.other] if self.other else []
+
+        self.switcherPlug = controllerShape.getSwitcherPlug(control)
+
+        self._nodes = self.controls + self.otherControls
+
+        if control.fossilCtrlType.get() in ['ik']:
+            self._resolveIk()
+        else:
+            self._resolveFk()
+
+        self._rangeDriver = None
+
+    @property
+    def rangeDriver(self):
+        '''
+        The plug set to 1 before matching each frame of a range switch.
+        '''
+        if not self._rangeDriver:
+            self._rangeDriver = self.switcherPlug
+            # Old style rigs without a switcher plug are driven through the switch node
+            if not self._rangeDriver:
+                fkCtrl = self.other if self.kind != 'fk' else self.control
+                switch = _getSwitchPlug(fkCtrl)[0].node()
+                self._rangeDriver = switch.input1D.listConnections(p=True)[0]
         
-    targetControls = [ctrl for name, ctrl in control.subControl.items()] + [control]
+        return self._rangeDriver
+
+    def _resolveFk(self):
+        self.kind = 'fk'
+
+        ctrls = sorted( (int(name), ctrl) for name, ctrl in self.control.subControl.items() )
+        ctrls = [self.control] + [ ctrl for name, ctrl in ctrls ]
+
+        self.fkTargets = [ (ctrl, core.constraints.getOrientConstrainee(ctrl)) for ctrl in ctrls ]
+        self._nodes += [ target for ctrl, target in self.fkTargets ]
+
+        switchPlug = _getSwitchPlug(self.control)
+        self.fkDriver = switchPlug[0].node().listConnections(p=1, s=True, d=0)[0] if switchPlug else None
+
+    def _resolveIk(self):
+        control = self.control
+        rigCommand = control.card.rigCommand
+
+        if rigCommand == 'DogHindleg':
+            self.kind = 'dogleg'
+
+            for ik in control.listRelatives(type='ikHandle'):
+                if not ik.name().count( 'mainIk' ):
+                    break
+            else:
+                raise Exception('Unable to determin IK handle on {0} to match'.format(control))
+
+            # Get the last ik chunk but expand it to include the rest of the limb joints
+            self.chain = getChainFromIk(ik)
+            self.chain.insert( 0, self.chain[0].getParent() )
+            self.chain.insert( 0, self.chain[0].getParent() )
+            self.bound = getConstraineeChain(self.chain)
+            self.pv = control.subControl['pv']
+            self._nodes += self.chain + self.bound
+
+        elif rigCommand in ['SplineChest', 'SplineChestV2']:
+            self.kind = 'splineChest'
+
+            self.mid = control.subControl['mid']
+            midJnt = self.mid.listRelatives(type='joint')[0]
+
+            skin = listConnections(midJnt, type='skinCluster')
+            curveShape = skin[0].outputGeometry[0].listConnections(p=True)[0].node()
+            ikHandle = curveShape.worldSpace.listConnections( type='ikHandle' )[0]
+
+            self.boundJoints = getConstraineeChain( getChainFromIk(ikHandle) )
+            self._nodes += self.boundJoints
+
+        elif rigCommand == 'SplineNeck':
+            self.kind = 'splineNeck'
+
+        else:
+            self.kind = 'ikChain'
+
+            ik = control.listRelatives(type='ikHandle')
+            assert ik, "Could not determine ik handle for {0}".format( control )
+            ik = ik[0]
+            try:
+                self.ikEndJoint = ik.endEffector.listConnections()[0].tx.listConnections()[0]
+            except Exception:
+                raise Exception( 'End joint of ikHandle {0} could not be determined, unable to active_ikChain()'.format(ik) )
+
+            # Figure out what is constrained to the ik and match to it
+            self.endJnt = core.constraints.getOrientConstrainee( self.ikEndJoint )
+            self.midJnt = _skipTwists( self.endJnt.getParent() )
+            self.startJnt = _skipTwists( self.midJnt.getParent() )
+
+            self.pv = control.subControl['pv']
+            self.socket = control.subControl['socket']
+            self._nodes += [self.ikEndJoint, self.endJnt, self.midJnt, self.startJnt]
+
+    def isValid(self):
+        return all( node.exists() for node in self._nodes if node is not None )
+
+
+def getSwitchPlan(control):
+    '''
+    Returns the cached `SwitchPlan` for switching to the given controller,
+    making it if needed.  Plans are keyed by the main controller's node, not
+    its uuid, since referencing the same rig twice repeats uuids.  Rebuilding
+    the rig makes new controllers, invalidating the old plans.
+    '''
+    control = rig.getMainController(control)
+
+    if not _switchPlanSceneCallbacks:
+        _switchPlanSceneCallbacks.extend( [
+            OpenMaya.MSceneMessage.addCallback( OpenMaya.MSceneMessage.kBeforeNew, clearSwitchPlans ),
+            OpenMaya.MSceneMessage.addCallback( OpenMaya.MSceneMessage.kBeforeOpen, clearSwitchPlans ),
+        ] )
+
+    mobj = core.capi.asMObject(control).object()
+    key = OpenMaya.MObjectHandle(mobj).hashCode()
+
+    handle, plan = _switchPlans.get(key, (None, None))
+    if plan is not None and not (handle.isValid() and handle.object() == mobj):
+        plan = None  # A deleted controller's hash was reused
+
+    if plan is None or (key not in _SwitchPass.checked and not plan.isValid()):
+        for old, (oldHandle, oldPlan) in list(_switchPlans.items()):
+            if not oldHandle.isAlive():
+                del _switchPlans[old]
+
+        plan = SwitchPlan(control)
+        _switchPlans[key] = (OpenMaya.MObjectHandle(mobj), plan)
+
+    if _SwitchPass.depth:
+        _SwitchPass.checked.add(key)
+
+    return plan
+
+
+def clearSwitchPlans(*args):
+    _switchPlans.clear()
+    _SwitchPass.checked.clear()
+
+
+class _SwitchPass(object):
+    '''
+    Context manager for a switch, so each plan is only checked for deleted
+    nodes the first time it's used instead of every frame.
+    '''
+    depth = 0
+    checked = set()  # Plan keys already validated this pass
+
+    def __enter__(self):
+        if not _SwitchPass.depth:
+            _SwitchPass.checked.clear()
+        _SwitchPass.depth += 1
+
+    def __exit__(self, *args):
+        _SwitchPass.depth -= 1
+        if not _SwitchPass.depth:
+            _SwitchPass.checked.clear()
+
+
+def planFkRange(control, start=None, end=None):
+    '''
+    Returns a `LimbSwitch` for switching to the fk `control` over the range.
+    '''
+    action = activateIk if control.fossilCtrlType.get() in ['ik'] else activateFk
+
+    plan = getSwitchPlan(control)
+
+    driver = partial(setAttr, plan.rangeDriver, 1)
+
+    with lib.anim.getKeyTimeIndex() as keyTimes:
+        times = keyTimes.times( plan.otherControls )
     
-    with core.ui.NoUpdate():
-        for t in finalRange:
-            currentTime(t)
-            driver()
-            action(control)
-            refresh()
-            setKeyframe(targetControls, shape=False)
-            
-            if drivePlug:
-                setKeyframe( drivePlug )
+    targetControls = list(plan.controls)
+    if plan.switcherPlug:
+        targetControls.append( plan.switcherPlug )
+
+    def match():
+        driver()
+        action(control)
+
+    return LimbSwitch( _filterTimes(times, start, end), match, targetControls )
+
+
+def ikFkRange(control, start=None, end=None):
+    with _SwitchPass():
+        _runSwitches( [planFkRange(control, start, end)] )
 
 
 def activateFk( fkControl ):
-    ctrls = [ (int(name), ctrl) for name, ctrl in fkControl.subControl.items() ]
-    ctrls = sorted(ctrls)
-    ctrls = [ ctrl for name, ctrl in ctrls ]
-    ctrls.insert( 0, fkControl )
+    plan = getSwitchPlan(fkControl)
         
-    for ctrl in ctrls:
-        target = core.constraints.getOrientConstrainee( ctrl )
-
+    for ctrl, target in plan.fkTargets:
         trans = xform( target, q=True, ws=True, t=True)
         rot = xform( target, q=True, ws=True, ro=True)
         
         xform( ctrl, ws=True, t=trans)
         xform( ctrl, ws=True, ro=rot)
-
-    switchPlug = _getSwitchPlug(fkControl)
     
-    if switchPlug:
-        switchPlug[0].node().listConnections(p=1, s=True, d=0)[0].set(0)
+    if plan.fkDriver:
+        plan.fkDriver.set(0)
 
 
 def ikFkSwitch(obj, start, end):
@@ -179,8 +362,69 @@ def ikFkSwitch(obj, start, end):
 
 
 def multiSwitch(objs, start, end):
-    for obj in objs:
-        ikFkSwitch(obj, start, end)
+    '''
+    Ik/Fk switch several controls at once, ex: both arms and legs.
+    
+    The key times of all the limbs are merged so the timeline is only walked
+    once, matching every limb that needs it each frame and keying them together.
+    '''
+    limbs = []
+    with _SwitchPass():
+        # Held open so the limbs share the key times looked up while planning.
+        with lib.anim.getKeyTimeIndex():
+            for obj in objs:
+                obj = PyNode(obj)
+                
+                if isinstance(obj, fossilNodes.RigController):
+                    mainCtrl = obj
+                else:
+                    mainCtrl = obj.message.listConnections(type=fossilNodes.RigController)[0]
+                    
+                otherCtrl = mainCtrl.getOtherMotionType()
+                
+                if otherCtrl.fossilCtrlType.get() in ['translate', 'rotate']:
+                    if start == end and start is not None:
+                        limbs.append( LimbSwitch([start], partial(activateFk, otherCtrl), []) )
+                    else:
+                        limbs.append( planFkRange(otherCtrl, start, end) )
+                else:
+                    limbs.append( activateIk.plan(otherCtrl, start, end) )
+
+        _runSwitches(limbs)
+
+
+def _runSwitches(limbs):
+    '''
+    Performs the given `LimbSwitch`es in a single pass over all their frames.
+    '''
+    for limb in limbs:
+        if limb.times is None:
+            limb.match()
+
+    limbs = [ (set(limb.times), limb) for limb in limbs if limb.times ]
+    allTimes = sorted( set().union( *[times for times, limb in limbs] ) )
+
+    if not allTimes:
+        return
+
+    with core.ui.NoUpdate():
+        cur = currentTime(q=True)
+        
+        for t in allTimes:
+            currentTime(t)
+            
+            keyTargets = []
+            for times, limb in limbs:
+                if t in times:
+                    limb.match()
+                    keyTargets += limb.keyTargets
+            
+            refresh()
+            
+            if keyTargets:
+                setKeyframe(keyTargets, shape=False)
+                
+        currentTime(cur)
 
 
 class ActivateIkDispatch(object):
@@ -198,27 +442,24 @@ class ActivateIkDispatch(object):
         values, it means a single frame.
         '''
         #print('start', start, end, key)
-        ikControl = rig.getMainController(ikController)
+        with _SwitchPass():
+            _runSwitches( [self.plan(ikController, start, end, key)] )
+
+    def plan(self, ikController, start=None, end=None, key=True):
+        '''
+        Returns a `LimbSwitch` for `__call__()` or `multiSwitch()`.  Any keys
+        needed on the switcher plug to switch the range are made now.
+        '''
+        plan = getSwitchPlan(ikController)
+        ikControl = plan.control
         
         # Determine what type of switching to employ.
-        card = ikControl.card
-        
-        if card.rigCommand == 'DogHindleg':
-            switchCmd = partial(self.activate_dogleg, ikControl)
-
-        elif card.rigCommand in ['SplineChest', 'SplineChestV2']:
-            switchCmd = partial(self.active_splineChest, ikControl)
-
-        elif card.rigCommand == 'SplineNeck':
-            switchCmd = partial(self.active_splineNeck, ikControl)
-
-        else:
-            switchCmd = partial(self.active_ikChain, ikControl)
+        switchCmd = partial( getattr(self, self._kinds[plan.kind]), ikControl )
         
         print( 'Switch called on', ikController, switchCmd.func )
         
         # Get the plug that controls the kinematic mode.
-        switcherPlug = controllerShape.getSwitcherPlug(ikControl)
+        switcherPlug = plan.switcherPlug
             
         # Gather the times
         if start is not None and end is not None and start == end:
@@ -226,49 +467,48 @@ class ActivateIkDispatch(object):
         else:
             key = True # If we are range switching, we have to key everything.
             
-            fkMain = ikControl.getOtherMotionType()
-            fkControls = [ ctrl for name, ctrl in fkMain.subControl.items() ] + [fkMain]
-            times = set(keyframe(switcherPlug, q=True))
-    
-            for c in fkControls:
-                times.update( keyframe(c, q=True, tc=True) )
-                
-            finalRange = []
-            for t in sorted(times):
-                if start is not None and t < start:
-                    continue
-                if end is not None and t > end:
-                    continue
-                    
-                finalRange.append(t)
-            
-            if finalRange:  # &&& it is possible this should be one scope up.
-                # Put keys at all frames that will be switched if not already there.
-                if not keyframe(switcherPlug, q=True):
-                    setKeyframe(switcherPlug, t=finalRange[0])
+            with lib.anim.getKeyTimeIndex() as keyTimes:
+                times = keyTimes.times( plan.otherControls + [switcherPlug] )
                     
-                for t in finalRange:
-                    setKeyframe( switcherPlug, t=t, insert=True )
+                finalRange = _filterTimes(times, start, end)
+                
+                if finalRange:  # &&& it is possible this should be one scope up.
+                    # Put keys at all frames that will be switched if not already there.
+                    if not keyTimes.times( [switcherPlug] ):
+                        setKeyframe(switcherPlug, t=finalRange[0])
+                        
+                    for t in finalRange:
+                        setKeyframe( switcherPlug, t=t, insert=True )
                 
         # Finally, actually switch to ik.
-        ikControls = [ctrl for name, ctrl in ikControl.subControl.items()] + [ikControl, switcherPlug]
+        ikControls = plan.controls + [switcherPlug]
+
+        # Ranges are solved for every frame at once, leaving only applying the results.
+        solved = ikMatch.solve(plan, finalRange) if len(finalRange) > 1 else {}
+
+        def match():
+            moves = solved.get( currentTime(q=True) )
+            if moves is None:
+                switchCmd()
+            else:
+                ikMatch.apply(moves)
+                if plan.kind == 'dogleg':
+                    self._solveDoglegBend(ikControl)
+            setAttr(switcherPlug, 1)
         
         if not finalRange:
             # Here means a switch range was selected on something with no keys, so just switch it
-            switchCmd()
-            setAttr(switcherPlug, 1)
-        else:
-            with core.ui.NoUpdate():
-                cur = currentTime(q=True)
-                
-                for t in finalRange:
-                    currentTime(t)
-                    switchCmd()
-                    setAttr(switcherPlug, 1)
-                    if key:
-                        setKeyframe(ikControls, shape=False)
-                        
-                currentTime(cur)
+            return LimbSwitch( None, match, [] )
+        
+        return LimbSwitch( finalRange, match, ikControls if key else [] )
+    
+    # SwitchPlan.kind to the method that matches it
+    _kinds = {
+        'dogleg': 'activate_dogleg',
+        'splineChest': 'active_splineChest',
+        'splineNeck': 'active_splineNeck',
+        'ikChain': 'active_ikChain',
+    }
     
     @classmethod
     def active_splineNeck(cls, endControl):
@@ -289,18 +529,9 @@ class ActivateIkDispatch(object):
         Work on ik arms and legs
         '''
 
-        ik = ikControl.listRelatives(type='ikHandle')
-        assert ik, "Could not determine ik handle for {0}".format( ikControl )
-        ik = ik[0]
-        try:
-            ikEndJoint = ik.endEffector.listConnections()[0].tx.listConnections()[0]
-        except Exception:
-            raise Exception( 'End joint of ikHandle {0} could not be determined, unable to active_ikChain()'.format(ik) )
-            
-        # Figure out what is constrained to the ik and match to it
-        endJnt = core.constraints.getOrientConstrainee( ikEndJoint )
+        plan = getSwitchPlan(ikControl)
             
-        cls._matchIkToChain( ikControl, ikEndJoint, ikControl.subControl['pv'], ikControl.subControl['socket'], endJnt)
+        cls._matchIkToChain( ikControl, plan.ikEndJoint, plan.pv, plan.socket, plan.endJnt, plan.midJnt, plan.startJnt)
 
     @classmethod
     def active_splineChest(cls, chestCtrl):
@@ -310,39 +541,23 @@ class ActivateIkDispatch(object):
         '''
         cls.alignToMatcher(chestCtrl)
 
-        midJnt = chestCtrl.subControl['mid'].listRelatives(type='joint')[0]
-
-        skin = listConnections(midJnt, type='skinCluster')
-        curveShape = skin[0].outputGeometry[0].listConnections(p=True)[0].node()
-        ikHandle = curveShape.worldSpace.listConnections( type='ikHandle' )[0]
-
-        chain = getChainFromIk(ikHandle)
-
-        boundJoints = getConstraineeChain(chain)
+        plan = getSwitchPlan(chestCtrl)
+        boundJoints = plan.boundJoints
 
         if len(boundJoints) % 2 == 1:
             switch_logger.debug('Mid point ODD moved, # bound = {}'.format(len(boundJoints)))
             i = int(len(boundJoints) / 2) + 1
-            xform( chestCtrl.subControl['mid'], ws=True, t=xform(boundJoints[i], q=True, ws=True, t=True) )
+            xform( plan.mid, ws=True, t=xform(boundJoints[i], q=True, ws=True, t=True) )
         else:
             i = int(len(boundJoints) / 2)
-            xform( chestCtrl.subControl['mid'], ws=True, t=xform(boundJoints[i], q=True, ws=True, t=True) )
+            xform( plan.mid, ws=True, t=xform(boundJoints[i], q=True, ws=True, t=True) )
             switch_logger.debug('Mid point EVEN moved, # bound = {}'.format(len(boundJoints)))
 
     @classmethod
     def activate_dogleg(cls, ctrl):
 
-        # Get the last ik chunk but expand it to include the rest of the limb joints
-        for ik in ctrl.listRelatives(type='ikHandle'):
-            if not ik.name().count( 'mainIk' ):
-                break
-        else:
-            raise Exception('Unable to determin IK handle on {0} to match'.format(ctrl))
-
-        chain = getChainFromIk(ik)
-        chain.insert( 0, chain[0].getParent() )
-        chain.insert( 0, chain[0].getParent() )
-        bound = getConstraineeChain(chain)
+        plan = getSwitchPlan(ctrl)
+        bound = plan.bound
         
         # Move the main control to the end point
         #xform(ctrl, ws=True, t=xform(bound[-1], q=True, ws=True, t=True) )
@@ -354,7 +569,15 @@ class ActivateIkDispatch(object):
         out *= length
 
         pvPos = xform( bound[1], q=True, ws=True, t=True ) + out
-        xform( ctrl.subControl['pv'], ws=True, t=pvPos )
+        xform( plan.pv, ws=True, t=pvPos )
+
+        cls._solveDoglegBend(ctrl)
+
+    @staticmethod
+    def _solveDoglegBend(ctrl):
+        plan = getSwitchPlan(ctrl)
+        chain = plan.chain
+        bound = plan.bound
 
         # Figure out the bend, (via trial and error at the moment)
         def setBend():
@@ -405,7 +628,7 @@ class ActivateIkDispatch(object):
             warning('{0} does not have a matcher setup'.format(ctrl))
 
     @staticmethod
-    def _matchIkToChain(ikCtrl, ikJnt, pv, socket, chainEndTarget):
+    def _matchIkToChain(ikCtrl, ikJnt, pv, socket, chainEndTarget, midJnt=None, startJnt=None):
         '''
         Designed for 3 joint ik.
         
@@ -414,19 +637,19 @@ class ActivateIkDispatch(object):
         :param pv: Pole vector control
         :param socket: The socket controller of the ik chain
         :param Joint chainEndTarget: The joint at the end of the chain we want to match.
+        :param Joint midJnt: The elbow/knee, found by skipping twists if not given.
+        :param Joint startJnt: The shoulder/hip, found by skipping twists if not given.
 
 
         ..  todo::
             Update to use a percentage of the length of the palm to offset the polevector length, probably .5 the length of the arm
         '''
 
-        midJnt = chainEndTarget.getParent()
-        while rig.getBPJoint(midJnt).info.get('twist'):
-            midJnt = midJnt.getParent()
+        if midJnt is None:
+            midJnt = _skipTwists( chainEndTarget.getParent() )
         
-        startJnt = midJnt.getParent()
-        while rig.getBPJoint(startJnt).info.get('twist'):
-            startJnt = startJnt.getParent()
+        if startJnt is None:
+            startJnt = _skipTwists( midJnt.getParent() )
 
         switch_logger.debug( 'ikCtrl={}\nikJnt={}\nmidJnt={}\nstartJnt={}\nchainEndTarget={}'.format(ikCtrl, ikJnt, midJnt, startJnt, chainEndTarget) )
 
@@ -1,32 +1,171 @@
 '''
 Utilities for logging things that happen during the skeleton/rig creation so
 the users can be warned appropriately.
+
+`validate()` runs all the registered rules over a single bulk read of the
+skeleton, returning a `Report` that can be shown in the ui or printed headless.
+
+Ex:
+    report = log.validate()
+    print( report.text() )
+    
+    @log.rule('Scaled')
+    def scaled(state, options):
+        return [ log.Issue('Scaled', j, 'has scale') for j, s in zip(state.joints, state.scales)
+            if not core.math.isClose(s, [1, 1, 1]) ]
 '''
+from __future__ import print_function, absolute_import
+
+import collections
+import math
 
-from pymel.core import cmds, dt, listRelatives
+from maya.api import OpenMaya, OpenMayaAnim
+from pymel.core import cmds, dt
 
 from ... import core
 from ... import lib
 
 
-def findRotatedBones(joints=None):
+class SkeletonState(object):
     '''
-    Checks joints (defaulting to the )
+    The world position, rotation, joint orient and scale of many joints, read
+    via the api in one pass.  Rotations and orients are in degrees.
     '''
+    
+    def __init__(self, joints):
+        self.joints = list(joints)
+        self.positions = []
+        self.rotations = []
+        self.orients = []
+        self.scales = []
+        
+        sel = OpenMaya.MSelectionList()
+        for j in self.joints:
+            sel.add( j.longName() if hasattr(j, 'longName') else j )
+        
+        for i in range(len(self.joints)):
+            path = sel.getDagPath(i)
+            fn = OpenMayaAnim.MFnIkJoint(path)
+            
+            m = path.inclusiveMatrix()
+            self.positions.append( (m[12], m[13], m[14]) )
+            self.rotations.append( tuple( math.degrees(r) for r in fn.rotation() ) )
+            self.orients.append( tuple( math.degrees(r) for r in fn.orientation() ) )
+            self.scales.append( tuple(fn.scale()) )
+    
+    @classmethod
+    def skeleton(cls):
+        '''
+        Returns the state of all the joints under the root.
+        '''
+        root = core.findNode.getRoot()
+        if not root:
+            return cls([])
+        return cls( cmds.listRelatives(root.longName(), ad=True, type='joint', f=True) or [] )
+
+
+# A problem found by a rule, `node` is whatever was passed to `SkeletonState`.
+Issue = collections.namedtuple( 'Issue', 'rule node message' )
 
-    if not joints:
-        obj = core.findNode.getRoot()
-        joints = listRelatives(obj, ad=True, type='joint')
 
-    rotated = []
+if '_rules' not in globals():
+    _rules = collections.OrderedDict()  # name: (func, header)
 
-    for j in joints:
-        if not core.math.isClose( j.r.get(), [0, 0, 0] ):
-            rotated.append( (j, j.r.get()) )
 
-    #print '{0} rotated of {1} tested'.format(len(rotated), len(joints) )
+def rule(name, header=''):
+    '''
+    Decorator registering a rule for `validate()`, a function taking a
+    `SkeletonState` and dict of options, returning a list of `Issue`s.
+    `header` introduces the rule's issues in the report.
+    '''
+    def register(func):
+        _rules[name] = (func, header or name + ':')
+        return func
+    return register
+
+
+class Report(object):
+    '''
+    The issues found by `validate()`, grouped by rule in the order they ran.
+    '''
+    
+    def __init__(self, issues=None):
+        self.issues = list(issues or [])
+    
+    def __bool__(self):
+        return bool(self.issues)
     
-    return rotated
+    __nonzero__ = __bool__
+    
+    def byRule(self):
+        grouped = collections.OrderedDict()
+        for issue in self.issues:
+            grouped.setdefault(issue.rule, []).append(issue)
+        return grouped
+    
+    def text(self):
+        '''
+        Returns the human readable report, in the same form as the `Reporter`s.
+        '''
+        lines = []
+        for name, issues in self.byRule().items():
+            lines.append( _rules[name][1] if name in _rules else name + ':' )
+            lines += [ '    {0} {1}'.format(issue.node, issue.message).rstrip() for issue in issues ]
+        return '\n'.join(lines)
+    
+    def toDict(self):
+        '''
+        Returns {rule: [{'node': name, 'message': str}]}, json friendly for headless use.
+        '''
+        return collections.OrderedDict(
+            (name, [ {'node': str(issue.node), 'message': issue.message} for issue in issues ])
+            for name, issues in self.byRule().items()
+        )
+
+
+def validate(joints=None, rules=None, **options):
+    '''
+    Returns a `Report` of running the rules (defaulting to all) over the
+    joints (defaulting to the whole skeleton).  Extra keyword args are passed
+    to the rules as options, ex `tolerance=2` for Centerline.
+    '''
+    state = SkeletonState(joints) if joints is not None else SkeletonState.skeleton()
+    
+    issues = []
+    for name in (rules or _rules.keys()):
+        func = _rules[name][0]
+        issues += func(state, options)
+    
+    return Report(issues)
+
+
+@rule('Centerline', 'These joints are really close to the center, are they supposed to be offcenter?')
+def _centerlineRule(state, options):
+    tolerance = options.get('tolerance', Centerline.tolerance)
+    return [ Issue('Centerline', j, '') for j, pos in zip(state.joints, state.positions)
+        if Centerline.zero < abs(pos[0]) < tolerance ]
+
+
+@rule('Rotation', 'These joints have rotations, which should be in the joint orient:')
+def _rotationRule(state, options):
+    return [ Issue('Rotation', j, str(r)) for j, r in zip(state.joints, state.rotations)
+        if not core.math.isClose(r, [0, 0, 0]) ]
+
+
+@rule('Scale', 'These joints are scaled:')
+def _scaleRule(state, options):
+    return [ Issue('Scale', j, str(s)) for j, s in zip(state.joints, state.scales)
+        if not core.math.isClose(s, [1, 1, 1]) ]
+
+
+def findRotatedBones(joints=None):
+    '''
+    Returns [(joint, rotation)] of the joints (defaulting to the whole
+    skeleton) that have any rotation.
+    '''
+    state = SkeletonState(joints) if joints else SkeletonState.skeleton()
+    
+    return [ (j, dt.Vector(r)) for j, r in zip(state.joints, state.rotations) if not core.math.isClose(r, [0, 0, 0]) ]
 
 
 # -----------------------------------------------------------------------------
@@ -131,9 +270,14 @@ class Centerline(Reporter):
         cls.offcenter = []
 
     @classmethod
-    def check(cls, jnt):
-        if cls.zero < abs(cmds.xform(str(jnt), q=True, ws=True, t=True)[0]) < cls.tolerance:
-            cls.offcenter.append(jnt)
+    def check(cls, joints):
+        '''
+        Checks a joint, or list of them all at once.
+        '''
+        if not isinstance(joints, (list, tuple)):
+            joints = [joints]
+        
+        cls.offcenter += [ issue.node for issue in _centerlineRule(SkeletonState(joints), {}) ]
             
     @classmethod
     def results(cls):
@@ -162,15 +306,15 @@ class Rotation(Reporter):
     
     @classmethod
     def check(cls, joints, force=False):
-        rotated = findRotatedBones(joints)
-        if rotated:
-            for jnt, r in rotated:
-                cls.rotatedJoints.append(jnt.name())
+        state = SkeletonState(joints)
+        
+        for issue in _rotationRule(state, {}):
+            cls.rotatedJoints.append(issue.node.name())
         
         # Because the slightest of rotations ruin joint orient, force true zero
         if force:
-            for jnt in joints:
-                if jnt.r.get() != ZERO_VECTOR:
+            for jnt, r in zip(state.joints, state.rotations):
+                if r != (0.0, 0.0, 0.0):
                     jnt.r.set(0, 0, 0)
                 
     @classmethod
@@ -185,39 +329,55 @@ class Rotation(Reporter):
 class PostRigRotation(Reporter):
     '''
     Verifies that making the rig didn't alter any joints.
+    
+    Checks are queued and run together by `flush()` (or `results()`) so every
+    card's switch is flipped at once, with one read of the joints per state.
     '''
     
     issues = set()
+    pending = []
     
     @classmethod
     def clear(cls):
         cls.issues.clear()
+        cls.pending = []
     
     @classmethod
     def check(cls, joints, card, switchPlug):
+        cls.pending.append( (list(joints), card, switchPlug) )
+    
+    @classmethod
+    def flush(cls):
+        pending, cls.pending = cls.pending, []
+        if not pending:
+            return
         
-        if switchPlug:
-            prevVal = switchPlug.get()
-            
-            switchPlug.set(0)
-            rotated = findRotatedBones(joints)
-            if rotated:
-                cls.issues.add(card)
-            else:
-                switchPlug.set(1)
-                rotated = findRotatedBones(joints)
-                if rotated:
-                    cls.issues.add(card)
+        joints = [ j for entry in pending for j in entry[0] ]
+        switches = [ switchPlug for _, _, switchPlug in pending if switchPlug ]
+        prevValues = [ (plug, plug.get()) for plug in switches ]
+        
+        def rotatedCards():
+            rotated = set( issue.node for issue in _rotationRule(SkeletonState(joints), {}) )
+            return set( card for chain, card, _ in pending if any(j in rotated for j in chain) )
+        
+        try:
+            for plug in switches:
+                plug.set(0)
+            cls.issues.update( rotatedCards() )
             
-            if prevVal != switchPlug.get():
-                switchPlug.set(prevVal)
-        else:
-            rotated = findRotatedBones(joints)
-            if rotated:
-                cls.issues.add(card)
+            if switches:
+                for plug in switches:
+                    plug.set(1)
+                cls.issues.update( rotatedCards() )
+        finally:
+            for plug, value in prevValues:
+                if plug.get() != value:
+                    plug.set(value)
         
     @classmethod
     def results(cls):
+        cls.flush()
+        
         if not cls.issues:
             return ''
         
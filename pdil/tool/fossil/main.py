@@ -8,7 +8,7 @@ import traceback
 from ...vendor import Qt
 
 
-from pymel.core import Callback, confirmDialog, getAttr, hide, objExists, scriptJob, select, selected, setParent, setAttr, \
+from pymel.core import Callback, confirmDialog, hide, scriptJob, select, selected, setParent, \
     showHidden, warning, xform, \
     button, columnLayout, deleteUI, showWindow, textFieldGrp, window
     
@@ -19,7 +19,6 @@ from . import card as fossil_card  # Hack to not deal with the fact that "card"
 from . import cardlister
 from . import cardparams
 from . import cardRigging
-from . import controllerShape
 from . import moveCard
 from . import proxy
 from . import settings
@@ -329,24 +328,7 @@ class RigTool(Qt.QtWidgets.QMainWindow):
             return
         
         
-        for card in cards:
-            if mode == 'Use Current Shapes':
-                card.saveShapes()
-            
-            # If this being rebuilt, also restore the if it's in ik or fk
-            switchers = [controllerShape.getSwitcherPlug(x[0]) for x in card._outputs()]
-            prevValues = [ (s, getAttr(s)) for s in switchers if s]
-
-            card.removeRig()
-            cardRigging.buildRig([card])
-
-            if mode != 'Use Rig Info Shapes':
-                card.restoreShapes()
-                
-            # Restore ik/fk-ness
-            for switch, value in prevValues:
-                if objExists(switch):
-                    setAttr(switch, value)
+        cardRigging.rebuildRig(cards, useCurrentShapes=(mode == 'Use Current Shapes'))
         select(cards)
 
     def closeEvent(self, event):
@@ -445,8 +427,7 @@ class RigTool(Qt.QtWidgets.QMainWindow):
                 newCard.start().setBPParent(targetParent)
                 radius = targetParent.radius.get()
             else:
-                proxy.makeProxy(newCard.start())
-                newCard.start().proxy.setParent( proxy.getProxyGroup() )
+                proxy.makeProxy(newCard.start(), proxy.getProxyGroup())
             
             for j in newCard.joints:
                 j.radius.set(radius)
@@ -0,0 +1,205 @@
+'''
+Pose library for fossil controllers.
+
+A pose is an OrderedDict of {'node.attr': value} that is gathered, and applied,
+in bulk with cmds, so the same table can be reused for every control of
+several characters without going through pymel per attribute.
+
+Ex:
+    pose.apply( pose.zeroTable(core.findNode.controllers()) )
+
+    p = pose.capture()
+    pose.save(p, 'C:/temp/idle.pose')
+    pose.apply( pose.blend(p, pose.load('C:/temp/run.pose'), 0.5) )
+'''
+from __future__ import print_function, absolute_import
+
+import collections
+import json
+
+from pymel.core import cmds, PyNode
+
+from ... import core
+from ...nodeApi import fossilNodes
+
+
+def _stripNamespace(name):
+    return name.rsplit('|', 1)[-1].rsplit(':', 1)[-1]
+
+
+def _settable(plug):
+    '''
+    Returns True if the plug can be set, meaning it is unlocked and either not
+    connected or only driven by an anim curve.
+    '''
+    return cmds.getAttr(plug, settable=True)
+
+
+def _controlNames(controls):
+    if controls is None:
+        controls = core.findNode.controllers()
+    return [ c.name() if hasattr(c, 'name') else c for c in controls ]
+
+
+def capture(controls=None):
+    '''
+    Returns a pose of all the keyable, settable attributes of the controls,
+    defaulting to every controller in the scene.
+    '''
+    pose = collections.OrderedDict()
+    for ctrl in _controlNames(controls):
+        for attr in cmds.listAttr(ctrl, k=True, u=True, s=True) or []:
+            plug = ctrl + '.' + attr
+            if _settable(plug):
+                pose[plug] = cmds.getAttr(plug)
+
+    return pose
+
+
+def zeroTable(controls=None, useTrueZero=True):
+    '''
+    Returns the pose of the controls at their zero, which is:
+        * Translate of 0
+        * Rotate of 0, or the `trueZero` attr if it exists and `useTrueZero`
+        * Scale of 1
+        * User defined decimal attributes at their default value (like length).
+    '''
+    pose = collections.OrderedDict()
+    for ctrl in _controlNames(controls):
+        rot = [0.0, 0.0, 0.0]
+        if useTrueZero and cmds.attributeQuery('trueZero', node=ctrl, ex=True):
+            rot = cmds.getAttr(ctrl + '.trueZero')[0]
+
+        values = [ ('t' + axis, 0.0) for axis in 'xyz' ] \
+            + [ ('r' + axis, r) for axis, r in zip('xyz', rot) ] \
+            + [ ('s' + axis, 1.0) for axis in 'xyz' ]
+
+        for attr in cmds.listAttr(ctrl, ud=True, k=True, s=True) or []:
+            if cmds.getAttr(ctrl + '.' + attr, type=True) in ('double', 'float', 'doubleLinear', 'doubleAngle'):
+                default = cmds.attributeQuery(attr, node=ctrl, listDefault=True)
+                if default:
+                    values.append( (attr, default[0]) )
+
+        for attr, value in values:
+            plug = ctrl + '.' + attr
+            if _settable(plug):
+                pose[plug] = value
+
+    return pose
+
+
+def apply(pose):
+    '''
+    Sets all the values of the pose as a single undo.
+    '''
+    setAttr = cmds.setAttr
+
+    cmds.undoInfo(openChunk=True)
+    try:
+        for plug, value in pose.items():
+            try:
+                setAttr(plug, value)
+            except RuntimeError:
+                pass  # The plug may have been locked or connected since the table was made.
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+
+def blend(poseA, poseB, weight):
+    '''
+    Returns a pose `weight` of the way from poseA to poseB.  Plugs only in one
+    of the poses keep that value, and non decimal values (like enums) snap to
+    whichever pose is closer.
+    '''
+    pose = collections.OrderedDict(poseA)
+    for plug, b in poseB.items():
+        if plug not in pose:
+            pose[plug] = b
+            continue
+
+        a = pose[plug]
+        if isinstance(a, float) or isinstance(b, float):
+            pose[plug] = a + (b - a) * weight
+        else:
+            pose[plug] = b if weight >= 0.5 else a
+
+    return pose
+
+
+def _oppositeControls(controls):
+    '''
+    Returns {control name: opposite control name} for all the given controls
+    (including sub controls) that have one.
+    '''
+    opposites = {}
+    for ctrl in controls:
+        if not isinstance(ctrl, fossilNodes.RigController):
+            continue
+
+        other = ctrl.getOppositeSide()
+        if not other:
+            continue
+
+        opposites[ctrl.name()] = other.name()
+        otherSubs = dict( other.subControl.items() )
+        for name, sub in ctrl.subControl.items():
+            if name in otherSubs:
+                opposites[sub.name()] = otherSubs[name].name()
+
+    return opposites
+
+
+def mirror(pose, negate=()):
+    '''
+    Returns the pose with left and right swapped, using `RigController.getOppositeSide`.
+    Controls without an opposite are left alone.
+
+    :param negate: Attribute names (ex 'tx') whose values flip sign when swapped,
+        for controls that aren't behavior mirrored.
+    '''
+    nodes = set( plug.split('.', 1)[0] for plug in pose )
+    opposites = _oppositeControls( [ PyNode(n) for n in nodes ] )
+
+    mirrored = collections.OrderedDict()
+    for plug, value in pose.items():
+        node, attr = plug.split('.', 1)
+        if node in opposites:
+            if attr in negate:
+                value = -value
+            mirrored[opposites[node] + '.' + attr] = value
+        else:
+            mirrored.setdefault(plug, value)
+
+    return mirrored
+
+
+def save(pose, filename):
+    '''
+    Saves the pose without namespaces so it can be loaded onto other characters.
+    '''
+    data = collections.OrderedDict()
+    for plug, value in pose.items():
+        node, attr = plug.split('.', 1)
+        data.setdefault( _stripNamespace(node), collections.OrderedDict() )[attr] = value
+
+    with open(filename, 'w') as fid:
+        json.dump(data, fid, separators=(',', ':'))
+
+
+def load(filename, main=None):
+    '''
+    Returns the saved pose mapped onto the controls under `main` (defaulting to
+    all controls in the scene), skipping any that don't exist.
+    '''
+    with open(filename, 'r') as fid:
+        data = json.load(fid, object_pairs_hook=collections.OrderedDict)
+
+    controls = { _stripNamespace(name): name for name in _controlNames(core.findNode.controllers(main)) }
+
+    pose = collections.OrderedDict()
+    for node, attrs in data.items():
+        if node in controls:
+            for attr, value in attrs.items():
+                pose[controls[node] + '.' + attr] = value
+
+    return pose
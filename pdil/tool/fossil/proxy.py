@@ -11,6 +11,102 @@ from ... import core
 
 _DEFAULT_PROXY_RADIUS = 0.70
 
+# Maya 2020 added offsetParentMatrix, letting a world matrix drive a transform directly.
+OFFSET_PARENT = cmds.about(api=True) >= 20200000
+
+
+def _followNodes(joints):
+    '''
+    Returns the utility nodes driving the given proxy joints, made by
+    `_follow()` and the link visibility, so they can be deleted with them.
+    '''
+    joints = [str(j) for j in joints]
+    if not joints:
+        return []
+
+    found = set()
+    for nodeType in ('multMatrix', 'decomposeMatrix', 'multiplyDivide'):
+        found.update( cmds.listConnections(joints, s=True, d=False, type=nodeType) or [] )
+
+    if found:
+        found.update( cmds.listConnections(list(found), s=True, d=False, type='multMatrix') or [] )
+
+    return list(found)
+
+
+def _deleteProxyNodes(top):
+    '''
+    Deletes the proxy joint, and any below it, along with everything made to drive them.
+    '''
+    top = str(top)
+    joints = [top] + ( cmds.listRelatives(top, ad=True, type='joint', f=True) or [] )
+    cmds.delete( _followNodes(joints) + [top] )
+
+
+def _follow(proxyJnt, target, relativeTo=None):
+    '''
+    Drives the proxy joint to match the target BPJoint with matrix connections
+    instead of a constraint.  `relativeTo` is the BPJoint matched by the proxy's
+    parent, if it isn't at the top of the proxy group.
+    
+    The proxy must already be under its final parent since, at the top, the
+    parent's inverse is used so scaling the blueprint isn't applied twice.
+    Without offsetParentMatrix, only translate and rotate are driven so the
+    parent proxy's inverse is always used since it lacks the card's scale.
+    '''
+    proxyJnt = str(proxyJnt)
+
+    old = _followNodes([proxyJnt])
+    old += cmds.listRelatives(proxyJnt, type='constraint', f=True) or []  # Pre matrix connection proxies
+    if old:
+        cmds.delete(old)
+
+    if relativeTo and OFFSET_PARENT:
+        inverse = str(relativeTo) + '.worldInverseMatrix[0]'
+    else:
+        inverse = cmds.listRelatives(proxyJnt, p=True, f=True)[0] + '.worldInverseMatrix[0]'
+
+    mult = cmds.createNode('multMatrix', n='proxyRelative')
+    cmds.connectAttr( str(target) + '.worldMatrix[0]', mult + '.matrixIn[0]' )
+    cmds.connectAttr( inverse, mult + '.matrixIn[1]' )
+    matrix = mult + '.matrixSum'
+
+    for attr in ('t', 'r', 'jo'):
+        cmds.setAttr( proxyJnt + '.' + attr, 0, 0, 0 )
+
+    if OFFSET_PARENT:
+        cmds.connectAttr( matrix, proxyJnt + '.offsetParentMatrix', f=True )
+    else:
+        decompose = cmds.createNode('decomposeMatrix', n='proxyFollow')
+        cmds.connectAttr( matrix, decompose + '.inputMatrix' )
+        cmds.connectAttr( decompose + '.outputTranslate', proxyJnt + '.t', f=True )
+        cmds.connectAttr( decompose + '.outputRotate', proxyJnt + '.r', f=True )
+
+
+def _proxyOwner(proxyJnt):
+    '''
+    Returns the name of the BPJoint the given proxy belongs to, or None for
+    the proxy group and card links.
+    '''
+    for plug in cmds.listConnections( str(proxyJnt) + '.message', s=False, d=True, p=True ) or []:
+        if plug.endswith('.proxy'):
+            return plug.rsplit('.', 1)[0]
+    return None
+
+
+def reparent(proxyJnt, newParent):
+    '''
+    Moves the proxy joint under `newParent`, either another proxy or the proxy
+    group, updating what drives it so it stays on its BPJoint.
+    '''
+    proxyJnt = PyNode(proxyJnt)
+    if proxyJnt.getParent() != newParent:
+        cmds.parent( proxyJnt.longName(), str(newParent), r=True )
+
+    owner = _proxyOwner(proxyJnt)
+    if owner:
+        _follow( proxyJnt, owner, _proxyOwner(newParent) )
+
 
 def _clearLink(proxy):
     '''
@@ -21,7 +117,7 @@ def _clearLink(proxy):
 
     link = proxy.cardLink.listConnections()
     if link:
-        delete(link)
+        _deleteProxyNodes( link[0] )
 
 
 def _recordLink(proxy, link):
@@ -39,13 +135,50 @@ def _delLink(proxy):
         con = proxy.cardLink.listConnections()
 
         if con:
-            delete(con)
+            _deleteProxyNodes( con[0] )
 
 
 def makeProxy(tempJoint, parent=None, radius=_DEFAULT_PROXY_RADIUS):
-    tempJoint.proxy = joint(parent)
+    if parent is None:
+        parent = getProxyGroup()
+
+    tempJoint.proxy = PyNode( cmds.createNode('joint', p=str(parent)) )
     tempJoint.proxy.radius.set(radius)
-    pointConstraint( tempJoint, tempJoint.proxy )
+    _follow( tempJoint.proxy, tempJoint, _proxyOwner(parent) )
+
+
+def removeProxy(tempJoint):
+    '''
+    Deletes the proxy of the given BPJoint, moving its proxy children up to its parent.
+    '''
+    proxyJnt = tempJoint.proxy
+    if not proxyJnt:
+        return
+
+    proxyParent = proxyJnt.getParent()
+    for child in proxyJnt.listRelatives(type='joint'):
+        reparent(child, proxyParent)
+
+    _delLink(proxyJnt)
+    _deleteProxyNodes(proxyJnt)
+
+
+def _makeLink(parent, child, grp, radius):
+    '''
+    Makes the pair of joints drawing the connection between cards, returning the start.
+    '''
+    parentCard = parent.cardCon.node()
+    childCard = child.cardCon.node()
+
+    linkStart = cmds.createNode( 'joint', p=str(grp), n=simpleName(parentCard) + '_' + simpleName(childCard) + '_link' )
+    linkEnd = cmds.createNode( 'joint', p=linkStart )
+    cmds.setAttr( linkStart + '.radius', radius )
+    cmds.setAttr( linkEnd + '.radius', radius )
+
+    _follow( linkStart, parent )
+    _follow( linkEnd, child, parent )
+
+    return PyNode(linkStart)
 
 
 def pointer(parent, child):
@@ -73,36 +206,34 @@ def pointer(parent, child):
     if not parent.proxy:
         makeProxy( parent, grp, proxyRadius )
 
-    # If card parentage is established, manage vis
-    if parent.cardCon.node() != child.cardCon.node():
-        parentCardName = simpleName(parent.cardCon.node())
-        childCardName = simpleName(child.cardCon.node())
+    _connect(parent, child, grp, proxyRadius)
 
-        child.proxy.setParent( grp )
 
-        linkStart = joint(grp)
-        linkStart.radius.set(proxyRadius)
-        linkEnd = joint(linkStart)
-        linkEnd.radius.set(proxyRadius)
+def _connect(parent, child, grp, radius):
+    '''
+    Places the child's proxy under the parent's, or links them if they are on different cards.
+    '''
+    # If card parentage is established, manage vis
+    if parent.cardCon.node() != child.cardCon.node():
+        reparent( child.proxy, grp )
 
-        pointConstraint( parent, linkStart )
-        pointConstraint( child, linkEnd )
+        linkStart = _makeLink(parent, child, grp, radius)
 
         core.math.multiply( parent.cardCon.node().v, child.cardCon.node().v) >> linkStart.v
 
         if not child.cardCon.node().v.isConnectedTo(child.v):
             child.cardCon.node().v >> child.v
 
-        child.v >> child.proxy.v
+        if not child.v.isConnectedTo(child.proxy.v):
+            child.v >> child.proxy.v
 
         _clearLink( child.proxy )
         _recordLink( child.proxy, linkStart )
 
-        child.proxy.rename( childCardName + '_proxy' )
-        linkStart.rename( parentCardName + '_' + childCardName + '_link' )
+        child.proxy.rename( simpleName(child.cardCon.node()) + '_proxy' )
 
     else:
-        child.proxy.setParent( parent.proxy )
+        reparent( child.proxy, parent.proxy )
 
 
 def unpoint(child):
@@ -116,7 +247,7 @@ def unpoint(child):
     if not child.parent.proxy:
         return
 
-    child.proxy.setParent( getProxyGroup() )
+    reparent( child.proxy, getProxyGroup() )
     child.v.disconnect()
     child.parent = None
     _delLink( child.proxy )
@@ -165,10 +296,31 @@ def relink(src, dup):
         pointer( src.start().parent, dup.start() )
         
         
+def buildProxies(joints):
+    '''
+    Makes the proxies for all the given BPJoints, which don't have any yet,
+    then connects them to their proxy children in one pass.
+    '''
+    grp = getProxyGroup()
+
+    for jnt in joints:
+        makeProxy( jnt, grp )
+
+    for jnt in joints:
+        for child in jnt.proxyChildren:
+            _connect( jnt, child, grp, _DEFAULT_PROXY_RADIUS )
+
+
 def rebuildConnectorProxy():
-    delete( getProxyGroup() )
+    '''
+    Deletes and remakes the whole proxy skeleton as a single undo, making all
+    the proxies before connecting any of them.
+    '''
+    cmds.undoInfo(openChunk=True)
+    try:
+        grp = getProxyGroup()
+        cmds.delete( _followNodes( cmds.listRelatives(grp.longName(), ad=True, type='joint', f=True) or [] ) + [grp.longName()] )
 
-    for card in core.findNode.allCards():
-        for jnt in card.joints:
-            for child in jnt.proxyChildren:
-                pointer(jnt, child)
\ No newline at end of file
+        buildProxies( [ jnt for card in core.findNode.allCards() for jnt in card.joints ] )
+    finally:
+        cmds.undoInfo(closeChunk=True)
@@ -80,14 +80,13 @@ import re
 
 #from pymel.core import *
 from pymel.core import addAttr, aimConstraint, arclen, cluster, createNode, curve, \
-    duplicate, delete, dt, expression, group, \
+    duplicate, dt, expression, group, \
     hide, ikHandle, insertKnotCurve, joint, listRelatives, makeIdentity, \
     move, mel, orientConstraint, parent, \
     parentConstraint, pointConstraint, pointOnCurve, poleVectorConstraint, PyNode, \
     rotate, select, selected, setDrivenKeyframe, showHidden, skinCluster, \
-    spaceLocator, upAxis, xform
+    upAxis, xform
 
-from maya.api import OpenMaya
 import maya.OpenMayaAnim
 import maya.OpenMaya
 
@@ -110,36 +109,14 @@ CONTROL_ATTR_NAME = 'influence'
 
 
 def intersect(mesh, point, ray):
-    fnMesh = OpenMaya.MFnMesh( core.capi.asMObject(mesh.getShape()).object() )
-
-    p = spaceLocator()
-    p.t.set(point)
-    p.setParent( mesh )
-    
-    objSpacePos = p.t.get()
-
-    p.setTranslation( ray, space='world' )
-
-    objSpaceRay = p.t.get() - objSpacePos
-    
-    point = OpenMaya.MFloatPoint(objSpacePos)
-    ray = OpenMaya.MFloatVector(objSpaceRay)
-    res = fnMesh.allIntersections(point, ray, OpenMaya.MSpace.kObject, 50, False )
-
-    # -> (hitPoints, hitRayParams, hitFaces, hitTriangles, hitBary1s, hitBary2s)
-
-    if not len(res[0]):
-        hits = []
-    
-    else:
-        hits = []
-        for hit in res[0]:
-            p.t.set( hit.x, hit.y, hit.z)
-            hits.append( p.getTranslation(space='world') )
-    
-    delete(p)
+    '''
+    Returns the world positions where the mesh is hit by the ray from `point`
+    towards the world position `ray`.
     
-    return hits
+    Use `core.raycast.intersect` to cast many rays at once.
+    '''
+    point = dt.Vector(point)
+    return core.raycast.intersect( mesh, [(point, dt.Vector(ray) - point)] )[0]
 
 
 def _getSwitchPlug(obj):
@@ -367,15 +344,16 @@ def makeStretchyNonSpline(controller, ik, stretchDefault=1):
     length = dist.distance
     
     lengthMax = chainLength(chain)
-    # Regular IK only stretches
-    # ratio = (abs distance between start and end) / (length of chain)
-    ratio = core.math.divide( length, lengthMax )
-    # multiplier is either 1 or a number greater than one needed for the chain to reach the end.
-    multiplier = core.math.condition( ratio, '>', 1.0, true=ratio, false=1 )
-
+    
     controller.addAttr( 'length', at='double', min=-10.0, dv=0.0, max=10.0, k=True )
-
+    
+    net = core.math.Network(length=length, lengthMax=lengthMax, lengthAttr=controller.length)
+    
     '''
+    Regular IK only stretches
+    ratio = (abs distance between start and end) / (length of chain)
+    multiplier is either 1 or a number greater than one needed for the chain to reach the end.
+    
     lengthMod is the below formula:
 
     if controller.length >= 0:
@@ -383,17 +361,16 @@ def makeStretchyNonSpline(controller, ik, stretchDefault=1):
     else:
         controller.length/20.0  + 1.0 # .5 to 1.0 halve the length of the limb
     '''
-    lengthMod = core.math.add(
-        core.math.divide(
-            controller.length,
-            core.math.condition(controller.length, '>=', 0, 10.0, 20.0)
-        ),
-        1.0
-    )
+    plugs = net.build( {
+        'multiplier': 'length / lengthMax if length / lengthMax > 1.0 else 1.0',
+        'lengthMod': 'lengthAttr / (10.0 if lengthAttr >= 0 else 20.0) + 1.0',
+    } )
     
-    jointLenMultiplier = core.math.multiply(switcher.output, lengthMod)
+    plugs['multiplier'] >> switcher.input[1]
     
-    multiplier >> switcher.input[1]
+    # Make all the segment lengths at once so they share nodes.
+    segments = {'jointLenMultiplier': 'switcher * lengthMod'}
+    inputs = {'switcher': switcher.output, 'lengthMod': plugs['lengthMod']}
     
     for i, j in enumerate(chain[1:], 1):
         saveRestLength(j, jointAxis)
@@ -402,17 +379,20 @@ def makeStretchyNonSpline(controller, ik, stretchDefault=1):
         # Make an attribute that is -10 to 10 map to multiplying the restLength by 0 to 2
         attrName = 'segLen' + str(i)
         controller.addAttr( attrName, at='double', k=True, min=-10, max=10 )
-        normalizedMod = core.math.add(core.math.divide( controller.attr(attrName), 10), 1)
-        
-        "j.attr('t' + jointAxis) = lockSwitcher.output = jointLenMultiplier * normalizedMod * j.restLength"
         
+        # j.attr('t' + jointAxis) = lockSwitcher.output = jointLenMultiplier * normalizedMod * j.restLength
+        segments[str(i)] = 'switcher * lengthMod * ((segLen{0} / 10.0 + 1.0) * rest{0})'.format(i)
+        inputs['segLen%i' % i] = controller.attr(attrName)
+        inputs['rest%i' % i] = j.restLength
+    
+    plugs = net.build(segments, **inputs)
+    jointLenMultiplier = plugs['jointLenMultiplier']
+    
+    for i, j in enumerate(chain[1:], 1):
         # As of 2/9/2019 it looks to be fine to make this even if it's not used by the ik to lock the elbow (like in dogleg)
         lockSwitcher = createNode('blendTwoAttr', n='lockSwitcher')
         
-        core.math.multiply(
-            jointLenMultiplier,
-            core.math.multiply( normalizedMod, j.restLength)
-        ) >> lockSwitcher.input[0] # >> j.attr('t' + jointAxis)
+        plugs[str(i)] >> lockSwitcher.input[0] # >> j.attr('t' + jointAxis)
     
         lockSwitcher.output >> j.attr('t' + jointAxis)
     
@@ -798,13 +778,14 @@ def getBPJoint(realJoint):
 
 @adds()
 @defaultspec( {'shape': 'sphere', 'color': 'orange 0.22', 'size': 10} )
-def fkChain(start, end, translatable=False, scalable=False, names=None, groupName='', controlSpec={} ):
+def fkChain(start, end, translatable=False, scalable=False, names=None, groupName='', instanceShapes=False, controlSpec={} ):
     '''
     Make an FK chain between the given joints.
     
     :param PyNode start: Start of joint chain
     :param PyNode end: End of chain
     :param bool translatable: Default=False
+    :param bool instanceShapes: All the controls share one set of shapes, see `controllerShape.buildInstanced`.
     :param dict controlSpec: Override default control details here.  Only has 'main'.
     
     ..  todo::
@@ -838,7 +819,8 @@ def fkChain(start, end, translatable=False, scalable=False, names=None, groupNam
     for j, name in zip(joints, names):
         ctrl = controllerShape.build( name + "_ctrl",
                                 controlSpec['main'],
-                                type=controllerShape.ControlType.TRANSLATE if translatable else controllerShape.ControlType.ROTATE )
+                                type=controllerShape.ControlType.TRANSLATE if translatable else controllerShape.ControlType.ROTATE,
+                                instanced=instanceShapes )
         controls.append( ctrl )
         core.dagObj.matchTo( ctrl, j )
         space = core.dagObj.zero( ctrl )
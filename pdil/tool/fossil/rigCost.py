@@ -0,0 +1,272 @@
+'''
+Tools to find which cards' rig components make playback slow.
+
+Each built component (a card's main controller for a side and kinematic type)
+is walked for the nodes it made, which are counted by type and checked for
+things known to be expensive.  Optionally each component is then disabled, via
+`nodeState`, while timing playback to get its actual evaluation cost.
+
+Ex:
+    print( rigCost.report() )
+'''
+from __future__ import print_function, absolute_import
+
+import collections
+
+from pymel.core import cmds, listRelatives
+
+from ... import core
+
+from . import cardRigging
+from . import space
+
+
+# Node types that are always worth looking at.
+EXPENSIVE_TYPES = {
+    'expression': 'expressions evaluate every frame and break parallel evaluation',
+    'curveInfo': 'curveInfo recomputes the arc length of the whole curve',
+}
+
+# Constraints with more than this many targets get flagged.
+MAX_CONSTRAINT_TARGETS = 4
+
+# Types that are reported but not disabled during timing, they are the things being driven.
+_NEVER_DISABLE = ('transform', 'joint', 'nurbsCurve', 'mesh', 'nurbsSurface')
+
+# Walking connections stops at these (inherited) types, they are either dag
+# nodes, animation or scene wide bookkeeping shared by everything.
+_STOP_TYPES = ('dagNode', 'animCurve', 'time', 'objectSet', 'displayLayer', 'renderLayer', 'nodeGraphEditorInfo', 'hyperLayout')
+
+# Stands in for a param the card doesn't have, see `compareParam`.
+_MISSING = object()
+
+
+Component = collections.namedtuple( 'Component', 'card side type nodes' )
+
+
+def _walkUtilities(dagNodes, seen):
+    '''
+    Returns the non-dag nodes connected to the given dag nodes, following
+    connections through other non-dag nodes but stopping at dag ones.
+    '''
+    found = []
+    toVisit = list(dagNodes)
+    while toVisit:
+        connections = cmds.listConnections( toVisit, s=True, d=True, sh=True ) or []
+        toVisit = []
+        for node in set(connections):
+            if node in seen:
+                continue
+            inherited = cmds.nodeType(node, inherited=True) or []
+            if any(t in inherited for t in _STOP_TYPES):
+                continue
+            seen.add(node)
+            found.append(node)
+            toVisit.append(node)
+
+    return found
+
+
+def componentNodes(ctrl, seen=None):
+    '''
+    Returns the names of all the nodes that belong to the component led by the
+    `RigController` ctrl: its container's dag hierarchy, the sub controls, the
+    space networks and any utility nodes (twist, stretch etc.) wired into them.
+
+    :param set seen: Nodes already assigned to another component, which is
+        updated, so shared utility nodes are only counted once.
+    '''
+    if seen is None:
+        seen = set()
+
+    dagNodes = []
+    container = ctrl.container
+    if container:
+        dagNodes.append( container.longName() )
+        dagNodes += cmds.listRelatives( container.longName(), ad=True, f=True ) or []
+
+    controls = [ctrl] + [sub for _, sub in ctrl.subControl.items()]
+    for control in controls:
+        spaceGrp = core.dagObj.zero(control, apply=False, make=False)
+        if spaceGrp:
+            dagNodes.append( spaceGrp.longName() )
+
+        # True targets of the spaces live under the main group, not the container
+        for info in space.getTargetInfo(control):
+            targets = info.target if isinstance(info.target, tuple) else [info.target]
+            for target in targets:
+                if target and target.longName().count('__spaces__'):
+                    dagNodes.append( target.longName() )
+                    dagNodes += cmds.listRelatives( target.longName(), ad=True, f=True ) or []
+
+    dagNodes = [n for n in dagNodes if n not in seen]
+    seen.update(dagNodes)
+
+    return dagNodes + _walkUtilities(dagNodes, seen)
+
+
+def gatherComponents(cards=None):
+    '''
+    Returns a list of `Component`s for every built side/kinematic of the cards,
+    defaulting to all of them.  Constraints on the card's joints are included.
+    '''
+    if cards is None:
+        cards = core.findNode.allCards()
+
+    seen = set()
+    components = []
+    for card in cards:
+        for ctrl, side, type in card._outputs():
+            components.append( Component(card, side, type, componentNodes(ctrl, seen)) )
+
+        constraints = []
+        for jnt in card.getRealJoints():
+            for const in listRelatives(jnt, type='constraint'):
+                name = const.longName()
+                if name not in seen:
+                    seen.add(name)
+                    constraints.append(name)
+
+        if constraints:
+            components.append( Component(card, '', 'joints', constraints) )
+
+    return components
+
+
+def countTypes(nodes):
+    '''
+    Returns a Counter of node type for the given node names.
+    '''
+    return collections.Counter( cmds.nodeType(n) for n in nodes )
+
+
+def findExpensive(nodes):
+    '''
+    Returns a list of (node, reason) for things known to be expensive to evaluate.
+    '''
+    issues = []
+    for node in nodes:
+        nodeType = cmds.nodeType(node)
+        if nodeType in EXPENSIVE_TYPES:
+            issues.append( (node, EXPENSIVE_TYPES[nodeType]) )
+
+        elif 'constraint' in (cmds.nodeType(node, inherited=True) or []):
+            targetCount = cmds.getAttr( node + '.target', size=True )
+            if targetCount > MAX_CONSTRAINT_TARGETS:
+                issues.append( (node, '%s has %i targets' % (nodeType, targetCount)) )
+
+    return issues
+
+
+def timeComponent(component, baseline, start, end):
+    '''
+    Returns how many milliseconds per frame the component costs, measured by
+    setting its utility nodes to HasNoEffect and timing playback against the
+    given `baseline` fps.
+    '''
+    toggled = []
+    for node in component.nodes:
+        if cmds.nodeType(node) in _NEVER_DISABLE:
+            continue
+        plug = node + '.nodeState'
+        if cmds.objExists(plug) and not cmds.getAttr(plug, l=True) and not cmds.listConnections(plug, s=True, d=False):
+            toggled.append( (plug, cmds.getAttr(plug)) )
+
+    if not toggled:
+        return 0.0
+
+    try:
+        for plug, _ in toggled:
+            cmds.setAttr(plug, 1)
+
+        fps = core.time.playbackFps(start, end)
+    finally:
+        for plug, state in toggled:
+            cmds.setAttr(plug, state)
+
+    if not fps or not baseline:
+        return 0.0
+
+    return (1000.0 / baseline) - (1000.0 / fps)
+
+
+def analyze(cards=None, timing=True, start=None, end=None):
+    '''
+    Returns a list of dicts, one per component, most expensive first:
+        {'component': Component, 'counts': Counter, 'issues': [(node, reason)], 'ms': float}
+
+    `ms` is the per frame cost (None if `timing` is False), which sorts the results,
+    otherwise they are sorted by node count.
+    '''
+    results = []
+
+    baseline = core.time.playbackFps(start, end) if timing else None
+
+    for component in gatherComponents(cards):
+        results.append( {
+            'component': component,
+            'counts': countTypes(component.nodes),
+            'issues': findExpensive(component.nodes),
+            'ms': timeComponent(component, baseline, start, end) if timing else None,
+        } )
+
+    if timing:
+        results.sort( key=lambda r: r['ms'], reverse=True )
+    else:
+        results.sort( key=lambda r: len(r['component'].nodes), reverse=True )
+
+    return results
+
+
+def report(cards=None, timing=True, start=None, end=None):
+    '''
+    Returns a ranked, human readable version of `analyze()`.
+    '''
+    lines = []
+    for result in analyze(cards, timing, start, end):
+        component = result['component']
+        header = '{0} {1} {2}: {3} nodes'.format(component.card, component.side, component.type, len(component.nodes))
+        if result['ms'] is not None:
+            header += ', {0:.3f} ms/frame'.format(result['ms'])
+        lines.append(header)
+
+        for nodeType, count in result['counts'].most_common():
+            lines.append( '    {0:<24} {1}'.format(nodeType, count) )
+
+        for node, reason in result['issues']:
+            lines.append( '    ! {0}: {1}'.format(node, reason) )
+
+    return '\n'.join(lines)
+
+
+def compareParam(card, param, values, start=None, end=None):
+    '''
+    Rebuilds the card with each of the values for the ik `param`, returning
+    {value: playback fps} over the range (defaulting to the playback range).
+    The card's original value is restored and rebuilt afterwards.
+    
+    Ex, comparing the attach modes of a SurfaceFollow:
+        rigCost.compareParam( card, 'attach', ['Constraint', 'Follicle'] )
+    '''
+    def setParam(value):
+        rigData = card.rigData
+        params = rigData.setdefault('ikParams', {})
+        if value is _MISSING:
+            params.pop(param, None)
+        else:
+            params[param] = value
+        card.rigData = rigData
+    
+    original = card.rigData.get('ikParams', {}).get(param, _MISSING)
+    
+    results = collections.OrderedDict()
+    try:
+        for value in values:
+            setParam(value)
+            cardRigging.rebuildRig([card])
+            results[value] = core.time.playbackFps(start, end)
+    finally:
+        setParam(original)
+        cardRigging.rebuildRig([card])
+    
+    return results
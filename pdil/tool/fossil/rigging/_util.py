@@ -481,7 +481,15 @@ def makeStretchySpline(controller, ik, stretchDefault=1):
     for i, j in enumerate(chain[1:], 1):
         #util.recordFloat(j, 'restLength', j.attr('t' + jointAxis).get() )
         saveRestLength(j, jointAxis)
-        core.math.multiply( jointLenMultiplier, j.restLength) >> j.attr('t' + jointAxis)
+    
+    # Built together so the multiplies share nodes
+    lengths = core.math.network(
+        { j: 'multiplier * rest%i' % i for i, j in enumerate(chain[1:], 1) },
+        multiplier=jointLenMultiplier,
+        **{ 'rest%i' % i: j.restLength for i, j in enumerate(chain[1:], 1) } )
+    
+    for j, plug in lengths.items():
+        plug >> j.attr('t' + jointAxis)
     
     return controller.attr('stretch'), jointLenMultiplier
 
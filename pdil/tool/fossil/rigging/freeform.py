@@ -20,7 +20,7 @@ log = logging.getLogger('fossil_controller_debug')
 
 @util.adds()
 @util.defaultspec( {'shape': 'sphere', 'color': 'orange 0.22', 'size': 10} )
-def buildFreeform(joints, translatable=False, mirroredTranslate=False, scalable=False, groupName='', controlSpec={} ):
+def buildFreeform(joints, translatable=False, mirroredTranslate=False, scalable=False, groupName='', instanceShapes=False, controlSpec={} ):
     '''
     Make an FK chain between the given joints.
     
@@ -28,6 +28,7 @@ def buildFreeform(joints, translatable=False, mirroredTranslate=False, scalable=
     :param PyNode end: End of chain
     :param bool translatable: Default=False
     :param bool mirroredTranslate: If true, translations will be flipped
+    :param bool instanceShapes: All the controls share one set of shapes, see `controllerShape.buildInstanced`.
     :param dict controlSpec: Override default control details here.  Only has 'main'.
     
     ..  todo::
@@ -53,7 +54,8 @@ def buildFreeform(joints, translatable=False, mirroredTranslate=False, scalable=
 
         ctrl = controllerShape.build(   util.trimName(j) + "_ctrl",
                                 controlSpec['main'],
-                                type=controllerShape.ControlType.TRANSLATE if translatable else controllerShape.ControlType.ROTATE )
+                                type=controllerShape.ControlType.TRANSLATE if translatable else controllerShape.ControlType.ROTATE,
+                                instanced=instanceShapes )
         controls.append( ctrl )
         core.dagObj.matchTo( ctrl, j )
 
@@ -105,6 +107,7 @@ class Freeform(MetaControl):
         ('translatable', ParamInfo( 'Translatable', 'It can translate', ParamInfo.BOOL, default=True)),
         ('scalable', ParamInfo( 'Scalable', 'It can scale', ParamInfo.BOOL, default=False)),
         ('mirroredTranslate', ParamInfo( 'Mirror Translate', 'Translation is also mirrored on mirrored side', ParamInfo.BOOL, default=False)),
+        ('instanceShapes', ParamInfo( 'Instance Shapes', 'Controls share one set of shapes, lighter for long chains', ParamInfo.BOOL, default=False)),
     ] )
 
     @classmethod
@@ -3,7 +3,7 @@ from __future__ import absolute_import, division, print_function
 from collections import OrderedDict
 import math
 
-from pymel.core import curve, cluster, delete, dt, duplicate, expression, group, hide, ikHandle, insertKnotCurve, joint, move, orientConstraint, parent, parentConstraint, pointConstraint, xform
+from pymel.core import createNode, curve, cluster, delete, dt, duplicate, expression, group, hide, ikHandle, insertKnotCurve, joint, move, orientConstraint, parent, parentConstraint, pointConstraint, xform
 
 from ....add import simpleName, shortName
 from .... import core
@@ -11,6 +11,7 @@ from .... import lib
 from .... import nodeApi
 
 from .. import controllerShape
+from .. import rigCost
 from .. import space
 
 from ..cardRigging import MetaControl, ParamInfo
@@ -50,13 +51,28 @@ class TwistStyle:
         return choices
 
 
+class TwistDriver:
+    '''
+    How the twist controls drive the joints, both make the same falloff.
+    '''
+    NODES = 'Nodes'             # A plusMinusAverage per joint, summing shared multiplyDivides
+    EXPRESSION = 'Expression'   # The original, a single expression for all the joints
+    
+    @classmethod
+    def asChoices(cls):
+        choices = OrderedDict()
+        choices[cls.NODES] = cls.NODES
+        choices[cls.EXPRESSION] = cls.EXPRESSION
+        return choices
+
+
 @util.adds('twist', 'stretch')
 @util.defaultspec( {'shape': 'sphere', 'size': 10, 'color': 'blue 0.22'} )
 def buildSplineTwist(start, end, controlCountOrCrv=4, twistInfDist=0, simplifyCurve=True,
     tipBend=True, sourceBend=True, matchOrient=True, allowOffset=True,  # noqa e128
     useLeadOrient=False,  # This is an backwards compatible option, mutually exclusive with matchOrient
     twistStyle=TwistStyle.ADVANCED, duplicateCurve=True,
-    controlOrient=OrientMode.CLOSEST_JOINT,
+    controlOrient=OrientMode.CLOSEST_JOINT, twistDriver=TwistDriver.EXPRESSION,
     name='', groupName='', controlSpec={}):
     '''
     Make a spline controller from `start` to `end`.
@@ -76,6 +92,8 @@ def buildSplineTwist(start, end, controlCountOrCrv=4, twistInfDist=0, simplifyCu
         **NOTE** I think this option only exists to preserve previous builds, this is pretty dumb
         
     :param bool matchOrient: Does trueZero on the start and end.  I'm not sure this makes sense.
+    
+    :param str twistDriver: A `TwistDriver`, how the twist controls drive the joints.
         
     
     
@@ -290,10 +308,10 @@ def buildSplineTwist(start, end, controlCountOrCrv=4, twistInfDist=0, simplifyCu
 
         offsetChain[0].setParent(noInherit)
         hide(offsetChain[0])
-        twists, constraints = addTwistControls( offsetChain, start, end, twistInfDist)
+        twists, constraints = addTwistControls( offsetChain, start, end, twistInfDist, twistDriver )
         finalRigJoint = offsetChain[-1]
     else:
-        twists, constraints = addTwistControls( stretchingChain, start, end, twistInfDist )
+        twists, constraints = addTwistControls( stretchingChain, start, end, twistInfDist, twistDriver )
         finalRigJoint = stretchingChain[-1]
     
     # Constrain the end to the last controller so it doesn't pop off at all,
@@ -398,7 +416,7 @@ def buildSplineTwist(start, end, controlCountOrCrv=4, twistInfDist=0, simplifyCu
     return controls[0], constraints
 
 
-def addTwistControls(controlChain, boundChain, boundEnd, influenceDist=3):
+def addTwistControls(controlChain, boundChain, boundEnd, influenceDist=3, driver=TwistDriver.EXPRESSION):
     '''
     Put a rotation controller under each child of the controlChain to drive .rz
     of the boundChain.  They must both be the same size.
@@ -408,6 +426,7 @@ def addTwistControls(controlChain, boundChain, boundEnd, influenceDist=3):
     :param Joint boundEnd: The last joint in the bound chain, used to address possible branching.
     :param int influenceDist: How many adjacent joints are influenced (total #
         is 2x since it influences both directions).
+    :param str driver: A `TwistDriver`, make the falloff with nodes or an expression.
     '''
     
     obj = controlChain[0]
@@ -468,11 +487,16 @@ def addTwistControls(controlChain, boundChain, boundEnd, influenceDist=3):
     
     axis = util.identifyAxis(controlChain[0].listRelatives(type='joint')[0])
     
-    exp = []
-    for i, spinner in enumerate(groups):
-        exp.append(driverExpression( spinner, bigList[i: i + influenceRange], axis ))
-        
-    expression( s=';\n'.join(exp) )
+    if driver == TwistDriver.EXPRESSION:
+        exp = []
+        for i, spinner in enumerate(groups):
+            exp.append(driverExpression( spinner, bigList[i: i + influenceRange], axis ))
+            
+        expression( s=';\n'.join(exp) )
+    else:
+        scaled = ScaledRotations(axis)
+        for i, spinner in enumerate(groups):
+            driverNetwork( spinner, bigList[i: i + influenceRange], axis, scaled )
     
     return controls, util.ConstraintResults( pointConstraints[0], orientConstraints[0] )
 
@@ -503,6 +527,8 @@ class SplineTwist(MetaControl):
             ParamInfo( 'Allow Offset', 'If you Simplyify Curve, the joints will slightly shift unless you Allow Offset or the joints are straight', ParamInfo.BOOL, default=False) ),
         ('twistStyle',
             ParamInfo( 'Twist Style', '0 = advanced, 1=x, 2=-x 3=y ...', ParamInfo.ENUM, enum=TwistStyle.asChoices(), default=TwistStyle.ADVANCED ) ),
+        ('twistDriver',
+            ParamInfo( 'Twist Driver', 'Expression is the original setup, Nodes (opt in) can evaluate in parallel', ParamInfo.ENUM, enum=TwistDriver.asChoices(), default=TwistDriver.EXPRESSION ) ),
         
         ('name',
             ParamInfo( 'Name', 'Name', ParamInfo.STR, '')),
@@ -597,6 +623,60 @@ def driverExpression( driven, controls, axis ):
 
 
 
+class ScaledRotations(object):
+    '''
+    Makes (and reuses) plugs of a control's rotation times a falloff power, so
+    each control only gets one multiplyDivide per 3 distinct powers.
+    '''
+    
+    def __init__(self, axis):
+        self.axis = axis
+        self.plugs = {}  # (ctrl name, power): plug
+        self.nodes = {}  # ctrl name: (multiplyDivide, channels used)
+    
+    def get(self, ctrl, power):
+        if power == 1.0:
+            return ctrl.attr('r' + self.axis)
+        
+        key = (ctrl.name(), power)
+        if key not in self.plugs:
+            node, used = self.nodes.get( ctrl.name(), (None, 3) )
+            if used == 3:
+                node = createNode('multiplyDivide', n='twistFalloff')
+                used = 0
+            
+            channel = 'XYZ'[used]
+            ctrl.attr('r' + self.axis) >> node.attr('input1' + channel)
+            node.attr('input2' + channel).set(power)
+            
+            self.nodes[ctrl.name()] = (node, used + 1)
+            self.plugs[key] = node.attr('output' + channel)
+        
+        return self.plugs[key]
+
+
+def driverNetwork( driven, controls, axis, scaled=None ):
+    '''
+    Node version of `driverExpression`, the `driven` node's rotation on the
+    axis is the sum of the `controls` rotations weighted by `calcInfluence`.
+    
+    :param ScaledRotations scaled: Pass the same one for all the driven nodes
+        to share the weighted rotations.
+    '''
+    if scaled is None:
+        scaled = ScaledRotations(axis)
+    
+    total = createNode('plusMinusAverage', n='twistSum')
+    i = 0
+    for power, ctrl in zip(calcInfluence(controls), controls):
+        if ctrl:
+            scaled.get(ctrl, power) >> total.input1D[i]
+            i += 1
+    
+    total.output1D >> driven.attr('r' + axis)
+    return total
+
+
 def calcInfluence( controls ):
     '''
     Given a list (Maybe change to a number?) returns a list of power falloffs.
@@ -633,3 +713,12 @@ def calcInfluence( controls ):
         powers[upCtrl] = power
 
     return powers
+
+
+def compareTwistDrivers(card, start=None, end=None):
+    '''
+    Returns {driver: playback fps} of the SplineTwist card rebuilt with each
+    `TwistDriver`, see `rigCost.compareParam`.  Use a long tail for a
+    meaningful difference.
+    '''
+    return rigCost.compareParam( card, 'twistDriver', list(TwistDriver.asChoices().values()), start, end )
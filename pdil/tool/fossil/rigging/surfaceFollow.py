@@ -3,7 +3,8 @@ from __future__ import absolute_import, division, print_function
 from collections import OrderedDict
 from functools import partial
 
-from pymel.core import dt, geometryConstraint, normalConstraint, pointConstraint, spaceLocator, xform
+from maya.api import OpenMaya
+from pymel.core import createNode, dt, geometryConstraint, group, hide, normalConstraint, pointConstraint, spaceLocator, xform
 
 from .... import core
 from .... import lib
@@ -12,6 +13,7 @@ from .... import nodeApi
 from ..cardRigging import MetaControl, ParamInfo, OutputControls, colorParity
 from .. import controllerShape
 from .. import log
+from .. import rigCost
 from .. import space
 
 from . import _util as util
@@ -22,12 +24,129 @@ def getUpVectors(j):
     return dt.Vector(0, 0, 1), dt.Vector(0, 0, 1)
 
 
+class Attach:
+    CONSTRAINT = 'Constraint'   # geometry and normal constraint, projects every evaluation
+    FOLLICLE = 'Follicle'       # follicle with parameters found at build time
+    
+    @classmethod
+    def asChoices(cls):
+        choices = OrderedDict()
+        choices[cls.CONSTRAINT] = cls.CONSTRAINT
+        choices[cls.FOLLICLE] = cls.FOLLICLE
+        return choices
+
+
+class SurfaceParams(object):
+    '''
+    Finds the follicle (normalized) parameters closest to world positions on a
+    mesh (via its uvs) or nurbs surface.
+    '''
+    
+    def __init__(self, shape):
+        sel = OpenMaya.MSelectionList()
+        sel.add( shape.longName() )
+        path = sel.getDagPath(0)
+        
+        self.isMesh = shape.type() == 'mesh'
+        if self.isMesh:
+            self.fn = OpenMaya.MFnMesh(path)
+        else:
+            self.fn = OpenMaya.MFnNurbsSurface(path)
+            self.uRange = self.fn.knotDomainInU
+            self.vRange = self.fn.knotDomainInV
+    
+    def at(self, pos):
+        point = OpenMaya.MPoint( pos[0], pos[1], pos[2] )
+        if self.isMesh:
+            u, v = self.fn.getUVAtPoint(point, OpenMaya.MSpace.kWorld)[:2]
+            return u, v
+        
+        _, u, v = self.fn.closestPoint(point, space=OpenMaya.MSpace.kWorld)
+        return ( (u - self.uRange[0]) / (self.uRange[1] - self.uRange[0]),
+                 (v - self.vRange[0]) / (self.vRange[1] - self.vRange[0]) )
+    
+    def linearized(self, pos, step=0.1):
+        '''
+        Returns the (u, v) at pos and the rate each changes per world unit along
+        x, y and z, so nearby parameters are u + du.dot(offset).
+        '''
+        u, v = self.at(pos)
+        du = []
+        dv = []
+        for axis in range(3):
+            moved = list(pos)
+            moved[axis] += step
+            u2, v2 = self.at(moved)
+            du.append( (u2 - u) / step )
+            dv.append( (v2 - v) / step )
+        
+        return (u, v), du, dv
+
+
+def _dot(plug, vector, offset):
+    # Returns a plug of plug.dot(vector) + offset
+    dot = createNode('vectorProduct')
+    dot.operation.set(1)
+    plug >> dot.input1
+    dot.input2.set(vector)
+    
+    add = createNode('addDoubleLinear')
+    dot.outputX >> add.input1
+    add.input2.set(offset)
+    return add.output
+
+
+def follicleAttach(surfaceShape, params, pos, parent):
+    '''
+    Returns the transform of a follicle on the surface, closest to `pos`, using
+    `params`, a `SurfaceParams`.  The parent must not inherit transforms.
+    '''
+    follicle = createNode('follicle')
+    hide(follicle)
+    trans = follicle.getParent()
+    trans.setParent(parent)
+    
+    if params.isMesh:
+        surfaceShape.outMesh >> follicle.inputMesh
+    else:
+        surfaceShape.local >> follicle.inputSurface
+    surfaceShape.worldMatrix[0] >> follicle.inputWorldMatrix
+    
+    u, v = params.at(pos)
+    follicle.parameterU.set(u)
+    follicle.parameterV.set(v)
+    
+    follicle.outTranslate >> trans.translate
+    follicle.outRotate >> trans.rotate
+    trans.translate.lock()
+    trans.rotate.lock()
+    
+    return trans
+
+
+def slideFollicle(follicleTrans, driver, params, pos):
+    '''
+    Drives the follicle's parameters by the `driver`'s world position, via the
+    closest point at `pos` and its rate of change, so nearby movement slides
+    along the surface without projecting every evaluation.
+    '''
+    follicle = follicleTrans.getShape()
+    (u, v), du, dv = params.linearized(pos)
+    
+    worldPos = createNode('decomposeMatrix')
+    driver.worldMatrix[0] >> worldPos.inputMatrix
+    
+    start = dt.Vector(pos)
+    _dot( worldPos.outputTranslate, du, u - start.dot(dt.Vector(du)) ) >> follicle.parameterU
+    _dot( worldPos.outputTranslate, dv, v - start.dot(dt.Vector(dv)) ) >> follicle.parameterV
+
+
 @util.adds()
 @util.defaultspec( {'shape': 'box',     'size': 10, 'color': 'blue  0.22'},
             manual={'shape': 'pin',     'size':  3, 'color': 'green 0.22', 'align': 'nx'},
             offset={'shape': 'band',    'size':  5, 'color': 'green 0.22', 'align': 'nx'}
  )
-def buildSurfaceFollow(joints, groupOrigin, surface=None, controlSpec={}):
+def buildSurfaceFollow(joints, groupOrigin, surface=None, attach=Attach.CONSTRAINT, controlSpec={}):
     
     groupOrigin = dt.Vector(groupOrigin)
     container = util.parentGroup(joints[0])
@@ -47,23 +166,37 @@ def buildSurfaceFollow(joints, groupOrigin, surface=None, controlSpec={}):
     
     core.dagObj.zero(mainCtrl)
     
+    useFollicles = attach == Attach.FOLLICLE
+    if useFollicles:
+        surfaceShape = surface.getShape() if surface.type() == 'transform' else surface
+        params = SurfaceParams(surfaceShape)
+        
+        # Follicles output world transforms
+        follicleGrp = group(em=True, n='follicles', p=container)
+        follicleGrp.inheritsTransform.set(0)
+    
     subControls = []
     locs = []
     offsets = []
     for i, j in enumerate(joints):
-        loc = spaceLocator()
-        locs.append( loc )
-        core.dagObj.matchTo(loc, j)
-        
-        geometryConstraint(surface, loc)
-        
-        objUp, worldObjUp = getUpVectors(j)
+        if useFollicles:
+            pos = xform(j, q=True, ws=True, t=True)
+            loc = follicleAttach(surfaceShape, params, pos, follicleGrp)
+        else:
+            loc = spaceLocator()
+            core.dagObj.matchTo(loc, j)
+            
+            geometryConstraint(surface, loc)
+            
+            objUp, worldObjUp = getUpVectors(j)
+            
+            normalConstraint(surface, loc,
+                wuo=mainCtrl,
+                wut='objectrotation',
+                upVector=objUp,
+                worldUpVector=worldObjUp)
         
-        normalConstraint(surface, loc,
-            wuo=mainCtrl,
-            wut='objectrotation',
-            upVector=objUp,
-            worldUpVector=worldObjUp)
+        locs.append( loc )
 
         offsetCtrl = controllerShape.build( util.trimName(j) + 'Offset_ctrl',
                                             controlSpec['offset'],
@@ -87,13 +220,17 @@ def buildSurfaceFollow(joints, groupOrigin, surface=None, controlSpec={}):
         
         core.dagObj.zero(subCtrl)
         
-        pointConstraint(subCtrl, loc)
+        if useFollicles:
+            slideFollicle(loc, subCtrl, params, pos)
+        else:
+            pointConstraint(subCtrl, loc)
         
         core.dagObj.lockRot(subCtrl)
         core.dagObj.lockScale(subCtrl)
         core.dagObj.lockScale(offsetCtrl)
         
-        loc.setParent(subCtrl)
+        if not useFollicles:
+            loc.setParent(subCtrl)
         
         space.add( offsetCtrl, loc, spaceName='surface')
         
@@ -114,6 +251,7 @@ class SurfaceFollow(MetaControl):
     ik_ = 'pdil.tool.fossil.rigging.surfaceFollow.buildSurfaceFollow'
     ikInput = OrderedDict( [
         ('surface', ParamInfo('Mesh', 'The surface to follow', ParamInfo.NODE_0)),
+        ('attach', ParamInfo('Attach', 'Constraint projects onto the surface every evaluation, Follicle finds the surface parameters at build time and is much cheaper', ParamInfo.ENUM, default=Attach.CONSTRAINT, enum=Attach.asChoices())),
         #('rangeMin', ParamInfo( 'Min Range', 'Lower bounds of the keyable attr.', ParamInfo.FLOAT, -5.0)),
         #('rangeMax', ParamInfo( 'Max Range', 'Upper bounds of the keyable attr.', ParamInfo.FLOAT, 5.0)),
         #('scaleMin', ParamInfo( 'Shrink Value', 'When the attr is at the lower bounds, scale it to this amount.', ParamInfo.FLOAT, .5)),
@@ -206,4 +344,12 @@ class SurfaceFollow(MetaControl):
                     squashers = cls.getExtraControls(ctrl)
                     for squasher, crv in zip(squashers, curves):
                         lib.anim.applySetDrivenKeys(squasher, crv)
-    """
\ No newline at end of file
+    """
+
+
+def compareAttachModes(card, start=None, end=None):
+    '''
+    Returns {mode: playback fps} of the SurfaceFollow card rebuilt with each
+    attach mode, see `rigCost.compareParam`.
+    '''
+    return rigCost.compareParam( card, 'attach', list(Attach.asChoices().values()), start, end )
@@ -729,7 +729,11 @@ def getTargetInfo(ctrl):
     
     if not ctrl.hasAttr(ENUM_ATTR):
         return []
-        
+
+    targetChoice = getMatrixNetwork(ctrl)
+    if targetChoice:
+        return _getMatrixTargetInfo(ctrl, targetChoice)
+
     conditions = ctrl.attr(ENUM_ATTR).listConnections( type='condition' )
     
     if conditions:
@@ -835,6 +839,20 @@ def remove(control, spaceName, shuffleRemove=False):
     names = getNames(control)
     
     index = names.index(spaceName)
+
+    targetChoice = getMatrixNetwork(control)
+    if targetChoice:
+        names.remove( spaceName )
+        if shuffleRemove:
+            names.append( 'DELETE' )
+        
+        if not names:
+            delete( _matrixNetworkNodes(targetChoice) )
+            control.deleteAttr(ENUM_ATTR)
+        else:
+            _removeMatrixTarget(targetChoice, index)
+            setNames( control, names )
+        return
     
     conditionToDelete = None
     plugToDelete = None
@@ -883,9 +901,13 @@ def removeAll(control):
     if not names:
         return
     
-    spaceGrp = core.dagObj.zero(control, apply=False)
-    
-    delete( parentConstraint(spaceGrp, q=True) )
+    targetChoice = getMatrixNetwork(control)
+    if targetChoice:
+        delete( _matrixNetworkNodes(targetChoice) )
+    else:
+        spaceGrp = core.dagObj.zero(control, apply=False)
+        
+        delete( parentConstraint(spaceGrp, q=True) )
     
     '''
     for i, condition in enumerate(control.listConnections( type='condition' )):
@@ -901,6 +923,260 @@ def removeAll(control):
             control.deleteAttr(name)
 
 
+#------------------------------------------------------------------------------
+# Matrix based spaces.  Instead of a parentConstraint with a condition per
+# target, the enum drives two `choice` nodes, one picking the true target's
+# worldMatrix and one the offset to it, which are multiplied into the space
+# group's parent space and decomposed onto it.  It is always 4 nodes, no matter
+# how many spaces there are, and only the active target is evaluated.
+def getMatrixNetwork(control):
+    '''
+    Returns the target `choice` node if the control uses matrix spaces.
+    '''
+    if not control.hasAttr(ENUM_ATTR):
+        return None
+    
+    for node in control.attr(ENUM_ATTR).listConnections(type='choice'):
+        if node.hasAttr('spaceOffset'):
+            return node
+    
+    return None
+
+
+def isMatrixSpace(control):
+    return bool(getMatrixNetwork(control))
+
+
+def _matrixNetworkNodes(targetChoice):
+    '''
+    Returns all the nodes making up the matrix space network, target choice first.
+    '''
+    nodes = [targetChoice]
+    for localize in targetChoice.output.listConnections(type='multMatrix'):
+        nodes.append(localize)
+        nodes += localize.matrixIn[0].listConnections(type='choice')
+        nodes += localize.matrixSum.listConnections(type='decomposeMatrix')
+    return nodes
+
+
+def _getOffsetChoice(targetChoice):
+    localize = targetChoice.output.listConnections(type='multMatrix')[0]
+    return localize.matrixIn[0].listConnections(type='choice')[0]
+
+
+def _buildMatrixNetwork(control, space):
+    '''
+    Makes the matrix space network driving the `space` group of the `control`,
+    returning the target choice node.
+    '''
+    name = simpleName(control)
+
+    targetChoice = createNode('choice', n=name + '_spaceTargets')
+    targetChoice.addAttr('spaceOffset', at='matrix', m=True)
+    targetChoice.addAttr('spaceType', at='long', m=True)
+
+    offsetChoice = createNode('choice', n=name + '_spaceOffsets')
+    localize = createNode('multMatrix', n=name + '_spaceMatrix')
+    decompose = createNode('decomposeMatrix', n=name + '_spaceDecompose')
+
+    control.attr(ENUM_ATTR) >> targetChoice.selector
+    control.attr(ENUM_ATTR) >> offsetChoice.selector
+
+    # world = offset * target world, then brought into the space group's parent space.
+    offsetChoice.output >> localize.matrixIn[0]
+    targetChoice.output >> localize.matrixIn[1]
+    space.parentInverseMatrix[0] >> localize.matrixIn[2]
+
+    localize.matrixSum >> decompose.inputMatrix
+    space.rotateOrder >> decompose.inputRotateOrder
+    decompose.outputTranslate >> space.t
+    decompose.outputRotate >> space.r
+
+    return targetChoice
+
+
+def _addMatrixTargets(control, space, built):
+    '''
+    Adds the (trueTarget, spaceName, mode) entries of `built` to the matrix
+    network, making it if needed.  The enum attr must already exist.
+    '''
+    targetChoice = getMatrixNetwork(control)
+    if not targetChoice:
+        targetChoice = _buildMatrixNetwork(control, space)
+    
+    offsetChoice = _getOffsetChoice(targetChoice)
+
+    start = targetChoice.input.numElements()
+    spaceWorld = space.worldMatrix[0].get()
+    
+    for i, (trueTarget, spaceName, mode) in enumerate(built, start):
+        # Equivalent to the maintain offset of a parentConstraint
+        targetChoice.spaceOffset[i].set( spaceWorld * trueTarget.worldInverseMatrix[0].get() )
+        targetChoice.spaceType[i].set( mode )
+        
+        trueTarget.worldMatrix[0] >> targetChoice.input[i]
+        targetChoice.spaceOffset[i] >> offsetChoice.input[i]
+
+
+def _removeMatrixTarget(targetChoice, index):
+    '''
+    Removes the target at `index`, shifting the later ones down to match the enum.
+    '''
+    offsetChoice = _getOffsetChoice(targetChoice)
+    count = targetChoice.input.numElements()
+    
+    for i in range(index, count - 1):
+        _moveMatrixTarget(targetChoice, i + 1, i)
+
+    last = count - 1
+    removeMultiInstance( offsetChoice.input[last], b=True )
+    removeMultiInstance( targetChoice.input[last], b=True )
+    removeMultiInstance( targetChoice.spaceOffset[last], b=True )
+    removeMultiInstance( targetChoice.spaceType[last], b=True )
+
+
+def _moveMatrixTarget(targetChoice, src, dest):
+    source = targetChoice.input[src].listConnections(p=True)
+    if source:
+        source[0] >> targetChoice.input[dest]
+    else:
+        targetChoice.input[dest].disconnect()
+
+    targetChoice.spaceOffset[dest].set( targetChoice.spaceOffset[src].get() )
+    targetChoice.spaceType[dest].set( targetChoice.spaceType[src].get() )
+
+
+def _swapMatrixTargets(targetChoice, indexA, indexB):
+    sourceA = targetChoice.input[indexA].listConnections(p=True)
+    offsetA = targetChoice.spaceOffset[indexA].get()
+    typeA = targetChoice.spaceType[indexA].get()
+
+    _moveMatrixTarget(targetChoice, indexB, indexA)
+
+    if sourceA:
+        sourceA[0] >> targetChoice.input[indexB]
+    else:
+        targetChoice.input[indexB].disconnect()
+    targetChoice.spaceOffset[indexB].set( offsetA )
+    targetChoice.spaceType[indexB].set( typeA )
+
+
+def _getMatrixTargetInfo(ctrl, targetChoice):
+    '''
+    `getTargetInfo()` for matrix spaces.
+    '''
+    global _targetInfoConstraints
+    
+    targetAndType = []
+    _targetInfoConstraints = []
+    for i in range(targetChoice.input.numElements()):
+        spaceType = targetChoice.spaceType[i].get()
+        trueTarget = targetChoice.input[i].listConnections()
+        extra = None
+        constraint = None
+        if trueTarget:
+            target, extra, constraint = Mode.getTargets(spaceType, trueTarget[0])
+
+            if isinstance(target, PyNode) and target.hasAttr('externalTarget'):
+                extra = 'external'
+        else:
+            target = None
+            
+        targetAndType.append( (target, spaceType, extra) )
+        _targetInfoConstraints.append(constraint)
+    
+    return [ SpaceTarget(name, target, type, extra) for name, (target, type, extra) in zip( getNames(ctrl), targetAndType ) ]
+
+
+def convertToMatrix(control):
+    '''
+    Replaces the parentConstraint and conditions driving the control's spaces
+    with a matrix network, reusing the existing true targets.
+    '''
+    if not control.hasAttr(ENUM_ATTR) or isMatrixSpace(control):
+        return
+
+    conditions = control.attr(ENUM_ATTR).listConnections( type='condition' )
+    if not conditions:
+        return
+
+    space = core.dagObj.zero(control, apply=False)
+    constraint = PyNode(parentConstraint(space, q=True))
+    targetPlugs = list(zip(constraint.getTargetList(), constraint.getWeightAliasList()))
+
+    current = control.attr(ENUM_ATTR).get()
+
+    # Record where each space puts the space group so the offsets match exactly.
+    spaces = {}
+    for condition in conditions:
+        plug = condition.outColorR.listConnections(p=True)
+        if not plug:
+            continue
+        
+        for trueTarget, weightPlug in targetPlugs:
+            if weightPlug == plug[0]:
+                break
+        else:
+            continue
+        
+        index = int(condition.secondTerm.get())
+        control.attr(ENUM_ATTR).set(index)
+        spaces[index] = (trueTarget, space.worldMatrix[0].get(), condition.spaceType.get())
+
+    control.attr(ENUM_ATTR).set(current)
+
+    delete( [constraint] + conditions )
+
+    targetChoice = _buildMatrixNetwork(control, space)
+    offsetChoice = _getOffsetChoice(targetChoice)
+    for index, (trueTarget, spaceWorld, mode) in spaces.items():
+        targetChoice.spaceOffset[index].set( spaceWorld * trueTarget.worldInverseMatrix[0].get() )
+        targetChoice.spaceType[index].set( mode )
+        
+        trueTarget.worldMatrix[0] >> targetChoice.input[index]
+        targetChoice.spaceOffset[index] >> offsetChoice.input[index]
+
+
+def comparePlayback(controlCount=20, spaceCount=10, frames=200):
+    '''
+    Builds two test setups of `controlCount` controls, each with `spaceCount`
+    spaces on animated targets, one with constraints and one with matrix
+    networks, and returns the playback fps and node count of each, ex:
+        {'constraint': (fps, nodes), 'matrix': (fps, nodes)}
+    
+    Everything is deleted afterwards.
+    '''
+    results = {}
+    
+    with core.time.PreserveCurrentTime():
+        for useMatrix in (False, True):
+            root = group(em=True, n='spaceBenchmark')
+            
+            targets = []
+            for i in range(spaceCount):
+                target = group(em=True, n='spaceBenchmark_target%i' % i, p=root)
+                setKeyframe(target, at='tx', t=0, v=0)
+                setKeyframe(target, at='tx', t=frames, v=i + 1)
+                setKeyframe(target, at='ry', t=0, v=0)
+                setKeyframe(target, at='ry', t=frames, v=90)
+                targets.append(target)
+
+            before = len(ls(dep=True))
+            for i in range(controlCount):
+                ctrl = group(em=True, n='spaceBenchmark_ctrl%i' % i, p=root)
+                core.dagObj.zero(ctrl)
+                addMany(ctrl, [SpaceSpec(t, simpleName(t), Mode.ROTATE_TRANSLATE, None) for t in targets], matrix=useMatrix)
+            nodeCount = len(ls(dep=True)) - before
+            
+            results['matrix' if useMatrix else 'constraint'] = (core.time.playbackFps(0, frames), nodeCount)
+            
+            delete(root)
+            
+    return results
+    
+#------------------------------------------------------------------------------
+
+
 def _applyDefaults(kwargs, **defaults):
     '''
     Helper for convenience space adding attrs to process inputs and only apply
@@ -963,7 +1239,7 @@ def addTrueWorld(control, *args, **kwargs):
     add( control, getTrueWorld(), 'world', *args, **kwargs )
 
 
-def addUserDriven(control, spaceName):
+def addUserDriven(control, spaceName, matrix=False):
     targetName = simpleName(control) + '_' + spaceName
     userGroup = getGroup(USER_TARGET)
     
@@ -976,12 +1252,12 @@ def addUserDriven(control, spaceName):
     core.dagObj.matchTo(trueTarget, control)
     core.dagObj.align(trueTarget, make=True)
     
-    add(control, trueTarget, spaceName, mode=Mode.USER)
+    add(control, trueTarget, spaceName, mode=Mode.USER, matrix=matrix)
     
     return trueTarget
 
 
-def add(control, target, spaceName='', mode=Mode.ROTATE_TRANSLATE, enum=True, rotateTarget=None, external=None):
+def add(control, target, spaceName='', mode=Mode.ROTATE_TRANSLATE, enum=True, rotateTarget=None, external=None, matrix=False):
     '''
     Concerns::
         Does rotate only handle being applied repeatedly without issues?
@@ -996,6 +1272,10 @@ def add(control, target, spaceName='', mode=Mode.ROTATE_TRANSLATE, enum=True, ro
         * Validate the name will be unique
         * When adding a space, there probably should be a more robust way to
             check for the index to add, not just using the length of existing targets.
+
+    :param bool matrix: Build the space with a matrix network instead of a
+        parentConstraint, converting any existing spaces.  Controls that
+        already have matrix spaces always get them.
     '''
 
     # Early outs
@@ -1033,6 +1313,17 @@ def add(control, target, spaceName='', mode=Mode.ROTATE_TRANSLATE, enum=True, ro
         if not spaceName:
             spaceName = simpleName(target)
 
+        if enum and (matrix or isMatrixSpace(control)):
+            existingNames = getNames(control) + [spaceName]
+            if not control.hasAttr(ENUM_ATTR):
+                control.addAttr( ENUM_ATTR, at='enum', enumName='FAKE', k=True )
+            else:
+                convertToMatrix(control)
+            
+            setNames(control, existingNames)
+            _addMatrixTargets(control, space, [(trueTarget, spaceName, mode)])
+            return
+
         existingTargets = parentConstraint( space, q=True, tl=True)
 
         constraint = parentConstraint( trueTarget, space, mo=True )
@@ -1064,6 +1355,90 @@ def add(control, target, spaceName='', mode=Mode.ROTATE_TRANSLATE, enum=True, ro
             control.attr(name) >> constraintAttr
 
 
+SpaceSpec = collections.namedtuple( 'SpaceSpec', 'target name mode rotateTarget' )
+
+
+def addMany(control, specs, matrix=False):
+    '''
+    Bulk version of `add()`, taking a list of `SpaceSpec`s.  Every true target
+    is built first, then they are all added to the space group's constraint
+    in a single call and the enum names are only set once, instead of
+    rewiring the constraint and enum for each space.
+
+    :param bool matrix: Same as `add()`, use a matrix network instead of a constraint.
+    '''
+    existing = [ (info.type, info.target) for info in getTargetInfo(control) ]
+
+    toBuild = []
+    for spec in specs:
+        if not spec.target:
+            print( "No target specified")
+            continue
+
+        if (spec.mode, spec.target) in existing:
+            print( "Target already exists", spec.mode, spec.target)
+            continue
+
+        existing.append( (spec.mode, spec.target) )
+        toBuild.append( spec )
+
+    if not toBuild:
+        return
+
+    translateLocked = control.tx.isLocked() and control.ty.isLocked() and control.tz.isLocked()
+    rotateLocked = control.rx.isLocked() and control.ry.isLocked() and control.rz.isLocked()
+
+    with core.dagObj.TemporaryUnlock(control, trans=not translateLocked, rot=not rotateLocked):
+        space = core.dagObj.zero(control, apply=False)
+
+        built = []
+        for spec in toBuild:
+            mode = spec.mode
+            # If the control can't translate, make sure the mode is rotate-only.
+            if translateLocked and mode is not Mode.MULTI_ORIENT:
+                mode = Mode.ROTATE
+
+            trueTarget, spaceName = Mode.build(mode, spec.target, spec.name, getGroup(mode), spec.rotateTarget, control, space)
+            if not spaceName:
+                spaceName = simpleName(spec.target)
+
+            built.append( (trueTarget, spaceName, mode) )
+
+        names = getNames(control) + [spaceName for _, spaceName, _ in built]
+
+        if matrix or isMatrixSpace(control):
+            if not control.hasAttr(ENUM_ATTR):
+                control.addAttr( ENUM_ATTR, at='enum', enumName='FAKE', k=True )
+            else:
+                convertToMatrix(control)
+
+            setNames(control, names)
+            _addMatrixTargets(control, space, built)
+            return
+
+        startIndex = len(parentConstraint( space, q=True, tl=True) or [])
+
+        constraint = parentConstraint( [trueTarget for trueTarget, _, _ in built], space, mo=True )
+        # Match plugs by target since the constraint might not have been empty
+        weightPlugs = dict( zip(constraint.getTargetList(), constraint.getWeightAliasList()) )
+
+        if not control.hasAttr(ENUM_ATTR):
+            control.addAttr( ENUM_ATTR, at='enum', enumName='FAKE', k=True )
+
+        setNames(control, names)
+
+        for i, (trueTarget, spaceName, mode) in enumerate(built, startIndex):
+            switch = createNode('condition')
+            switch.rename( 's_%i_to_%s' % (i, spaceName) )
+            switch.secondTerm.set( i )
+            switch.colorIfTrue.set(1, 1, 1)
+            switch.colorIfFalse.set(0, 0, 0)
+            switch.addAttr( 'spaceType', at='long', dv=mode )
+
+            control.attr( ENUM_ATTR ) >> switch.firstTerm
+            switch.outColorR >> weightPlugs[trueTarget]
+
+
 def swap(ctrl, spaceAIndex, spaceBIndex):
     '''
     Swap the spaces on `ctrl` by index
@@ -1085,6 +1460,11 @@ def swap(ctrl, spaceAIndex, spaceBIndex):
     names[spaceBIndex] = temp
     
     setNames( ctrl, names )
+
+    targetChoice = getMatrixNetwork(ctrl)
+    if targetChoice:
+        _swapMatrixTargets(targetChoice, spaceAIndex, spaceBIndex)
+        return
         
     conditions = ctrl.attr(ENUM_ATTR).listConnections( type='condition' )
     
@@ -1103,24 +1483,18 @@ def switchRange(control, targetSpace, range=(None, None)):
     '''
     attrs = [ENUM_ATTR] + [t + a for t in 'tr' for a in 'xyz']
     curTime = currentTime(q=True)
-    times = keyframe( control, at=attrs, q=True, tc=True)
-    times = sorted(set(times))
-    if range[0] is not None and range[1] is not None:
-        times = [ t for t in times if range[0] <= t <= range[1] ]
-    elif range[0]:
-        times = [ t for t in times if range[0] <= t ]
-    elif range[1]:
-        times = [ t for t in times if t <= range[1] ]
-    
-    if not times:
-        switchToSpace( control, targetSpace )
-        return
-    
-    # Set initial keys if needed so insert=True works later
-    for attr in attrs:
-        if not keyframe( control.attr(attr), q=True, tc=True ):
-            control.attr(attr).setKey(t=times[0])
-            control.attr(attr).setKey(t=times[-1])
+    with lib.anim.getKeyTimeIndex() as keyTimes:
+        times = keyTimes.times( [control], attrs, range[0], range[1] )
+        
+        if not times:
+            switchToSpace( control, targetSpace )
+            return
+        
+        # Set initial keys if needed so insert=True works later
+        for attr in attrs:
+            if not keyTimes.times( [control.attr(attr)] ):
+                control.attr(attr).setKey(t=times[0])
+                control.attr(attr).setKey(t=times[-1])
     
     for t in times:
         control.t.setKey(insert=True, t=t )
@@ -1180,6 +1554,7 @@ def serializeSpaces(control):
         ]
 
     Targets are encoded with both the full name and the cardPath if there is one.
+    Spaces using a matrix network (see `add()`) also have 'matrix': True.
 
     ..  todo:: The external system needs to be fully fleshed out.  Right now you
         can only specify a single external target.  But maybe that's all we'll
@@ -1207,6 +1582,7 @@ def serializeSpaces(control):
     '''
 
     targets = []
+    matrix = isMatrixSpace(control)
     for spaceInfo in getTargetInfo(control):
         if not spaceInfo.target:
             raise Exception("{0}'s space {1} doesn't have a target".format(control, spaceInfo.name))
@@ -1227,23 +1603,89 @@ def serializeSpaces(control):
             if spaceInfo.extra:
                 targets[-1]['extra'] = spaceInfo.extra
 
+        if matrix:
+            targets[-1]['matrix'] = True
+
     return targets
 
 
-def deserializeSpaces(control, data):
+class TargetResolver(object):
+    '''
+    Resolves the targets stored by `serializeSpaces()`, caching everything so
+    restoring spaces on many controls only scans the cards once.
+
+    Card paths are evaluated against a lookup table of the cards instead of
+    `util.FIND`, which loops over every card for each target.
+    '''
+
+    def __init__(self):
+        self.cardsById = {}
+        self.cardsByName = {}
+        for card in core.findNode.allCards():
+            data = card.rigData
+            if 'id' in data:
+                self.cardsById.setdefault(data['id'], card)
+            self.cardsByName.setdefault(card.name(), card)
+
+        self._targets = {}
+        self._external = {}
+
+    def find(self, name, cardId=util.BLANK):
+        '''
+        Drop in replacement for `util.FIND`.
+        '''
+        if cardId is not util.BLANK and cardId in self.cardsById:
+            return self.cardsById[cardId]
+
+        return self.cardsByName.get(name)
+
+    def resolve(self, target):
+        '''
+        Returns the PyNode for the serialized (name, cardPath) pair, or None.
+        '''
+        key = tuple(target)
+        if key not in self._targets:
+            name, path = key
+            obj = None
+            if objExists(name):
+                obj = PyNode(name)
+            elif path and path.startswith('FIND('):
+                try:
+                    obj = eval(path, {'FIND': self.find})
+                except Exception:
+                    obj = None
+
+            self._targets[key] = obj
+
+        return self._targets[key]
+
+    def external(self, proxyName):
+        if proxyName not in self._external:
+            self._external[proxyName] = getExternalProxy(proxyName)
+        return self._external[proxyName]
+
+
+def deserializeSpaces(control, data, resolver=None):
     '''
     Apply spaces obtained from `serializeSpaces()` to the given control.
+
+    All the targets are resolved before anything is built, then consecutive
+    spaces are built together via `addMany()`.
+
+    :param TargetResolver resolver: Pass one in to share its lookups across
+        several controls, otherwise a new one is made.
     '''
+    if resolver is None:
+        resolver = TargetResolver()
+
     errors = []
+    pending = []
+    matrix = any( isinstance(spaceInfo, dict) and spaceInfo.get('matrix') for spaceInfo in data )
 
-    def parseTarget(target):
-        if objExists(target[0]):
-            return PyNode(target[0])
-        elif target[1]:
-            obj = util.fromCardPath(target[1])
-            if obj:
-                return obj
-        return None
+    def flush():
+        if pending:
+            addMany(control, pending, matrix=matrix)
+            del pending[:]
 
     for spaceInfo in data:
         if isinstance(spaceInfo, dict):
@@ -1251,12 +1693,15 @@ def deserializeSpaces(control, data):
             type = spaceInfo['type']
 
             if type == Mode.USER:
+                # User spaces build their own target so everything before it must exist first.
+                flush()
+                
                 # Delete the existing object if it exists.
                 userGroup = getGroup(USER_TARGET)
                 if target in userGroup.listRelatives():
                     delete(target.getParent())
                     
-                target = addUserDriven(control, name)
+                target = addUserDriven(control, name, matrix=matrix)
                 
                 # Rebuild the constraints on it.
                 for constraintType, data in spaceInfo['extra']['main']:
@@ -1267,43 +1712,41 @@ def deserializeSpaces(control, data):
                     getattr(core.constraints, constraintType + 'Deserialize')(align, data)
 
             elif 'target' in spaceInfo:
-                external = None
                 if 'extra' in spaceInfo and spaceInfo['extra'] == 'external':
-                    target = getExternalProxy(spaceInfo['target'][0])
-                    external = True
+                    target = resolver.external(spaceInfo['target'][0])
                 else:
-                    target = parseTarget(spaceInfo['target'])
+                    target = resolver.resolve(spaceInfo['target'])
 
                 if target:
-                    add( control, target, name, mode=type, external=external )
+                    pending.append( SpaceSpec(target, name, type, None) )
                 else:
                     errors.append( str(spaceInfo['target']) )
 
             elif type in [Mode.MULTI_PARENT, Mode.MULTI_ORIENT, Mode.FREEFORM]:
-                targets = [parseTarget(t) for t in spaceInfo['targets']]
-                add( control, targets, name, mode=type, rotateTarget=spaceInfo['extra'] )
+                targets = [resolver.resolve(t) for t in spaceInfo['targets']]
+                pending.append( SpaceSpec(targets, name, type, spaceInfo['extra']) )
             else:
-                target1 = parseTarget(spaceInfo['targets'][0])
-                target2 = parseTarget(spaceInfo['targets'][1])
+                target1 = resolver.resolve(spaceInfo['targets'][0])
+                target2 = resolver.resolve(spaceInfo['targets'][1])
                 
                 if target1 and target2:
-                    add( control, target1, name, mode=type, rotateTarget=target2 )
+                    pending.append( SpaceSpec(target1, name, type, target2) )
                 else:
-                    errors.append( 'MultiTarget:' + ' '.joint(spaceInfo['targets'])  )
+                    errors.append( 'MultiTarget:' + str(spaceInfo['targets']) )
                 
         else:
             # OLD GROSSER WAY
             name, target, type = spaceInfo
             if objExists(target):
-                add( control, PyNode(target), name, mode=type )
+                pending.append( SpaceSpec(PyNode(target), name, type, None) )
             elif target == 'trueWorld':
-                addTrueWorld( control, mode=type )
-            elif len(target.split()) == 2 and type in [ALT_ROTATE, DUAL_PARENT, DUAL_FOLLOW]:
+                pending.append( SpaceSpec(getTrueWorld(), 'world', type, None) )
+            elif len(target.split()) == 2 and type in [Mode.ALT_ROTATE, Mode.DUAL_PARENT, Mode.DUAL_FOLLOW]:
                 try:
                     a, b = target.split()
                     
                     if objExists(a) and objExists(b):
-                        add( control, PyNode(a), name, mode=type, rotateTarget=PyNode(b) )
+                        pending.append( SpaceSpec(PyNode(a), name, type, PyNode(b)) )
                     else:
                         errors.append( target )
                         continue
@@ -1311,6 +1754,12 @@ def deserializeSpaces(control, data):
                     errors.append( target )
             else:
                 errors.append( target )
+
+    flush()
+
+    # Default spaces made by the rig might already exist, but still need converting.
+    if matrix:
+        convertToMatrix(control)
     
     if errors:
         skelLog.msg(
@@ -149,6 +149,8 @@ class ShapeEditor(object):
         # it works for now.
         tube, outline, head = None, None, None
         
+        # The cvs are selected to be edited, which would change every instance.
+        controllerShape.makeUnique(sel[0])
         shapes = core.shape.getShapes(sel[0]) # This culls out switchers/vis shapes
         
         for shape in shapes[:]:
@@ -183,6 +185,7 @@ class ShapeEditor(object):
         if not obj.hasAttr('shapeType') or obj.shapeType.get() != 'band':
             return
         
+        controllerShape.makeUnique(obj)
         shapes = core.shape.getShapes(obj)
         
         if shapes[0].type() == 'nurbsSurface':
@@ -203,6 +206,7 @@ class ShapeEditor(object):
         sel = selected()
         select(cl=True)
         for obj in sel:
+            controllerShape.makeUnique(obj)
             for shape in core.shape.getShapes(obj):
                 select( shape.cv, add=True )
     
@@ -216,6 +220,7 @@ class ShapeEditor(object):
         trans += [ PyNode(obj).getParent() for obj in selectedNodes() if objectType(obj).startswith('nurbs') ]
         
         for obj in set(trans):
+            controllerShape.makeUnique(obj)
             for shape in core.shape.getShapes(obj):
                 if space == 'world':
                     rotate( shape.cv, rot, r=True, ws=True )
@@ -0,0 +1,123 @@
+'''
+Tests of `core.math.Network` with fake plugs, so the nodes it would make are
+recorded instead of built.
+'''
+from __future__ import print_function, absolute_import
+
+import pytest
+
+from pdil.core import math as pdilMath
+
+
+class FakePlug(object):
+    '''
+    Stands in for nodes and plugs, recording values set and connections made.
+    '''
+
+    def __init__(self, name):
+        self._name = name
+        self._children = {}
+        self.value = None
+        self.source = None
+
+    def name(self):
+        return self._name
+
+    def attr(self, name):
+        if name not in self._children:
+            self._children[name] = FakePlug(self._name + '.' + name)
+        return self._children[name]
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self.attr(name)
+
+    def __getitem__(self, index):
+        return self.attr( '[{0}]'.format(index) )
+
+    def set(self, value):
+        self.value = value
+
+    def __rshift__(self, other):
+        other.source = self
+
+
+@pytest.fixture
+def made(monkeypatch):
+    nodes = []
+
+    def createNode(nodeType, n=''):
+        node = FakePlug(n or nodeType)
+        node.nodeType = nodeType
+        nodes.append(node)
+        return node
+
+    monkeypatch.setattr(pdilMath, 'createNode', createNode)
+    return nodes
+
+
+def test_constantsFold(made):
+    assert pdilMath.network('2 * 3 + 1') == 7.0
+    assert pdilMath.network('a / 4', a=2) == 0.5
+    assert not made
+
+
+def test_identitiesFold(made):
+    a = FakePlug('a.tx')
+    assert pdilMath.network('a * 1 + 0', a=a) is a
+    assert not made
+
+
+def test_foldedConditionSkipsBranch(made):
+    a = FakePlug('a.tx')
+    result = pdilMath.network('a * 2 if 1 > 2 else a * 3', a=a)
+
+    assert len(made) == 1
+    node = made[0]
+    assert node.nodeType == 'multiplyDivide'
+    assert result is node.outputX
+    assert 3.0 in (node.input1X.value, node.input2X.value)
+    assert node.input1Y.source is None  # Only one channel used
+
+
+def test_sharedSubexpressions(made):
+    a, b = FakePlug('a.tx'), FakePlug('b.tx')
+    results = pdilMath.network( {'x': 'a * b', 'y': 'b * a'}, a=a, b=b )
+
+    assert len(made) == 1
+    assert results['x'] is results['y']
+
+
+def test_networkReusesEarlierBuilds(made):
+    a, b = FakePlug('a.tx'), FakePlug('b.tx')
+    net = pdilMath.Network(a=a, b=b)
+    first = net.build('a * b')
+    second = net.build('a * b + 1')
+
+    assert len(made) == 2
+    assert made[1].input3D[0].input3Dx.source is first or made[1].input3D[1].input3Dx.source is first
+    assert second is made[1].output3Dx
+
+
+def test_channelPacking(made):
+    a, b, c = FakePlug('a.tx'), FakePlug('b.tx'), FakePlug('c.tx')
+    results = pdilMath.network( {'x': 'a * 2', 'y': 'b * 3', 'z': 'c * 4', 'w': 'a * 5', 'v': 'a + b'}, a=a, b=b, c=c )
+
+    types = sorted( node.nodeType for node in made )
+    assert types == ['multiplyDivide', 'multiplyDivide', 'plusMinusAverage']
+
+    # Names repeat across nodes, so count the plugs themselves.
+    channels = set( id(plug) for name, plug in results.items() if name != 'v' )
+    assert len(channels) == 4
+
+
+def test_conditionsShareNode(made):
+    a, b = FakePlug('a.tx'), FakePlug('b.tx')
+    results = pdilMath.network( {'x': '1 if a > b else 0', 'y': '2 if a > b else 3'}, a=a, b=b )
+
+    assert len(made) == 1
+    node = made[0]
+    assert node.nodeType == 'condition'
+    assert node.firstTerm.source is a
+    assert set([results['x'], results['y']]) == set([node.outColorR, node.outColorG])